@@ -0,0 +1,104 @@
+import json
+import re
+from typing import Iterable, List, Optional, Tuple
+
+import pymongo
+
+from database import PoolMonitor
+from metrics import metrics
+
+
+class AdmissionController:
+    """Sheds load before it reaches MongoDB and assigns per-route deadlines.
+
+    A request is rejected with 503 + Retry-After when too many requests are
+    already in flight or when the Motor pool wait queue is backed up.
+    """
+
+    def __init__(
+        self,
+        pool_monitor: PoolMonitor,
+        budgets: List[Tuple[str, Optional[int]]],
+        default_budget_ms: int,
+        max_in_flight: int = 200,
+        max_pool_waiting: int = 50,
+        retry_after_seconds: int = 1,
+        exempt_paths: Iterable[str] = (),
+        exempt_patterns: Iterable[str] = (),
+    ):
+        self.pool_monitor = pool_monitor
+        # Longest prefix wins
+        self.budgets = sorted(budgets, key=lambda b: len(b[0]), reverse=True)
+        self.default_budget_ms = default_budget_ms
+        self.max_in_flight = max_in_flight
+        self.max_pool_waiting = max_pool_waiting
+        self.retry_after_seconds = retry_after_seconds
+        self.exempt_paths = set(exempt_paths)
+        self.exempt_patterns = [re.compile(p) for p in exempt_patterns]
+        self.in_flight = 0
+
+    def is_exempt(self, path: str) -> bool:
+        return path in self.exempt_paths or any(p.match(path) for p in self.exempt_patterns)
+
+    def budget_ms(self, path: str) -> Optional[int]:
+        for prefix, budget in self.budgets:
+            if path.startswith(prefix):
+                return budget
+        return self.default_budget_ms
+
+    def shed_reason(self) -> Optional[str]:
+        if self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        if self.pool_monitor.snapshot()["waiting"] >= self.max_pool_waiting:
+            return "pool_wait_queue"
+        return None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to every HTTP request.
+
+    Admitted requests run inside `pymongo.timeout(...)`, so every
+    find/aggregate/count they issue is sent with a maxTimeMS derived from
+    the remaining route budget.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if scope["type"] != "http" or controller.is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        reason = controller.shed_reason()
+        if reason:
+            metrics.inc("requests_shed", reason=reason)
+            await self._reject(send, reason)
+            return
+
+        controller.in_flight += 1
+        try:
+            budget = controller.budget_ms(scope["path"])
+            if budget is None:
+                # Long-running routes (streamed bodies) set their own deadlines
+                await self.app(scope, receive, send)
+            else:
+                with pymongo.timeout(budget / 1000):
+                    await self.app(scope, receive, send)
+        finally:
+            controller.in_flight -= 1
+
+    async def _reject(self, send, reason: str):
+        body = json.dumps({"detail": "Server busy, please retry", "reason": reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.controller.retry_after_seconds).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
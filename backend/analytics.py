@@ -0,0 +1,80 @@
+from datetime import date
+from typing import List
+
+import anyio
+import numpy as np
+import pandas as pd
+
+from slots import slot_order
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+async def load_slot_bookings(collections, venue_id: str, start: str, end: str, batch_size: int = 10000):
+    """Slot dates and times of a venue's live bookings, as two columns"""
+    dates: List[str] = []
+    slots: List[str] = []
+    for collection in collections:
+        cursor = collection.find(
+            {"venue_id": venue_id, "date": {"$gte": start, "$lte": end}, "status": {"$ne": "cancelled"}},
+            {"_id": 0, "date": 1, "time_slot": 1},
+            batch_size=batch_size,
+        )
+        async for booking in cursor:
+            dates.append(booking["date"])
+            slots.append(booking["time_slot"])
+    return dates, slots
+
+
+def utilization_matrix(dates: List[str], slots: List[str], layout: List[List[str]], start: str, end: str) -> dict:
+    """Weekday x slot share of the days on which each offered slot was booked.
+
+    `layout` holds the slot times offered on each weekday (0 = Monday), so
+    days a venue is closed and slots it doesn't run that weekday are left
+    out of the denominator. With an empty layout every booked slot counts
+    as offered daily.
+    """
+    frame = pd.DataFrame({"date": dates, "slot": slots}).drop_duplicates()
+    order = slot_order(layout)
+    if order:
+        offered = np.array([[t in day for t in order] for day in layout], dtype=float)
+    else:
+        order = sorted(frame["slot"].unique(), key=lambda t: pd.to_datetime(t, format="%I:%M %p"))
+        offered = np.ones((7, len(order)))
+    frame["weekday"] = pd.to_datetime(frame["date"], format="%Y-%m-%d").dt.weekday
+
+    booked = (
+        pd.crosstab(frame["weekday"], frame["slot"])
+        .reindex(index=range(7), columns=order, fill_value=0)
+        .to_numpy()
+    )
+    days = np.bincount(pd.date_range(start, end, freq="D").weekday, minlength=7)
+    capacity = days[:, None] * offered
+    # Bookings left in slots a template no longer offers don't count towards utilization
+    counted = booked * offered
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(capacity > 0, counted / capacity, 0.0)
+        by_slot = np.where(capacity.sum(axis=0) > 0, counted.sum(axis=0) / capacity.sum(axis=0), 0.0)
+        by_weekday = np.where(capacity.sum(axis=1) > 0, counted.sum(axis=1) / capacity.sum(axis=1), 0.0)
+
+    return {
+        "weekdays": WEEKDAYS,
+        "slots": list(order),
+        "days": days.tolist(),
+        "capacity": capacity.astype(int).tolist(),
+        "booked": booked.tolist(),
+        "utilization": np.round(utilization, 4).tolist(),
+        "by_slot": np.round(by_slot, 4).tolist(),
+        "by_weekday": np.round(by_weekday, 4).tolist(),
+        "overall": round(float(counted.sum() / max(capacity.sum(), 1)), 4),
+    }
+
+
+async def slot_utilization(collections, venue_id: str, layout: List[List[str]], start: date, end: date) -> dict:
+    """Heatmap of a venue's bookings in `collections` (e.g. live and archived) between two dates"""
+    dates, slots = await load_slot_bookings(collections, venue_id, start.isoformat(), end.isoformat())
+    # Pandas work is CPU-bound; keep it off the event loop
+    heatmap = await anyio.to_thread.run_sync(
+        utilization_matrix, dates, slots, layout, start.isoformat(), end.isoformat()
+    )
+    return {"venue_id": venue_id, "start": start.isoformat(), "end": end.isoformat(), **heatmap}
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Awaitable, Callable, List, Optional
+
+from pymongo import DeleteOne, ReplaceOne
+
+from metrics import metrics
+
+# Only bookings that can no longer change are archived
+ARCHIVED_STATUSES = ("completed", "cancelled")
+
+
+class BookingArchive:
+    """Moves finished bookings older than a horizon into `bookings_archive`.
+
+    Almost all booking traffic concerns recent slots, so keeping old
+    completed and cancelled bookings out of `bookings` keeps its indexes and
+    working set small. A booking is archived once its slot date is more
+    than `horizon_days` in the past, so anything dated on or after
+    `cutoff()` is guaranteed to be in the hot collection; readers only need
+    the archive for ids they could not find, or for ranges that reach
+    before the cutoff.
+
+    Booking dates are venue-local, so the cutoff is computed in the venues'
+    timezone `tz`; a UTC date would archive a day early or late around
+    midnight.
+    """
+
+    def __init__(self, db, horizon_days: int = 180, batch_size: int = 1000, pause: float = 0.1,
+                 tz: tzinfo = timezone.utc):
+        self.db = db
+        self.tz = tz
+        self.hot = db.bookings
+        self.cold = db.bookings_archive
+        self.horizon_days = horizon_days
+        self.batch_size = batch_size
+        self.pause = pause
+
+    async def ensure_indexes(self):
+        await self.cold.create_index("id", unique=True)
+        await self.cold.create_index([("user_id", 1), ("created_at", -1)])
+        await self.cold.create_index([("venue_id", 1), ("date", 1)])
+        await self.cold.create_index([("date", 1), ("created_at", -1)])
+        await self.hot.create_index([("status", 1), ("date", 1)])
+
+    def cutoff(self) -> str:
+        """Slot dates before this may be archived"""
+        return (datetime.now(self.tz).date() - timedelta(days=self.horizon_days)).isoformat()
+
+    def may_hold(self, query: dict) -> bool:
+        """Whether bookings matching `query` can be in the archive"""
+        status = query.get("status")
+        if isinstance(status, str) and status not in ARCHIVED_STATUSES:
+            return False
+        date = query.get("date")
+        if isinstance(date, str):
+            return date < self.cutoff()
+        if isinstance(date, dict) and date.get("$gte"):
+            return date["$gte"] < self.cutoff()
+        return True
+
+    async def find_one(self, query: dict, *args) -> Optional[dict]:
+        """Hot collection first, then the archive"""
+        return await self.hot.find_one(query, *args) or await self.cold.find_one(query, *args)
+
+    async def find(self, query: dict, limit: int) -> List[dict]:
+        """Newest bookings first, topped up from the archive only if the hot page is short"""
+        bookings = await self.hot.find(query).sort("created_at", -1).to_list(limit)
+        if len(bookings) < limit and self.may_hold(query):
+            bookings += await self.cold.find(query).sort("created_at", -1).to_list(limit - len(bookings))
+            bookings.sort(key=lambda b: b["created_at"], reverse=True)
+        return bookings
+
+    def collections(self, start: Optional[str] = None) -> list:
+        """Collections to scan for slot dates from `start` on"""
+        return [self.hot, self.cold] if not start or start < self.cutoff() else [self.hot]
+
+    async def run(self, on_batch: Callable[[List[dict]], Awaitable[None]],
+                  heartbeat: Optional[Callable[[], Awaitable[bool]]] = None) -> int:
+        """Archive everything past the horizon in batches; returns bookings moved.
+
+        Each batch is upserted into the archive before it is deleted from
+        `bookings`, so an interrupted run loses nothing and the next one
+        finishes the move.
+        """
+        query = {"status": {"$in": list(ARCHIVED_STATUSES)}, "date": {"$lt": self.cutoff()}}
+        moved = 0
+        while True:
+            batch = await self.hot.find(query).to_list(self.batch_size)
+            if not batch:
+                break
+            now = datetime.utcnow()
+            await self.cold.bulk_write(
+                [ReplaceOne({"id": b["id"]}, {**b, "archived_at": now}, upsert=True) for b in batch], ordered=False
+            )
+            result = await self.hot.bulk_write([DeleteOne({"_id": b["_id"]}) for b in batch], ordered=False)
+            moved += result.deleted_count
+            metrics.inc("bookings_archived", result.deleted_count)
+            await on_batch(batch)
+            if heartbeat and not await heartbeat():
+                raise RuntimeError("Lost the job lease; the next run resumes the archival")
+            await asyncio.sleep(self.pause)
+        return moved
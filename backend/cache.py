@@ -0,0 +1,41 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """Small in-process cache for hot read paths (venue lists, feed head).
+
+    Entries expire after `ttl` seconds; write paths call `invalidate` so a
+    worker never serves its own stale writes. With `max_entries`, the oldest
+    entries are dropped once the cache is full.
+    """
+
+    def __init__(self, ttl: float, max_entries: Optional[int] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries.pop(key, None)
+        if self.max_entries and len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            for stale in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+                del self._entries[stale]
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, prefix: str = ""):
+        """Drop every key starting with `prefix` (everything if empty)"""
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._entries.pop(key, None)
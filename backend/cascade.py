@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument
+
+from metrics import metrics
+
+# A dependent collection of a parent: (collection, field holding the parent
+# id, collection to archive removed documents into or None).
+Dependent = Tuple[str, str, Optional[str]]
+
+# on_batch(collection, docs) runs before a batch is removed and returns the
+# ids it touched, by kind, e.g. {"users": [...]}; they accumulate on the
+# cascade document for on_finish(cascade) to refresh derived state once.
+OnBatch = Callable[[str, List[dict]], Awaitable[Dict[str, list]]]
+OnFinish = Callable[[dict], Awaitable[None]]
+
+PENDING, RUNNING, DONE = "pending", "running", "done"
+
+
+class CascadeDelete:
+    """Removes a deleted parent's dependents in the background.
+
+    Deleting a parent only marks it; a job then walks each dependent
+    collection `batch_size` documents at a time, archiving and deleting
+    each batch with one bulk_write and sleeping `pause` seconds in between
+    so foreground traffic keeps its share of the primary. Progress lives in
+    `cascades`, one document per parent. Every step is idempotent, so a
+    retried job resumes where the last attempt stopped.
+    """
+
+    def __init__(self, db, batch_size: int = 500, pause: float = 0.1):
+        self.db = db
+        self.cascades = db.cascades
+        self.batch_size = batch_size
+        self.pause = pause
+
+    async def ensure_indexes(self):
+        await self.cascades.create_index("id", unique=True)
+        await self.cascades.create_index([("collection", 1), ("parent_id", 1)], unique=True)
+        await self.cascades.create_index([("status", 1), ("created_at", -1)])
+
+    async def start(self, collection: str, parent_id: str, dependents: List[Dependent]) -> dict:
+        """Record a cascade for a parent; starting one twice returns the first"""
+        now = datetime.utcnow()
+        cascade = {
+            "id": str(uuid.uuid4()),
+            "collection": collection,
+            "parent_id": parent_id,
+            "dependents": [list(d) for d in dependents],
+            "status": PENDING,
+            "removed": {name: 0 for name, _, _ in dependents},
+            "touched": {},
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        }
+        return await self.cascades.find_one_and_update(
+            {"collection": collection, "parent_id": parent_id},
+            {"$setOnInsert": cascade},
+            {"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def get(self, cascade_id: str, touched: bool = False) -> Optional[dict]:
+        projection = {"_id": 0} if touched else {"_id": 0, "touched": 0}
+        return await self.cascades.find_one({"id": cascade_id}, projection)
+
+    async def list(self, status: Optional[str] = None, limit: int = 100) -> List[dict]:
+        query = {"status": status} if status else {}
+        cursor = self.cascades.find(query, {"_id": 0, "touched": 0}).sort("created_at", -1)
+        return await cursor.to_list(limit)
+
+    async def _record(self, cascade_id: str, collection: str, removed: int, touched: Dict[str, list]):
+        update = {
+            "$inc": {f"removed.{collection}": removed},
+            "$set": {"status": RUNNING, "updated_at": datetime.utcnow()},
+        }
+        if touched:
+            update["$addToSet"] = {f"touched.{kind}": {"$each": list(set(ids))} for kind, ids in touched.items()}
+        await self.cascades.update_one({"id": cascade_id}, update)
+
+    async def run(self, cascade_id: str, on_batch: OnBatch, on_finish: OnFinish,
+                  heartbeat: Callable[[], Awaitable[bool]]) -> dict:
+        """Remove every dependent, then the parent; returns the counts removed"""
+        cascade = await self.get(cascade_id)
+        if not cascade or cascade["status"] == DONE:
+            return {"skipped": True}
+
+        for collection, field, archive in cascade["dependents"]:
+            while True:
+                cursor = self.db[collection].find({field: cascade["parent_id"]}).limit(self.batch_size)
+                docs = await cursor.to_list(self.batch_size)
+                if not docs:
+                    break
+                touched = await on_batch(collection, docs)
+                if archive:
+                    now = datetime.utcnow()
+                    await self.db[archive].bulk_write(
+                        [ReplaceOne({"_id": d["_id"]}, {**d, "archived_at": now}, upsert=True) for d in docs],
+                        ordered=False,
+                    )
+                result = await self.db[collection].bulk_write([DeleteOne({"_id": d["_id"]}) for d in docs],
+                                                              ordered=False)
+                await self._record(cascade_id, collection, result.deleted_count, touched)
+                metrics.inc("cascade_removed", result.deleted_count, collection=collection)
+                if not await heartbeat():
+                    raise RuntimeError("Lost the job lease; another worker will resume the cascade")
+                await asyncio.sleep(self.pause)
+
+        await on_finish(await self.get(cascade_id, touched=True))
+        await self.db[cascade["collection"]].delete_one({"id": cascade["parent_id"]})
+        now = datetime.utcnow()
+        await self.cascades.update_one(
+            {"id": cascade_id}, {"$set": {"status": DONE, "finished_at": now, "updated_at": now}}
+        )
+        return (await self.get(cascade_id))["removed"]
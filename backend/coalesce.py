@@ -0,0 +1,144 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from metrics import metrics
+
+
+class SingleFlight:
+    """Runs at most one computation per key; concurrent callers share its result.
+
+    The computation runs in its own task, so a caller that disconnects does
+    not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            shared = False
+        else:
+            shared = True
+        return await asyncio.shield(task), shared
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+
+@dataclass
+class CapturedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class CoalescingMiddleware:
+    """Coalesces identical concurrent GETs on hot public read routes.
+
+    Requests are keyed by path and normalized query string. The first request
+    runs the endpoint; the rest await it and replay the same serialized body.
+    With `stale_seconds` > 0 the last 200 response is served for that long
+    while a single background request revalidates it; at most
+    `max_stale_entries` such responses are kept.
+    """
+
+    def __init__(self, app, paths: Iterable[str], stale_seconds: float = 0, max_stale_entries: int = 1024):
+        self.app = app
+        self.paths = set(paths)
+        self.stale_seconds = stale_seconds
+        self.max_stale_entries = max_stale_entries
+        self.flight = SingleFlight()
+        self._recent: Dict[str, Tuple[float, CapturedResponse]] = {}
+
+    @staticmethod
+    def request_key(scope) -> str:
+        query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        # Conditional requests only share with callers holding the same ETag
+        if_none_match = dict(scope.get("headers", [])).get(b"if-none-match", b"").decode("latin-1")
+        return f"{scope['path']}?{urlencode(sorted(query))}#{if_none_match}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        key = self.request_key(scope)
+        stale = self._stale_copy(key)
+        if stale is not None:
+            if not self.flight.in_flight(key):
+                asyncio.ensure_future(self._revalidate(key, scope))
+            metrics.inc("coalesce_stale_served", path=scope["path"])
+            await self._replay(stale, send)
+            return
+
+        response, shared = await self.flight.do(key, lambda: self._capture(key, scope))
+        metrics.inc("coalesce_shared" if shared else "coalesce_leader", path=scope["path"])
+        await self._replay(response, send)
+
+    def _stale_copy(self, key: str):
+        if self.stale_seconds <= 0:
+            return None
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.stale_seconds:
+            self._recent.pop(key, None)
+            return None
+        return response
+
+    async def _revalidate(self, key: str, scope):
+        try:
+            await self.flight.do(key, lambda: self._capture(key, scope))
+        except Exception:
+            # The stale copy keeps being served until it ages out
+            pass
+
+    async def _capture(self, key: str, scope) -> CapturedResponse:
+        start = {}
+        chunks = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(dict(scope), receive, send)
+        response = CapturedResponse(start["status"], list(start.get("headers", [])), b"".join(chunks))
+        if self.stale_seconds > 0 and response.status == 200:
+            self._remember(key, response)
+        return response
+
+    def _remember(self, key: str, response: CapturedResponse):
+        # Re-inserting keeps `_recent` ordered oldest first, so expired
+        # entries and, past the cap, the oldest ones come off the front
+        now = time.monotonic()
+        self._recent.pop(key, None)
+        while self._recent:
+            oldest = next(iter(self._recent))
+            if now - self._recent[oldest][0] <= self.stale_seconds and len(self._recent) < self.max_stale_entries:
+                break
+            del self._recent[oldest]
+        self._recent[key] = (now, response)
+
+    async def _replay(self, response: CapturedResponse, send):
+        await send({"type": "http.response.start", "status": response.status, "headers": response.headers})
+        await send({"type": "http.response.body", "body": response.body})
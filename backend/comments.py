@@ -0,0 +1,98 @@
+import math
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from versioning import touch
+
+
+class CommentStore:
+    """Video comments kept in fixed-size bucket documents.
+
+    Every comment takes the next value of the video's `comment_seq` counter
+    and lands in bucket (seq - 1) // bucket_size, so a bucket never receives
+    more than `bucket_size` comments and a popular video grows more small
+    documents rather than one unbounded one. `comment_count` on the video is
+    the visible total and goes down on delete; `comment_seq` never does.
+    """
+
+    def __init__(self, db, bucket_size: int = 50):
+        self.videos = db.videos
+        self.buckets = db.comment_buckets
+        self.bucket_size = bucket_size
+
+    async def ensure_indexes(self):
+        await self.buckets.create_index([("video_id", 1), ("bucket", -1)], unique=True)
+
+    def bucket_of(self, seq: int) -> int:
+        return (seq - 1) // self.bucket_size
+
+    async def add(self, video_id: str, user_id: str, user_name: str, text: str) -> Optional[dict]:
+        video = await self.videos.find_one_and_update(
+            {"id": video_id},
+            touch({"$inc": {"comment_seq": 1, "comment_count": 1}}),
+            {"comment_seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not video:
+            return None
+        comment = {
+            "id": str(uuid.uuid4()),
+            "video_id": video_id,
+            "user_id": user_id,
+            "user_name": user_name,
+            "text": text,
+            "seq": video["comment_seq"],
+            "created_at": datetime.utcnow(),
+        }
+        bucket = {"video_id": video_id, "bucket": self.bucket_of(comment["seq"])}
+        update = {"$push": {"comments": comment}, "$inc": {"count": 1}}
+        try:
+            await self.buckets.update_one(bucket, update, upsert=True)
+        except DuplicateKeyError:
+            # Another comment created the bucket at the same moment
+            await self.buckets.update_one(bucket, update)
+        return comment
+
+    async def page(self, video_id: str, before: Optional[int], limit: int) -> Tuple[List[dict], Optional[int]]:
+        """Newest-first comments with seq < `before`; returns (comments, next cursor)"""
+        query = {"video_id": video_id}
+        if before is not None:
+            if before <= 1:
+                return [], None
+            query["bucket"] = {"$lte": self.bucket_of(before - 1)}
+        # Deletes can leave buckets short, so read one extra bucket
+        buckets = math.ceil(limit / self.bucket_size) + 1
+        cursor = self.buckets.find(query, {"_id": 0, "bucket": 1, "comments": 1}).sort("bucket", -1).limit(buckets)
+        fetched = await cursor.to_list(buckets)
+        comments = [c for b in fetched for c in b["comments"] if before is None or c["seq"] < before]
+        comments.sort(key=lambda c: c["seq"], reverse=True)
+        page = comments[:limit]
+        if len(page) == limit:
+            next_before = page[-1]["seq"]
+        elif len(fetched) == buckets and fetched[-1]["bucket"] > 0:
+            # Short page from sparse buckets; resume below the last one read
+            next_before = fetched[-1]["bucket"] * self.bucket_size + 1
+        else:
+            next_before = None
+        return page, next_before if next_before and next_before > 1 else None
+
+    async def delete(self, video_id: str, comment_id: str, user_id: Optional[str] = None) -> bool:
+        """Remove a comment; with `user_id`, only if that user wrote it"""
+        match = {"id": comment_id}
+        if user_id is not None:
+            match["user_id"] = user_id
+        result = await self.buckets.update_one(
+            {"video_id": video_id, "comments": {"$elemMatch": match}},
+            {"$pull": {"comments": {"id": comment_id}}, "$inc": {"count": -1}},
+        )
+        if result.modified_count == 0:
+            return False
+        await self.videos.update_one({"id": video_id}, touch({"$inc": {"comment_count": -1}}))
+        return True
+
+    async def delete_all(self, video_id: str):
+        await self.buckets.delete_many({"video_id": video_id})
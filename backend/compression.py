@@ -0,0 +1,172 @@
+import gzip
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import anyio
+
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is always available
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+# (max body size, level) - cheaper levels for bigger bodies keep CPU per
+# request bounded; small bodies get the better ratio
+GZIP_LEVELS = [(64 * 1024, 6), (1024 * 1024, 5), (None, 4)]
+BROTLI_LEVELS = [(64 * 1024, 5), (1024 * 1024, 4), (None, 3)]
+ZSTD_LEVELS = [(64 * 1024, 6), (1024 * 1024, 4), (None, 3)]
+
+
+def _level(table, size: int) -> int:
+    for limit, level in table:
+        if limit is None or size <= limit:
+            return level
+    return table[-1][1]
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=_level(GZIP_LEVELS, len(body)), mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=_level(BROTLI_LEVELS, len(body)))
+
+
+def _zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=_level(ZSTD_LEVELS, len(body))).compress(body)
+
+
+def available_codecs() -> Dict[str, Callable[[bytes], bytes]]:
+    """Codecs in server preference order"""
+    codecs = {}
+    if brotli is not None:
+        codecs["br"] = _brotli
+    if zstandard is not None:
+        codecs["zstd"] = _zstd
+    codecs["gzip"] = _gzip
+    return codecs
+
+
+def negotiate(accept_encoding: str, codecs: Dict[str, Callable]) -> Optional[str]:
+    """Pick the codec with the highest q-value, ties broken by server preference"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+    best, best_q = None, 0.0
+    for name in codecs:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """Negotiated br/zstd/gzip compression for complete (non-streaming) responses.
+
+    Bodies under `minimum_size` are sent as-is; bodies over `offload_size`
+    are compressed on a worker thread so large admin lists don't stall the
+    event loop. Bytes saved and compression CPU time are recorded per route.
+    Streaming responses (more_body) pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, offload_size: int = 128 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.codecs = available_codecs()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"), self.codecs)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = {}
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal passthrough
+            if message["type"] == "http.response.start":
+                start_message.update(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # e.g. http.response.zerocopysend - nothing to compress
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            if message.get("more_body", False) or not self._should_compress(start_message, message.get("body", b"")):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            await self._send_compressed(scope, start_message, message.get("body", b""), encoding, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start_message: dict, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start_message.get("status") in (204, 304):
+            return False
+        response_headers = dict(start_message.get("headers", []))
+        if b"content-encoding" in response_headers:
+            return False
+        content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _send_compressed(self, scope, start_message: dict, body: bytes, encoding: str, send):
+        codec = self.codecs[encoding]
+
+        def run() -> Tuple[bytes, float]:
+            cpu_start = time.thread_time()
+            compressed = codec(body)
+            return compressed, time.thread_time() - cpu_start
+
+        if len(body) >= self.offload_size:
+            compressed, cpu_seconds = await anyio.to_thread.run_sync(run)
+        else:
+            compressed, cpu_seconds = run()
+
+        route = getattr(scope.get("route"), "path", scope["path"])
+        metrics.inc("compression_bytes_in", len(body), route=route, encoding=encoding)
+        metrics.inc("compression_bytes_saved", len(body) - len(compressed), route=route, encoding=encoding)
+        metrics.observe("compression_cpu_ms", cpu_seconds * 1000, route=route, encoding=encoding)
+
+        headers: List[Tuple[bytes, bytes]] = [
+            (k, v) for k, v in start_message.get("headers", []) if k.lower() not in (b"content-length", b"vary")
+        ]
+        vary = dict(start_message.get("headers", [])).get(b"vary")
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(compressed)).encode()))
+        # Strong ETags describe the identity body; mark them weak once re-encoded
+        headers = [(k, b"W/" + v if k.lower() == b"etag" and not v.startswith(b"W/") else v) for k, v in headers]
+
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
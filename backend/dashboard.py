@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Delta = Tuple[str, dict]
+
+BOOKING_CREATED_FIELDS = ("id", "venue_id", "venue_name", "user_name", "date", "time_slot", "total_price", "status")
+
+
+def booking_revenue(booking: Optional[dict]) -> float:
+    return booking["total_price"] if booking and booking.get("status") != "cancelled" else 0
+
+
+class DashboardFeed:
+    """Turns booking and user changes into admin dashboard deltas.
+
+    One change stream per worker watches `bookings`, `bookings_archive`,
+    `users` and the `dashboard` revisions key, and dispatches deltas to
+    this worker's hub, so every dashboard sees every write - bulk imports,
+    cascade deletes and scripts included - whichever worker or process made
+    it. Needs a replica set.
+
+    Status and revenue deltas for updates and deletes need the document as
+    it was, so pre-images are enabled on the booking collections (MongoDB
+    6.0+). Without one the feed sends `resync` and the dashboard reloads
+    its stats, as it does after a rollup rebuild bumps `resync_key`.
+    """
+
+    def __init__(self, db, hub, channel: str, resync_key: str = "dashboard", max_moving: int = 10000):
+        self.db = db
+        self.hub = hub
+        self.channel = channel
+        self.resync_key = resync_key
+        self.max_moving = max_moving
+        # _ids copied into the archive whose delete from `bookings` hasn't arrived yet
+        self._moving: dict = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        for collection in ("bookings", "bookings_archive"):
+            try:
+                await self.db.command("collMod", collection, changeStreamPreAndPostImages={"enabled": True})
+            except Exception as e:
+                logger.warning(f"No change stream pre-images on {collection}, dashboard will resync instead: {e}")
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _watch(self):
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": {"$in": ["bookings", "bookings_archive", "users"]}},
+            {"ns.coll": "revisions", "documentKey._id": self.resync_key},
+        ]}}]
+        resume_after, delay = None, 1
+        while True:
+            try:
+                async with self.db.watch(pipeline, full_document="updateLookup",
+                                         full_document_before_change="whenAvailable",
+                                         resume_after=resume_after) as stream:
+                    delay = 1
+                    async for change in stream:
+                        resume_after = stream.resume_token
+                        self.handle(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Dashboard change stream interrupted: {e}")
+                metrics.inc("dashboard_stream_restarts")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def handle(self, change: dict):
+        for event, data in self.deltas(change):
+            self.hub.dispatch(self.channel, {"type": event, "data": data})
+
+    def deltas(self, change: dict) -> List[Delta]:
+        collection, operation = change["ns"]["coll"], change["operationType"]
+        after = change.get("fullDocument")
+        before = change.get("fullDocumentBeforeChange")
+        if collection == "revisions":
+            return [("resync", {})]
+        if collection == "users":
+            if operation != "insert":
+                return []
+            return [("user_created", {"id": after["id"], "name": after.get("name"),
+                                      "created_at": after["created_at"].isoformat()})]
+
+        if collection == "bookings_archive" and operation in ("insert", "replace"):
+            # An archival move: upserted here (same _id) first, deleted from bookings next
+            self._moving[change["documentKey"]["_id"]] = None
+            while len(self._moving) > self.max_moving:
+                del self._moving[next(iter(self._moving))]
+            return []
+        if operation == "insert":
+            created = {k: after.get(k) for k in BOOKING_CREATED_FIELDS}
+            return [("booking_created", created)] + self._revenue(None, after)
+        if operation in ("update", "replace"):
+            changed = change["updateDescription"]["updatedFields"] if operation == "update" else None
+            if changed is not None and not {"status", "total_price"} & changed.keys():
+                return []
+            if before is None or after is None:
+                return [("resync", {})]
+            return self._status(before, after["status"]) + self._revenue(before, after)
+        if operation == "delete":
+            if collection == "bookings" and change["documentKey"]["_id"] in self._moving:
+                del self._moving[change["documentKey"]["_id"]]
+                return []
+            if before is None:
+                return [("resync", {})]
+            return self._status(before, "deleted") + self._revenue(before, None)
+        return []
+
+    @staticmethod
+    def _status(before: dict, new_status: str) -> List[Delta]:
+        if before["status"] == new_status:
+            return []
+        return [("booking_status", {"id": before["id"], "from": before["status"], "to": new_status})]
+
+    @staticmethod
+    def _revenue(before: Optional[dict], after: Optional[dict]) -> List[Delta]:
+        delta = booking_revenue(after) - booking_revenue(before)
+        if not delta:
+            return []
+        return [("revenue", {"delta": delta, "booking_id": (after or before)["id"]})]
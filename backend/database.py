@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+@dataclass
+class MongoSettings:
+    """Connection pool and timeout settings, read from .env"""
+    url: str
+    db_name: str
+    max_pool_size: int = 100
+    min_pool_size: int = 10
+    max_idle_time_ms: Optional[int] = 300000
+    wait_queue_timeout_ms: Optional[int] = 2000
+    connect_timeout_ms: int = 5000
+    server_selection_timeout_ms: int = 5000
+    socket_timeout_ms: Optional[int] = 20000
+    max_time_ms: int = 3000
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        return cls(
+            url=os.environ['MONGO_URL'],
+            db_name=os.environ['DB_NAME'],
+            max_pool_size=_env_int('MONGO_MAX_POOL_SIZE', 100),
+            min_pool_size=_env_int('MONGO_MIN_POOL_SIZE', 10),
+            max_idle_time_ms=_env_int('MONGO_MAX_IDLE_TIME_MS', 300000),
+            wait_queue_timeout_ms=_env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000),
+            connect_timeout_ms=_env_int('MONGO_CONNECT_TIMEOUT_MS', 5000),
+            server_selection_timeout_ms=_env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+            socket_timeout_ms=_env_int('MONGO_SOCKET_TIMEOUT_MS', 20000),
+            max_time_ms=_env_int('MONGO_MAX_TIME_MS', 3000),
+        )
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection checkouts so health checks can report pool saturation.
+
+    Callbacks fire on Motor's executor threads, hence the lock.
+    """
+
+    def __init__(self, max_pool_size: int):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            in_use, open_, waiting, failures = self.in_use, self.open, self.waiting, self.checkout_failures
+        return {
+            "max_pool_size": self.max_pool_size,
+            "open": open_,
+            "in_use": in_use,
+            "idle": max(open_ - in_use, 0),
+            "waiting": waiting,
+            "checkout_failures": failures,
+            "saturation": round(in_use / self.max_pool_size, 3) if self.max_pool_size else 0.0,
+        }
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.in_use = 0
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.open = 0
+            self.in_use = 0
+            self.waiting = 0
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting = max(self.waiting - 1, 0)
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting = max(self.waiting - 1, 0)
+            self.in_use += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+
+def create_client(settings: MongoSettings, monitor: PoolMonitor) -> AsyncIOMotorClient:
+    """Build a Motor client for the current worker process"""
+    options = {
+        "maxPoolSize": settings.max_pool_size,
+        "minPoolSize": settings.min_pool_size,
+        "connectTimeoutMS": settings.connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.server_selection_timeout_ms,
+        "event_listeners": [monitor],
+    }
+    if settings.max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.max_idle_time_ms
+    if settings.wait_queue_timeout_ms is not None:
+        options["waitQueueTimeoutMS"] = settings.wait_queue_timeout_ms
+    if settings.socket_timeout_ms is not None:
+        options["socketTimeoutMS"] = settings.socket_timeout_ms
+    return AsyncIOMotorClient(settings.url, **options)
+
+
+async def warm_pool(client: AsyncIOMotorClient, settings: MongoSettings):
+    """Open min_pool_size connections up front instead of on the first requests"""
+    pings = max(settings.min_pool_size, 1)
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(pings)))
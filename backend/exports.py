@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable, ContextManager, List
+
+from metrics import metrics
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _encode_batch(rows: List[dict], columns: List[str], fmt: str) -> bytes:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps({c: _cell(row.get(c)) for c in columns}, default=str) + "\n" for row in rows
+        ).encode()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[_cell(row.get(c)) for c in columns] for row in rows])
+    return buffer.getvalue().encode()
+
+
+async def stream_export(collection, query: dict, columns: List[str], fmt: str, compress: bool = False,
+                        batch_size: int = 2000, deadline: Callable[[], ContextManager] = None) -> AsyncIterator[bytes]:
+    """Encoded chunks of every matching document, one Motor batch at a time.
+
+    Only `columns` are fetched, and at most one batch is held in memory, so
+    memory use does not depend on the size of the export. Each batch fetch
+    runs under its own `deadline()` so a long export never trips a
+    request-wide one.
+    """
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    projection = {"_id": 0, **{c: 1 for c in columns}}
+    cursor = collection.find(query, projection, batch_size=batch_size).sort("_id", 1)
+    rows_out = 0
+
+    def emit(data: bytes) -> bytes:
+        return gzip.compress(data) if gzip else data
+
+    if fmt == "csv":
+        header = io.StringIO()
+        csv.writer(header).writerow(columns)
+        yield emit(header.getvalue().encode())
+    try:
+        while True:
+            if deadline:
+                with deadline():
+                    rows = await cursor.to_list(batch_size)
+            else:
+                rows = await cursor.to_list(batch_size)
+            if not rows:
+                break
+            rows_out += len(rows)
+            chunk = emit(_encode_batch(rows, columns, fmt))
+            if chunk:
+                yield chunk
+        if gzip:
+            yield gzip.flush()
+    finally:
+        await cursor.close()
+        metrics.inc("export_rows", rows_out, collection=collection.name, format=fmt)
@@ -0,0 +1,168 @@
+import heapq
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import anyio
+from pymongo import UpdateOne
+
+from metrics import metrics
+
+# Score weights. A video gains affinity from the user's booked venues, their
+# sports and venues in the same area as the ones they book; popularity and
+# freshness break ties and keep new clips moving up.
+VENUE_WEIGHT = 3.0
+NEARBY_WEIGHT = 1.5
+SPORT_WEIGHT = 1.0
+POPULARITY_WEIGHT = 0.5
+FRESHNESS_WEIGHT = 2.0
+FEATURED_BONUS = 1.0
+FRESHNESS_HALF_LIFE_HOURS = 72
+
+# Per-key shortlist considered for each user, so ranking cost doesn't grow
+# with the size of the pool
+SHORTLIST_SIZE = 300
+
+
+def base_score(video: dict, now: datetime) -> float:
+    age_hours = max((now - video["created_at"]).total_seconds() / 3600, 0)
+    popularity = math.log1p(video.get("likes", 0) + video.get("views", 0) / 10)
+    freshness = 0.5 ** (age_hours / FRESHNESS_HALF_LIFE_HOURS)
+    featured = FEATURED_BONUS if video.get("is_featured") else 0
+    return POPULARITY_WEIGHT * popularity + FRESHNESS_WEIGHT * freshness + featured
+
+
+class CandidatePool:
+    """Recent public videos indexed by venue, area and sport, best first"""
+
+    def __init__(self, videos: List[dict], venue_areas: Dict[str, str], now: datetime):
+        self.base = {v["id"]: base_score(v, now) for v in videos}
+        self.owner = {v["id"]: v["user_id"] for v in videos}
+        by_venue, by_area, by_sport = defaultdict(list), defaultdict(list), defaultdict(list)
+        for video in sorted(videos, key=lambda v: self.base[v["id"]], reverse=True):
+            venue_id = video.get("venue_id")
+            if venue_id:
+                by_venue[venue_id].append(video["id"])
+                if venue_id in venue_areas:
+                    by_area[venue_areas[venue_id]].append(video["id"])
+            by_sport[video["sport"]].append(video["id"])
+        self.video_venue = {v["id"]: v.get("venue_id") for v in videos}
+        self.video_sport = {v["id"]: v["sport"] for v in videos}
+        self.by_venue = {k: ids[:SHORTLIST_SIZE] for k, ids in by_venue.items()}
+        self.by_area = {k: ids[:SHORTLIST_SIZE] for k, ids in by_area.items()}
+        self.by_sport = {k: ids[:SHORTLIST_SIZE] for k, ids in by_sport.items()}
+        self.venue_areas = venue_areas
+
+    def rank(self, user_id: str, venues: Dict[str, int], sports: Dict[str, int], limit: int) -> List[str]:
+        """Top `limit` video ids for a user from their booking counts"""
+        total = sum(venues.values()) or 1
+        venue_share = {k: n / total for k, n in venues.items()}
+        sport_total = sum(sports.values()) or 1
+        sport_share = {k: n / sport_total for k, n in sports.items()}
+        area_share = defaultdict(float)
+        for venue_id, share in venue_share.items():
+            area = self.venue_areas.get(venue_id)
+            if area:
+                area_share[area] += share
+
+        shortlist = set()
+        for venue_id in venue_share:
+            shortlist.update(self.by_venue.get(venue_id, ()))
+        for area in area_share:
+            shortlist.update(self.by_area.get(area, ()))
+        for sport in sport_share:
+            shortlist.update(self.by_sport.get(sport, ()))
+
+        def score(video_id: str) -> float:
+            venue_id = self.video_venue[video_id]
+            affinity = VENUE_WEIGHT * venue_share.get(venue_id, 0)
+            if venue_id not in venue_share:
+                affinity += NEARBY_WEIGHT * area_share.get(self.venue_areas.get(venue_id), 0)
+            affinity += SPORT_WEIGHT * sport_share.get(self.video_sport[video_id], 0)
+            return affinity + self.base[video_id]
+
+        shortlist = [v for v in shortlist if self.owner[v] != user_id]
+        return heapq.nlargest(limit, shortlist, key=score)
+
+
+class FeedRanker:
+    """Precomputes a bounded, ranked candidate list per active user.
+
+    Users who booked within `active_days` get up to `per_user` video ids
+    ranked from the venues and sports they booked and from venues in the
+    same area. Lists are rewritten wholesale on each run; users who stop
+    booking age out through the TTL index on `built_at`.
+    """
+
+    def __init__(self, db, per_user: int = 200, pool_size: int = 2000, active_days: int = 90,
+                 batch_size: int = 500, ttl_hours: int = 48):
+        self.db = db
+        self.candidates = db.feed_candidates
+        self.per_user = per_user
+        self.pool_size = pool_size
+        self.active_days = active_days
+        self.batch_size = batch_size
+        self.ttl_hours = ttl_hours
+
+    async def ensure_indexes(self):
+        await self.candidates.create_index("user_id", unique=True)
+        await self.candidates.create_index("built_at", expireAfterSeconds=self.ttl_hours * 3600)
+
+    async def for_user(self, user_id: str) -> Optional[List[str]]:
+        doc = await self.candidates.find_one({"user_id": user_id}, {"_id": 0, "video_ids": 1})
+        return doc["video_ids"] if doc else None
+
+    async def rebuild(self) -> dict:
+        now = datetime.utcnow()
+        videos = await self.db.videos.find(
+            {"is_public": True},
+            {"_id": 0, "id": 1, "venue_id": 1, "sport": 1, "user_id": 1, "likes": 1, "views": 1,
+             "is_featured": 1, "created_at": 1},
+        ).sort("created_at", -1).limit(self.pool_size).to_list(self.pool_size)
+        venue_areas = {
+            venue["id"]: venue["location"]
+            async for venue in self.db.venues.find({"is_active": True}, {"_id": 0, "id": 1, "location": 1})
+        }
+        pool = CandidatePool(videos, venue_areas, now)
+
+        # One row per active user with their booking counts per venue and sport
+        pipeline = [
+            {"$match": {"created_at": {"$gte": now - timedelta(days=self.active_days)},
+                        "status": {"$ne": "cancelled"}}},
+            {"$group": {"_id": {"user_id": "$user_id", "venue_id": "$venue_id", "sport": "$sport"},
+                        "count": {"$sum": 1}}},
+            {"$group": {"_id": "$_id.user_id",
+                        "visits": {"$push": {"venue_id": "$_id.venue_id", "sport": "$_id.sport",
+                                             "count": "$count"}}}},
+        ]
+        users, batch = 0, []
+        async for row in self.db.bookings.aggregate(pipeline, allowDiskUse=True):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                users += await self._write_batch(pool, batch, now)
+                batch = []
+        if batch:
+            users += await self._write_batch(pool, batch, now)
+        metrics.inc("feed_candidates_built", users)
+        return {"users": users, "pool": len(videos)}
+
+    async def _write_batch(self, pool: CandidatePool, rows: List[dict], now: datetime) -> int:
+        def rank_all():
+            ranked = []
+            for row in rows:
+                venues, sports = defaultdict(int), defaultdict(int)
+                for visit in row["visits"]:
+                    venues[visit["venue_id"]] += visit["count"]
+                    sports[visit["sport"]] += visit["count"]
+                ranked.append((row["_id"], pool.rank(row["_id"], venues, sports, self.per_user)))
+            return ranked
+
+        # Ranking is pure CPU; keep it off the event loop
+        ranked = await anyio.to_thread.run_sync(rank_all)
+        ops = [
+            UpdateOne({"user_id": user_id}, {"$set": {"video_ids": video_ids, "built_at": now}}, upsert=True)
+            for user_id, video_ids in ranked
+        ]
+        await self.candidates.bulk_write(ops, ordered=False)
+        return len(ops)
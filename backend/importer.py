@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from typing import Awaitable, Callable, Dict, Iterator, List, Tuple
+
+import anyio
+from pydantic import ValidationError
+
+MAX_REPORTED_ERRORS = 1000
+
+# Callables supplied per record type: validate turns a raw row into a
+# document (raising ValueError/ValidationError), write stores a batch and
+# returns (inserted, updated, {row number: error}).
+Validate = Callable[[dict], dict]
+WriteBatch = Callable[[List[Tuple[int, dict]]], Awaitable[Tuple[int, int, Dict[int, str]]]]
+
+
+def read_rows(stream: io.BufferedIOBase, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """(row number, raw dict) for each CSV record or NDJSON line, read lazily"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Blank cells mean "use the default"
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}
+        return
+    for number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {"__error__": f"Invalid JSON: {e}"}
+        yield number, row if isinstance(row, dict) else {"__error__": "Expected a JSON object"}
+
+
+def split_list(value) -> list:
+    """CSV cells hold lists as a|b|c; NDJSON already has real lists"""
+    if isinstance(value, str):
+        return [item.strip() for item in value.split("|") if item.strip()]
+    return value
+
+
+def describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.rows - self.inserted - self.updated - self.error_count,
+            "failed": self.error_count,
+            "errors": self.errors,
+        }
+
+
+async def run_import(stream: io.BufferedIOBase, fmt: str, validate: Validate, write: WriteBatch,
+                     batch_size: int = 500) -> ImportReport:
+    """Validate and write rows batch by batch; bad rows are reported, not fatal"""
+    report = ImportReport()
+    rows = read_rows(stream, fmt)
+
+    def next_batch() -> List[Tuple[int, dict]]:
+        batch = []
+        for number, raw in rows:
+            report.rows += 1
+            try:
+                if "__error__" in raw:
+                    raise ValueError(raw["__error__"])
+                batch.append((number, validate(raw)))
+            except (ValueError, ValidationError) as e:
+                report.fail(number, describe(e))
+            if len(batch) >= batch_size:
+                break
+        return batch
+
+    while True:
+        # Parsing and validation are CPU work on a file; keep them off the loop
+        batch = await anyio.to_thread.run_sync(next_batch)
+        if not batch:
+            break
+        inserted, updated, errors = await write(batch)
+        report.inserted += inserted
+        report.updated += updated
+        for number, message in sorted(errors.items()):
+            report.fail(number, message)
+    return report
@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle: queued -> leased -> done, or back to queued with backoff on
+# failure, or dead once max_attempts is used up. cancelled is terminal.
+QUEUED, LEASED, DONE, DEAD, CANCELLED = "queued", "leased", "done", "dead", "cancelled"
+
+
+class JobQueue:
+    """MongoDB-backed job queue with leases, retries and a dead-letter state.
+
+    A worker leases a job atomically with find_one_and_update. If it dies
+    mid-job the lease expires after `visibility_timeout` seconds and another
+    worker picks the job up again.
+    """
+
+    def __init__(
+        self,
+        db,
+        collection: str = "jobs",
+        visibility_timeout: int = 300,
+        max_attempts: int = 5,
+        backoff_base: int = 30,
+        backoff_max: int = 3600,
+    ):
+        self.collection = db[collection]
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", ASCENDING), ("run_at", ASCENDING)])
+        await self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index("dedupe_key", unique=True, sparse=True)
+        # Finished jobs are kept a week for inspection, then expire
+        await self.collection.create_index("finished_at", expireAfterSeconds=7 * 24 * 3600)
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: dict,
+        run_at: Optional[datetime] = None,
+        dedupe_key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+    ) -> dict:
+        """Add a job; with `dedupe_key` enqueueing the same work twice is a no-op"""
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload,
+            "status": QUEUED,
+            "run_at": run_at or now,
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if dedupe_key is None:
+            await self.collection.insert_one(dict(job))
+            return job
+        job["dedupe_key"] = dedupe_key
+        return await self.collection.find_one_and_update(
+            {"dedupe_key": dedupe_key},
+            {"$setOnInsert": job},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def reschedule(self, dedupe_key: str, run_at: datetime):
+        """Move a job that has not started yet, reviving it if it was cancelled or dead"""
+        await self.collection.update_one(
+            {"dedupe_key": dedupe_key, "status": {"$in": [QUEUED, CANCELLED, DEAD]}},
+            {"$set": {"status": QUEUED, "run_at": run_at, "attempts": 0, "updated_at": datetime.utcnow()}},
+        )
+
+    async def cancel(self, dedupe_key: str):
+        await self.collection.update_one(
+            {"dedupe_key": dedupe_key, "status": QUEUED},
+            {"$set": {"status": CANCELLED, "updated_at": datetime.utcnow()}},
+        )
+
+    async def cancel_many(self, dedupe_keys: List[str]):
+        if dedupe_keys:
+            await self.collection.update_many(
+                {"dedupe_key": {"$in": dedupe_keys}, "status": QUEUED},
+                {"$set": {"status": CANCELLED, "updated_at": datetime.utcnow()}},
+            )
+
+    async def lease(self, worker_id: str, job_types=None) -> Optional[dict]:
+        now = datetime.utcnow()
+        query = {
+            "$or": [
+                {"status": QUEUED, "run_at": {"$lte": now}},
+                {"status": LEASED, "lease_expires_at": {"$lte": now}},
+            ]
+        }
+        if job_types:
+            query["type"] = {"$in": list(job_types)}
+        return await self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": LEASED,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.visibility_timeout),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def extend(self, job: dict) -> bool:
+        """Heartbeat for long jobs; False means the lease was lost"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"id": job["id"], "status": LEASED, "lease_owner": job["lease_owner"]},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=self.visibility_timeout), "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    async def complete(self, job: dict, result: Optional[dict] = None):
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"id": job["id"], "lease_owner": job["lease_owner"]},
+            {"$set": {"status": DONE, "result": result, "finished_at": now, "updated_at": now,
+                      "lease_owner": None, "lease_expires_at": None}},
+        )
+
+    async def fail(self, job: dict, error: str) -> Optional[str]:
+        """Schedule a retry with exponential backoff, or dead-letter the job.
+
+        Returns the new status, or None if the lease was lost to another
+        worker, which now owns the job.
+        """
+        now = datetime.utcnow()
+        if job["attempts"] >= job["max_attempts"]:
+            status, run_at = DEAD, job["run_at"]
+        else:
+            delay = min(self.backoff_base * 2 ** (job["attempts"] - 1), self.backoff_max)
+            status, run_at = QUEUED, now + timedelta(seconds=delay)
+        result = await self.collection.update_one(
+            {"id": job["id"], "lease_owner": job["lease_owner"]},
+            {"$set": {"status": status, "run_at": run_at, "last_error": error[:2000], "updated_at": now,
+                      "lease_owner": None, "lease_expires_at": None}},
+        )
+        return status if result.matched_count == 1 else None
+
+    async def retry(self, job_id: str) -> bool:
+        """Put a dead job back on the queue with a fresh attempt budget"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"id": job_id, "status": DEAD},
+            {"$set": {"status": QUEUED, "attempts": 0, "run_at": now, "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    async def depth(self) -> Dict[str, Dict[str, int]]:
+        """Job counts by type and status"""
+        pipeline = [{"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}]
+        counts: Dict[str, Dict[str, int]] = {}
+        async for row in self.collection.aggregate(pipeline):
+            counts.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+        return counts
+
+
+JobHandler = Callable[[dict], Awaitable[Optional[dict]]]
+
+
+class WorkerPool:
+    """N async workers draining a JobQueue in this process"""
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, JobHandler], concurrency: int = 2,
+                 poll_interval: float = 1.0, dead_letter_handlers: Optional[Dict[str, JobHandler]] = None):
+        self.queue = queue
+        self.handlers = handlers
+        self.dead_letter_handlers = dead_letter_handlers or {}
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = []
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._run(f"{self.worker_prefix}:{i}")) for i in range(self.concurrency)]
+
+    async def stop(self):
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, worker_id: str):
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.lease(worker_id, self.handlers.keys())
+            except Exception as e:
+                logger.warning(f"Job lease failed: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: dict):
+        job_type = job["type"]
+        metrics.observe("job_latency_seconds", (datetime.utcnow() - job["run_at"]).total_seconds(), type=job_type)
+        if job["attempts"] > job["max_attempts"]:
+            # Lease expired too many times (worker crashes) - stop retrying
+            if await self.queue.fail(job, job.get("last_error") or "lease expired") == DEAD:
+                metrics.inc("jobs_dead", type=job_type)
+                await self._on_dead(job)
+            return
+        started = time.perf_counter()
+        try:
+            result = await self.handlers[job_type](job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job['id']} ({job_type}) failed")
+            status = await self.queue.fail(job, repr(e))
+            if status is None:
+                # Another worker re-leased the job; its outcome is theirs to record
+                metrics.inc("jobs_lease_lost", type=job_type)
+                return
+            metrics.inc("jobs_dead" if status == DEAD else "jobs_retried", type=job_type)
+            if status == DEAD:
+                await self._on_dead(job)
+            return
+        finally:
+            metrics.observe("job_duration_seconds", time.perf_counter() - started, type=job_type)
+        await self.queue.complete(job, result)
+        metrics.inc("jobs_completed", type=job_type)
+
+    async def _on_dead(self, job: dict):
+        on_dead = self.dead_letter_handlers.get(job["type"])
+        if on_dead is not None:
+            try:
+                await on_dead(job)
+            except Exception as e:
+                logger.warning(f"Dead-letter hook for job {job['id']} failed: {e}")
+
+
+class Scheduler:
+    """Enqueues recurring jobs.
+
+    Every process runs one, but the dedupe key is derived from the current
+    interval, so each run is enqueued exactly once across all workers.
+    """
+
+    def __init__(self, queue: JobQueue, intervals: Dict[str, int], tick: float = 30.0):
+        self.queue = queue
+        self.intervals = intervals
+        self.tick = tick
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            for job_type, interval in self.intervals.items():
+                bucket = int(time.time() // interval)
+                try:
+                    await self.queue.enqueue(job_type, {}, dedupe_key=f"periodic:{job_type}:{bucket}")
+                except Exception as e:
+                    logger.warning(f"Scheduling {job_type} failed: {e}")
+            await asyncio.sleep(self.tick)
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import json
+
+import server
+
+
+async def rebuild_user_stats(args):
+    users = await server.user_stats.rebuild(args.user or None)
+    print(f"Rebuilt stats for {users} users")
+
+
+async def rebuild_venue_rollups(args):
+    rows = await server.venue_daily_stats.rebuild(args.start, args.end)
+    print(f"Rebuilt {rows} daily venue rows")
+
+
+async def archive_bookings(args):
+    moved = await server.move_to_archive()
+    print(f"Archived {moved} bookings dated before {server.booking_archive.cutoff()}")
+
+
+async def drop_venue_slots(args):
+    # Slots are generated from slot templates; the stored arrays are unused
+    result = await server.db.venues.update_many({"slots": {"$exists": True}}, {"$unset": {"slots": ""}})
+    print(f"Removed stored slots from {result.modified_count} venues")
+
+
+async def import_records(args):
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(args.path, "rb") as source:
+        report = await server.import_records(args.kind, source, fmt)
+    errors = report.pop("errors")
+    print(json.dumps(report))
+    for error in errors:
+        print(f"row {error['row']}: {error['error']}")
+
+
+async def main(args):
+    server.connect_db()
+    try:
+        await server.ensure_indexes()
+        await args.func(args)
+    finally:
+        server.close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ClashON maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-user-stats", help="recompute user_stats from bookings and videos")
+    rebuild.add_argument("--user", action="append", help="only this user id (repeatable)")
+    rebuild.set_defaults(func=rebuild_user_stats)
+
+    rollups = commands.add_parser("rebuild-venue-rollups", help="recompute daily_venue_stats from bookings")
+    rollups.add_argument("--start", help="first slot date, YYYY-MM-DD")
+    rollups.add_argument("--end", help="last slot date, YYYY-MM-DD")
+    rollups.set_defaults(func=rebuild_venue_rollups)
+
+    archive = commands.add_parser("archive-bookings", help="move finished bookings past the horizon to the archive")
+    archive.set_defaults(func=archive_bookings)
+
+    drop_slots = commands.add_parser("drop-venue-slots", help="remove slot arrays stored on venues before slot templates")
+    drop_slots.set_defaults(func=drop_venue_slots)
+
+    importer = commands.add_parser("import", help="bulk import venues or bookings from CSV/NDJSON")
+    importer.add_argument("kind", choices=["venues", "bookings"])
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    importer.set_defaults(func=import_records)
+
+    args = parser.parse_args()
+    asyncio.run(main(args))
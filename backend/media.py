@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import io
+import ipaddress
+import logging
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from PIL import Image, ImageOps
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# (variant name, max width) - sources narrower than a variant are not upscaled
+VARIANT_SPECS = [("thumb", 320), ("medium", 800), ("large", 1280)]
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+MAX_REDIRECTS = 3
+
+
+class MediaSourceError(ValueError):
+    """The image URL may not be fetched; retrying won't help"""
+
+
+def make_variants(data: bytes) -> List[Tuple[str, int, int, bytes, bytes]]:
+    """Resize and re-encode an image; runs in a worker process.
+
+    Returns (name, width, height, webp_bytes, jpeg_bytes) per variant.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    variants = []
+    for name, max_width in VARIANT_SPECS:
+        resized = image.copy()
+        if resized.width > max_width:
+            resized.thumbnail((max_width, max_width * resized.height // resized.width), Image.LANCZOS)
+        webp, jpeg = io.BytesIO(), io.BytesIO()
+        resized.save(webp, "WEBP", quality=WEBP_QUALITY, method=4)
+        resized.save(jpeg, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        variants.append((name, resized.width, resized.height, webp.getvalue(), jpeg.getvalue()))
+    return variants
+
+
+class MediaPipeline:
+    """Produces resized WebP/JPEG variants for image URLs, once per content hash.
+
+    `media_assets` remembers both the source URLs seen and the sha256 of
+    their bytes, so the same photo shared by several venues is downloaded
+    once per URL and resized once overall.
+
+    Sources are fetched only from `allowed_hosts` (None allows any host)
+    and never from addresses that aren't globally routable, so URLs
+    supplied by clients can't reach internal services.
+    """
+
+    def __init__(self, db, storage, executor: Executor, max_source_bytes: int = 20 * 1024 * 1024,
+                 allowed_hosts: Optional[Iterable[str]] = None):
+        self.assets = db.media_assets
+        self.storage = storage
+        self.executor = executor
+        self.max_source_bytes = max_source_bytes
+        self.allowed_hosts = {h.lower() for h in allowed_hosts} if allowed_hosts is not None else None
+
+    async def ensure_indexes(self):
+        await self.assets.create_index("content_hash", unique=True)
+        await self.assets.create_index("source_urls")
+
+    async def variants_for(self, url: str) -> Dict[str, dict]:
+        known = await self.assets.find_one({"source_urls": url})
+        if known:
+            metrics.inc("media_cache_hits", by="url")
+            return known["variants"]
+
+        data = await self.download(url)
+        content_hash = hashlib.sha256(data).hexdigest()
+        known = await self.assets.find_one_and_update(
+            {"content_hash": content_hash}, {"$addToSet": {"source_urls": url}}
+        )
+        if known:
+            metrics.inc("media_cache_hits", by="content")
+            return known["variants"]
+
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(self.executor, make_variants, data)
+        variants = {}
+        for name, width, height, webp, jpeg in rendered:
+            prefix = f"images/{content_hash[:2]}/{content_hash}/{name}"
+            variants[name] = {
+                "width": width,
+                "height": height,
+                "webp": await self.storage.put_bytes(f"{prefix}.webp", webp, "image/webp"),
+                "jpeg": await self.storage.put_bytes(f"{prefix}.jpg", jpeg, "image/jpeg"),
+            }
+        await self.assets.update_one(
+            {"content_hash": content_hash},
+            {"$setOnInsert": {"variants": variants, "created_at": datetime.utcnow()},
+             "$addToSet": {"source_urls": url}},
+            upsert=True,
+        )
+        metrics.inc("media_variants_generated")
+        return variants
+
+    async def check_source(self, url: str):
+        """Raise MediaSourceError unless `url` is on an allowed host with only public addresses"""
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if parts.scheme not in ("http", "https") or not host:
+            raise MediaSourceError(f"Not an absolute http(s) URL: {url}")
+        if self.allowed_hosts is not None and host not in self.allowed_hosts:
+            raise MediaSourceError(f"Image host not allowed: {host}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        try:
+            addresses = await asyncio.get_running_loop().getaddrinfo(host, port)
+        except OSError as e:
+            raise MediaSourceError(f"Cannot resolve {host}: {e}")
+        for *_, sockaddr in addresses:
+            if not ipaddress.ip_address(sockaddr[0]).is_global:
+                raise MediaSourceError(f"Image host {host} resolves to a non-public address")
+
+    async def download(self, url: str) -> bytes:
+        # Redirects are followed by hand so every hop is checked
+        async with httpx.AsyncClient(timeout=30, follow_redirects=False) as http:
+            for _ in range(MAX_REDIRECTS + 1):
+                await self.check_source(url)
+                async with http.stream("GET", url) as response:
+                    if response.is_redirect:
+                        url = urljoin(url, response.headers["location"])
+                        continue
+                    response.raise_for_status()
+                    chunks, size = [], 0
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > self.max_source_bytes:
+                            raise ValueError(f"Image larger than {self.max_source_bytes} bytes: {url}")
+                        chunks.append(chunk)
+                    return b"".join(chunks)
+        raise MediaSourceError(f"More than {MAX_REDIRECTS} redirects: {url}")
@@ -0,0 +1,43 @@
+import threading
+from typing import Dict, Tuple
+
+
+def _key(name: str, labels: dict) -> Tuple[str, Tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """Process-local counters and summaries, exported by /api/health/metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._summaries: Dict[Tuple, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            summaries = {k: dict(v) for k, v in self._summaries.items()}
+        result: Dict[str, list] = {}
+        for (name, labels), value in counters.items():
+            result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        for (name, labels), summary in summaries.items():
+            summary["avg"] = summary["sum"] / summary["count"] if summary["count"] else 0.0
+            result.setdefault(name, []).append({"labels": dict(labels), **summary})
+        return result
+
+
+metrics = Metrics()
@@ -0,0 +1,186 @@
+from datetime import date as Date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from slots import Layout, SlotTemplates, slot_minutes
+from versioning import bump
+
+# A rule adjusts matching slots: price * multiplier + surcharge. It matches
+# every slot unless limited by weekdays (0 = Monday), a start/end time of
+# day (start inclusive, end exclusive) or specific dates (holidays).
+
+
+def validate_rule(rule: dict):
+    """Raise ValueError if a rule can't be compiled"""
+    if any(d not in range(7) for d in rule.get("weekdays") or []):
+        raise ValueError("weekdays must be 0 (Monday) to 6 (Sunday)")
+    for field in ("start_time", "end_time"):
+        if rule.get(field):
+            slot_minutes(rule[field])
+    for day in rule.get("dates") or []:
+        Date.fromisoformat(day)
+    if rule.get("multiplier", 1) < 0:
+        raise ValueError("multiplier must not be negative")
+
+
+def _matches(rule: dict, weekday: int, minutes: int) -> bool:
+    if rule.get("weekdays") and weekday not in rule["weekdays"]:
+        return False
+    if rule.get("start_time") and minutes < slot_minutes(rule["start_time"]):
+        return False
+    if rule.get("end_time") and minutes >= slot_minutes(rule["end_time"]):
+        return False
+    return True
+
+
+def _apply(row: List[float], rules: List[dict], weekday: int, minutes: List[int]) -> List[float]:
+    for rule in rules:
+        row = [
+            price * rule.get("multiplier", 1) + rule.get("surcharge", 0) if _matches(rule, weekday, m) else price
+            for price, m in zip(row, minutes)
+        ]
+    return row
+
+
+def _rounded(row: List[float]) -> List[float]:
+    return [round(price, 2) for price in row]
+
+
+class PriceMatrix:
+    """Compiled prices for one venue: a weekday x slot table plus per-date rows.
+
+    Each weekday row lines up with that weekday's slot layout. Date-specific
+    rules (holidays) only exist for the dates they name, so those dates get
+    their own row; any other date reads its weekday's row. A lookup is two
+    dict hits and a list index.
+    """
+
+    def __init__(self, layout: Layout, weekly: List[List[float]], dated: Dict[str, List[float]],
+                 super_video_price: float):
+        self.layout = layout
+        self.index = [{time: i for i, time in enumerate(times)} for times in layout]
+        self.weekly = weekly
+        self.dated = dated
+        self.super_video_price = super_video_price
+
+    def row(self, day: str) -> Tuple[int, List[float]]:
+        weekday = Date.fromisoformat(day).weekday()
+        return weekday, self.dated.get(day) or self.weekly[weekday]
+
+    def price(self, day: str, time_slot: str) -> Optional[float]:
+        weekday, row = self.row(day)
+        i = self.index[weekday].get(time_slot)
+        return None if i is None else row[i]
+
+    def prices(self, day: str) -> Dict[str, float]:
+        weekday, row = self.row(day)
+        return dict(zip(self.layout[weekday], row))
+
+    def dict(self) -> dict:
+        return {"slots": self.layout, "weekly": self.weekly, "dated": self.dated,
+                "super_video_price": self.super_video_price}
+
+
+def compile_price_matrix(base_price: float, layout: Layout, rules: List[dict],
+                         super_video_price: float = 0) -> PriceMatrix:
+    """Apply rules in priority order (weekly ones first, then date ones) to every slot"""
+    rules = sorted(rules, key=lambda r: r.get("priority", 0))
+    weekly_rules = [r for r in rules if not r.get("dates")]
+    minutes = [[slot_minutes(time) for time in times] for times in layout]
+
+    weekly = [_apply([base_price] * len(layout[d]), weekly_rules, d, minutes[d]) for d in range(7)]
+    dated = {}
+    for day in sorted({day for r in rules for day in r.get("dates") or []}):
+        weekday = Date.fromisoformat(day).weekday()
+        day_rules = [r for r in rules if day in (r.get("dates") or [])]
+        dated[day] = _apply(weekly[weekday], day_rules, weekday, minutes[weekday])
+    return PriceMatrix(layout, [_rounded(r) for r in weekly], {d: _rounded(r) for d, r in dated.items()},
+                       super_video_price)
+
+
+# Venue fields a price matrix depends on
+PRICED_FIELDS = {"id": 1, "base_price": 1, "super_video_price": 1,
+                 "slot_template_id": 1, "opening_time": 1, "closing_time": 1}
+
+
+class PricingEngine:
+    """Compiles and caches a PriceMatrix per venue.
+
+    Matrices are cached in process and tagged with the venue's
+    `pricing:<venue_id>` version. Anything that changes a venue's prices
+    (its rules, base price or slot layout) bumps that version through
+    `invalidate`, so every worker recompiles just that venue on its next
+    lookup and the others stay cached.
+    """
+
+    def __init__(self, db, slot_templates: SlotTemplates):
+        self.db = db
+        self.rules = db.pricing_rules
+        self.slot_templates = slot_templates
+        self._compiled: Dict[str, Tuple[int, PriceMatrix]] = {}
+
+    async def ensure_indexes(self):
+        await self.rules.create_index("id", unique=True)
+        await self.rules.create_index("venue_id")
+
+    @staticmethod
+    def version_key(venue_id: str) -> str:
+        return f"pricing:{venue_id}"
+
+    async def invalidate(self, venue_ids: Optional[Iterable[str]] = None):
+        """Force a recompile of some venues, or of every venue when None.
+
+        Also bumps the `pricing` version, which caches of many venues' prices
+        (the venue lists) are keyed on.
+        """
+        if venue_ids is None:
+            venue_ids = await self.db.venues.distinct("id")
+        await bump(self.db, "pricing", *(self.version_key(v) for v in dict.fromkeys(venue_ids) if v))
+
+    async def _compile(self, venue_ids: List[str]) -> Dict[str, PriceMatrix]:
+        """Matrices for several venues from one venues query, one rules query and one layouts lookup"""
+        venues = await self.db.venues.find(
+            {"id": {"$in": venue_ids}, "deleted_at": None}, {"_id": 0, **PRICED_FIELDS}
+        ).to_list(None)
+        if not venues:
+            return {}
+        rules: Dict[Optional[str], List[dict]] = {}
+        async for rule in self.rules.find({"venue_id": {"$in": [None, *venue_ids]}, "is_active": True}):
+            rules.setdefault(rule.get("venue_id"), []).append(rule)
+        layouts = await self.slot_templates.layouts(venues)
+        return {
+            venue["id"]: compile_price_matrix(
+                venue["base_price"], layouts[venue["id"]], rules.get(None, []) + rules.get(venue["id"], []),
+                venue.get("super_video_price", 0),
+            )
+            for venue in venues
+        }
+
+    async def matrices(self, venue_ids: List[str]) -> Dict[str, PriceMatrix]:
+        """Current matrices for several venues: one versions query, then one batched compile of the stale ones"""
+        keys = {self.version_key(v): v for v in venue_ids}
+        versions = {keys[doc["_id"]]: doc["version"]
+                    async for doc in self.db.revisions.find({"_id": {"$in": list(keys)}})}
+        result, stale = {}, []
+        for venue_id in venue_ids:
+            cached = self._compiled.get(venue_id)
+            if cached and cached[0] == versions.get(venue_id, 0):
+                result[venue_id] = cached[1]
+            else:
+                stale.append(venue_id)
+        if stale:
+            for venue_id, matrix in (await self._compile(stale)).items():
+                self._compiled[venue_id] = (versions.get(venue_id, 0), matrix)
+                result[venue_id] = matrix
+        # Keep the caller's order
+        return {v: result[v] for v in venue_ids if v in result}
+
+    async def matrix(self, venue_id: str) -> Optional[PriceMatrix]:
+        return (await self.matrices([venue_id])).get(venue_id)
+
+    async def quote(self, venue_id: str, day: str, time_slot: str, super_video: bool = False) -> Optional[float]:
+        """Authoritative price of one booking; None for an unknown venue or slot"""
+        matrix = await self.matrix(venue_id)
+        price = matrix.price(day, time_slot) if matrix else None
+        if price is None:
+            return None
+        return round(price + (matrix.super_video_price if super_video else 0), 2)
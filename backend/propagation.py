@@ -0,0 +1,62 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import metrics
+from versioning import touch
+
+# Where a parent's name is copied: (collection, field holding the parent id,
+# field holding the copied name).
+Target = Tuple[str, str, str]
+
+# Fields handed to on_batch, enough to invalidate per-user/per-venue caches
+OWNER_FIELDS = {"_id": 1, "user_id": 1, "venue_id": 1}
+
+
+class NamePropagator:
+    """Rewrites denormalized copies of a renamed venue's or user's name.
+
+    Bookings and videos copy `venue_name`/`user_name` when they are created
+    so reads never need a join. After a rename, `propagate` finds stale
+    copies through the parent-id index `batch_size` at a time and rewrites
+    each chunk with one update_many, pausing `pause` seconds in between so
+    a venue with years of bookings doesn't crowd out foreground writes.
+    Only copies that differ from the current name are touched, so an
+    interrupted run simply resumes and a repeated one is a no-op.
+    """
+
+    def __init__(self, db, targets: Dict[str, List[Target]], batch_size: int = 500, pause: float = 0.2):
+        self.db = db
+        self.targets = targets
+        self.batch_size = batch_size
+        self.pause = pause
+
+    async def propagate(
+        self,
+        kind: str,
+        parent_id: str,
+        name: str,
+        on_batch: Optional[Callable[[str, List[dict]], Awaitable[None]]] = None,
+        heartbeat: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Dict[str, int]:
+        """Set `name` on every copy for one parent; returns documents updated per collection"""
+        updated = {}
+        for collection, key, field in self.targets[kind]:
+            stale = {key: parent_id, field: {"$ne": name}}
+            updated[collection] = 0
+            while True:
+                cursor = self.db[collection].find(stale, OWNER_FIELDS).limit(self.batch_size)
+                docs = await cursor.to_list(self.batch_size)
+                if not docs:
+                    break
+                result = await self.db[collection].update_many(
+                    {"_id": {"$in": [d["_id"] for d in docs]}, field: {"$ne": name}},
+                    touch({"$set": {field: name}}),
+                )
+                updated[collection] += result.modified_count
+                metrics.inc("names_propagated", result.modified_count, collection=collection)
+                if on_batch:
+                    await on_batch(collection, docs)
+                if heartbeat and not await heartbeat():
+                    raise RuntimeError("Lost the job lease; a retry resumes the propagation")
+                await asyncio.sleep(self.pause)
+        return updated
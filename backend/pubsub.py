@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """One connection's mailbox; a single queue however many channels it joins.
+
+    If the client stops reading and the queue fills up, the subscriber is
+    marked lagged and further messages are dropped, so one slow socket never
+    holds up publishing. The connection should resync and reset it.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.channels: Set[str] = set()
+        self.lagged = False
+
+    def offer(self, message: dict):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+            metrics.inc("pubsub_lagged_subscribers")
+
+
+class Hub:
+    """In-process fan-out of channel messages to subscribed connections.
+
+    Messages are published through a backend, which delivers them back to
+    `dispatch` on every worker - just this one for LocalBackend, all of them
+    for MongoChangeStreamBackend. Subscribing is a set insert, so thousands
+    of idle subscribers cost one small queue each.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+        self._channels: Dict[str, Set[Subscriber]] = {}
+
+    async def start(self):
+        await self.backend.start(self)
+
+    async def stop(self):
+        await self.backend.stop()
+
+    def subscribe(self, subscriber: Subscriber, channel: str):
+        self._channels.setdefault(channel, set()).add(subscriber)
+        subscriber.channels.add(channel)
+
+    def unsubscribe(self, subscriber: Subscriber, channel: Optional[str] = None):
+        """Leave one channel, or every channel when `channel` is None"""
+        for name in [channel] if channel else list(subscriber.channels):
+            members = self._channels.get(name)
+            if members is not None:
+                members.discard(subscriber)
+                if not members:
+                    del self._channels[name]
+            subscriber.channels.discard(name)
+
+    def waiter(self, channel: str) -> "Waiter":
+        """Register for the next message on `channel` (see Waiter)"""
+        return Waiter(self, channel)
+
+    async def publish(self, channel: str, message: dict):
+        metrics.inc("pubsub_published")
+        await self.backend.publish(channel, message)
+
+    def dispatch(self, channel: str, message: dict):
+        for subscriber in self._channels.get(channel, ()):
+            subscriber.offer({"channel": channel, **message})
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(members) for members in self._channels.values())
+
+
+class Waiter:
+    """Waits for one message on a channel, e.g. for a long-poll request.
+
+    Use as a context manager and register before reading the current state,
+    then `wait`; a change landing between the read and the wait is still
+    delivered. Costs one set entry and a one-slot queue while waiting.
+    """
+
+    def __init__(self, hub: Hub, channel: str):
+        self.hub = hub
+        self.channel = channel
+        self.subscriber = Subscriber(max_queue=1)
+
+    def __enter__(self):
+        self.hub.subscribe(self.subscriber, self.channel)
+        return self
+
+    def __exit__(self, *exc):
+        self.hub.unsubscribe(self.subscriber)
+
+    async def wait(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.subscriber.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBackend:
+    """Delivers only within this process; enough for a single worker"""
+
+    async def start(self, hub: Hub):
+        self.hub = hub
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: dict):
+        self.hub.dispatch(channel, message)
+
+
+class MongoChangeStreamBackend:
+    """Cross-worker delivery through inserts into a short-lived collection.
+
+    Every worker watches the collection's change stream and dispatches the
+    inserts to its own hub. Needs a replica set (change streams); events
+    expire through a TTL index once delivered.
+    """
+
+    def __init__(self, db, collection: str = "pubsub_events", ttl_seconds: int = 60):
+        self.events = db[collection]
+        self.ttl_seconds = ttl_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, hub: Hub):
+        self.hub = hub
+        await self.events.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def publish(self, channel: str, message: dict):
+        await self.events.insert_one(
+            {"channel": channel, "message": message, "created_at": datetime.utcnow()}
+        )
+
+    async def _watch(self):
+        resume_after = None
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with self.events.watch(pipeline, resume_after=resume_after) as stream:
+                    async for change in stream:
+                        resume_after = stream.resume_token
+                        event = change["fullDocument"]
+                        self.hub.dispatch(event["channel"], event["message"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Pub/sub change stream interrupted: {e}")
+                metrics.inc("pubsub_stream_restarts")
+                await asyncio.sleep(1)
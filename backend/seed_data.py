@@ -4,6 +4,9 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from pathlib import Path
 
+from pricing import PricingEngine
+from versioning import bump
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -24,8 +27,7 @@ venues_data = [
         "base_price": 500,
         "super_video_price": 200,
         "image": "https://images.unsplash.com/photo-1626926938421-90124a4b83fa?crop=entropy&cs=srgb&fm=jpg&ixid=M3w4NjAzNzl8MHwxfHNlYXJjaHwyfHxiYWRtaW50b24lMjBjb3VydHxlbnwwfHx8fDE3NzA4ODUwODJ8MA&ixlib=rb-4.1.0&q=85&w=800",
-        "amenities": ["Parking", "Changing Room", "Water", "AC Courts"],
-        "slots": []
+        "amenities": ["Parking", "Changing Room", "Water", "AC Courts"]
     },
     {
         "id": "venue-002",
@@ -37,8 +39,7 @@ venues_data = [
         "base_price": 1500,
         "super_video_price": 300,
         "image": "https://images.unsplash.com/photo-1512719994953-eabf50895df7?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3MjQyMTd8MHwxfHNlYXJjaHwxfHxjcmlja2V0JTIwc3RhZGl1bXxlbnwwfHx8fDE3NzA4ODUwODh8MA&ixlib=rb-4.1.0&q=85&w=800",
-        "amenities": ["Turf Ground", "Floodlights", "Pavilion", "Practice Nets"],
-        "slots": []
+        "amenities": ["Turf Ground", "Floodlights", "Pavilion", "Practice Nets"]
     },
     {
         "id": "venue-003",
@@ -50,8 +51,7 @@ venues_data = [
         "base_price": 600,
         "super_video_price": 200,
         "image": "https://images.unsplash.com/photo-1626926938421-90124a4b83fa?crop=entropy&cs=srgb&fm=jpg&ixid=M3w4NjAzNzl8MHwxfHNlYXJjaHwyfHxiYWRtaW50b24lMjBjb3VydHxlbnwwfHx8fDE3NzA4ODUwODJ8MA&ixlib=rb-4.1.0&q=85&w=800",
-        "amenities": ["Parking", "Cafeteria", "Pro Shop", "AC Courts", "Lockers"],
-        "slots": []
+        "amenities": ["Parking", "Cafeteria", "Pro Shop", "AC Courts", "Lockers"]
     },
     {
         "id": "venue-004",
@@ -63,8 +63,7 @@ venues_data = [
         "base_price": 1200,
         "super_video_price": 300,
         "image": "https://images.unsplash.com/photo-1512719994953-eabf50895df7?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3MjQyMTd8MHwxfHNlYXJjaHwxfHxjcmlja2V0JTIwc3RhZGl1bXxlbnwwfHx8fDE3NzA4ODUwODh8MA&ixlib=rb-4.1.0&q=85&w=800",
-        "amenities": ["Coaching Available", "Turf Ground", "Changing Room", "Water"],
-        "slots": []
+        "amenities": ["Coaching Available", "Turf Ground", "Changing Room", "Water"]
     },
     {
         "id": "venue-005",
@@ -76,8 +75,7 @@ venues_data = [
         "base_price": 450,
         "super_video_price": 150,
         "image": "https://images.unsplash.com/photo-1626926938421-90124a4b83fa?crop=entropy&cs=srgb&fm=jpg&ixid=M3w4NjAzNzl8MHwxfHNlYXJjaHwyfHxiYWRtaW50b24lMjBjb3VydHxlbnwwfHx8fDE3NzA4ODUwODJ8MA&ixlib=rb-4.1.0&q=85&w=800",
-        "amenities": ["Parking", "Water", "AC Courts"],
-        "slots": []
+        "amenities": ["Parking", "Water", "AC Courts"]
     },
     {
         "id": "venue-006",
@@ -89,32 +87,10 @@ venues_data = [
         "base_price": 2000,
         "super_video_price": 400,
         "image": "https://images.unsplash.com/photo-1512719994953-eabf50895df7?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3MjQyMTd8MHwxfHNlYXJjaHwxfHxjcmlja2V0JTIwc3RhZGl1bXxlbnwwfHx8fDE3NzA4ODUwODh8MA&ixlib=rb-4.1.0&q=85&w=800",
-        "amenities": ["Full Size Ground", "Floodlights", "Pavilion", "Parking", "Cafeteria"],
-        "slots": []
+        "amenities": ["Full Size Ground", "Floodlights", "Pavilion", "Parking", "Cafeteria"]
     }
 ]
 
-def generate_slots(base_price):
-    """Generate time slots from 6 AM to 10 PM"""
-    slots = []
-    start_hour = 6
-    
-    for i in range(16):  # 16 hours of slots
-        hour = start_hour + i
-        am_pm = "AM" if hour < 12 else "PM"
-        display_hour = hour if hour <= 12 else hour - 12
-        if display_hour == 0:
-            display_hour = 12
-        time_str = f"{display_hour:02d}:00 {am_pm}"
-        
-        slots.append({
-            "time": time_str,
-            "available": True,
-            "price": base_price
-        })
-    
-    return slots
-
 async def seed_venues():
     """Seed sample venues into database"""
     print("Starting to seed venues...")
@@ -123,13 +99,12 @@ async def seed_venues():
     await db.venues.delete_many({})
     print("Cleared existing venues")
     
-    # Add slots to each venue
-    for venue in venues_data:
-        venue["slots"] = generate_slots(venue["base_price"])
-    
-    # Insert venues
+    # Insert venues; slots are generated from their opening hours, not stored
     result = await db.venues.insert_many(venues_data)
     print(f"Inserted {len(result.inserted_ids)} venues")
+
+    # Running servers cache venue lists and price matrices by version
+    await bump(db, "venues", "pricing", *(PricingEngine.version_key(v["id"]) for v in venues_data))
     
     # Print summary
     print("\n✅ Sample venues seeded successfully!")
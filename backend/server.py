@@ -1,16 +1,58 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import base64
+import hashlib
+import json
+import mimetypes
+import pymongo
 import os
+import time
+import anyio
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, urlsplit
+from zoneinfo import ZoneInfo
 import random
 import string
+import tempfile
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from admission import AdmissionController, AdmissionMiddleware
+from analytics import WEEKDAYS, slot_utilization
+from archive import BookingArchive
+from cache import TTLCache
+from cascade import CascadeDelete
+from dashboard import DashboardFeed
+from coalesce import CoalescingMiddleware
+from comments import CommentStore
+from compression import CompressionMiddleware
+from metrics import metrics
+from pricing import PRICED_FIELDS, PricingEngine, validate_rule
+from slots import SlotTemplates, build_layout, validate_template
+from propagation import NamePropagator
+from pubsub import Hub, LocalBackend, MongoChangeStreamBackend, Subscriber
+from stats import UserStats, VenueDailyStats
+from versioning import bump, current, etag_matches, make_etag, touch
+from exports import FORMATS, stream_export
+from importer import run_import, split_list
+from database import MongoSettings, PoolMonitor, create_client, warm_pool
+from feed import FeedRanker
+from jobs import JobQueue, Scheduler, WorkerPool
+from media import MediaPipeline, MediaSourceError
+from storage import LocalStorage, storage_from_env
+from streaming import FileHandleCache, RangeFileResponse
+from uploads import UploadError, UploadManager
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -20,13 +62,315 @@ load_dotenv(ROOT_DIR / '.env')
 DUMMY_OTP_MODE = True
 DUMMY_OTP = "123456"
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection - the client is created per worker in `lifespan`
+mongo_settings = MongoSettings.from_env()
+pool_monitor = PoolMonitor(mongo_settings.max_pool_size)
+client = None
+db = None
+
+# Hot read caches, primed before the worker accepts traffic
+HOT_CACHE_TTL_SECONDS = float(os.environ.get('HOT_CACHE_TTL_SECONDS', '5'))
+# Bounded because some keys carry client input (the venue list's sport filter)
+HOT_CACHE_MAX_ENTRIES = int(os.environ.get('HOT_CACHE_MAX_ENTRIES', '4096'))
+hot_cache = TTLCache(HOT_CACHE_TTL_SECONDS, max_entries=HOT_CACHE_MAX_ENTRIES)
+
+# Analytics results, keyed by the venue's bookings version so writes invalidate them
+ANALYTICS_CACHE_TTL_SECONDS = float(os.environ.get('ANALYTICS_CACHE_TTL_SECONDS', '600'))
+analytics_cache = TTLCache(ANALYTICS_CACHE_TTL_SECONDS, max_entries=1024)
+worker_state = {"started_at": time.time(), "ready": False}
+
+# A worker whose warmup fails keeps retrying with backoff up to this delay
+WARMUP_RETRY_MIN_SECONDS = float(os.environ.get('WARMUP_RETRY_MIN_SECONDS', '1'))
+WARMUP_RETRY_MAX_SECONDS = float(os.environ.get('WARMUP_RETRY_MAX_SECONDS', '30'))
+
+# Load shedding - reject with 503 instead of queueing on a saturated pool
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '200'))
+ADMISSION_MAX_POOL_WAITING = int(os.environ.get('ADMISSION_MAX_POOL_WAITING', '50'))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get('ADMISSION_RETRY_AFTER_SECONDS', '1'))
+ADMISSION_EXEMPT_PATHS = ["/api/", "/api/health/live", "/api/health/ready", "/api/health/metrics"]
+# Long-lived responses that would otherwise hold in-flight slots
+ADMISSION_EXEMPT_PATTERNS = [
+    r"^/api/videos/[^/]+/stream$",
+    r"^/api/admin/dashboard/stream$",
+    r"^/api/bookings/[^/]+/video-status/wait$",
+    r"^/api/admin/export/",
+]
+
+# Conditional GET - clients revalidate with If-None-Match and get a 304
+PUBLIC_CACHE_CONTROL = "public, max-age=15, must-revalidate"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Identical concurrent GETs on these routes share one query and response.
+# COALESCE_STALE_SECONDS > 0 serves the last response while revalidating.
+COALESCED_PATHS = ["/api/venues", "/api/videos", "/api/feed"]
+COALESCE_STALE_SECONDS = float(os.environ.get('COALESCE_STALE_SECONDS', '0'))
+COALESCE_MAX_STALE_ENTRIES = int(os.environ.get('COALESCE_MAX_STALE_ENTRIES', '1024'))
+
+# Response compression - skip tiny bodies, compress big ones off the event loop
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_OFFLOAD_SIZE = int(os.environ.get('COMPRESSION_OFFLOAD_SIZE', str(128 * 1024)))
+
+# Background jobs - async workers per API process (0 = run `python worker.py` instead)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.environ.get('JOB_VISIBILITY_TIMEOUT_SECONDS', '300'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))
+job_queue = None
+job_workers = None
+job_scheduler = None
+
+# Media - image variants are rendered in a process pool and kept in `storage`
+MEDIA_PROCESS_WORKERS = int(os.environ.get('MEDIA_PROCESS_WORKERS', '2'))
+# Hosts images are fetched from for variants, besides our storage; "*" allows any public host
+MEDIA_SOURCE_HOSTS = [
+    h.strip() for h in os.environ.get('MEDIA_SOURCE_HOSTS', 'images.unsplash.com').split(',') if h.strip()
+]
+storage = storage_from_env(ROOT_DIR)
+media_executor = None
+media_pipeline = None
+
+# Chunked video uploads
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+UPLOAD_TTL_HOURS = int(os.environ.get('UPLOAD_TTL_HOURS', '24'))
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', str(5 * 1024 ** 3)))
+upload_manager = None
+
+# Personalized feed - candidate lists are ranked in the background per active user
+FEED_RANK_INTERVAL_SECONDS = int(os.environ.get('FEED_RANK_INTERVAL_SECONDS', '3600'))
+FEED_CANDIDATES_PER_USER = int(os.environ.get('FEED_CANDIDATES_PER_USER', '200'))
+FEED_CANDIDATE_POOL = int(os.environ.get('FEED_CANDIDATE_POOL', '2000'))
+FEED_ACTIVE_DAYS = int(os.environ.get('FEED_ACTIVE_DAYS', '90'))
+feed_ranker = None
+
+# Video comments are stored COMMENT_BUCKET_SIZE to a document
+COMMENT_BUCKET_SIZE = int(os.environ.get('COMMENT_BUCKET_SIZE', '50'))
+COMMENT_PAGE_SIZE = 20
+comment_store = None
+
+# Deleting a venue or user removes its bookings/videos in the background,
+# CASCADE_BATCH_SIZE at a time with a pause between batches
+CASCADE_BATCH_SIZE = int(os.environ.get('CASCADE_BATCH_SIZE', '500'))
+CASCADE_PAUSE_SECONDS = float(os.environ.get('CASCADE_PAUSE_SECONDS', '0.2'))
+cascade_deletes = None
+# Venues and users awaiting their cascade carry deleted_at; reads skip them
+LIVE = {"deleted_at": None}
+
+# Completed/cancelled bookings whose slot date is older than this move to
+# bookings_archive; reads fall back to it only when they have to
+BOOKING_ARCHIVE_DAYS = int(os.environ.get('BOOKING_ARCHIVE_DAYS', '180'))
+BOOKING_ARCHIVE_BATCH_SIZE = int(os.environ.get('BOOKING_ARCHIVE_BATCH_SIZE', '1000'))
+BOOKING_COLLECTIONS = ("bookings", "bookings_archive")
+booking_archive = None
+
+# Renames are copied into bookings/videos NAME_PROPAGATION_BATCH_SIZE at a time
+NAME_PROPAGATION_BATCH_SIZE = int(os.environ.get('NAME_PROPAGATION_BATCH_SIZE', '500'))
+NAME_PROPAGATION_PAUSE_SECONDS = float(os.environ.get('NAME_PROPAGATION_PAUSE_SECONDS', '0.2'))
+name_propagator = None
+pricing_engine = None
+
+# Live updates (slot availability over WebSockets, the admin dashboard over
+# SSE) go through one hub. PUBSUB_BACKEND=mongo fans out across workers
+# through a single change stream per worker (needs a replica set).
+PUBSUB_BACKEND = os.environ.get('PUBSUB_BACKEND', 'local')
+WS_MAX_SUBSCRIPTIONS = int(os.environ.get('WS_MAX_SUBSCRIPTIONS', '20'))
+WS_QUEUE_SIZE = int(os.environ.get('WS_QUEUE_SIZE', '100'))
+SSE_HEARTBEAT_SECONDS = 15
+LONG_POLL_MAX_SECONDS = 55
+event_hub = None
+# Admin dashboard deltas come from one change stream per API worker on the
+# bookings and users collections, whatever PUBSUB_BACKEND is
+DASHBOARD_CHANNEL = "admin:dashboard"
+DASHBOARD_RESYNC_KEY = "dashboard"
+dashboard_feed = None
+
+# Per-user totals and per-venue daily rollups maintained on every booking/video write
+user_stats = None
+venue_daily_stats = None
+
+# Video streaming - open descriptors of hot local recordings are kept around
+STREAM_MAX_OPEN_FILES = int(os.environ.get('STREAM_MAX_OPEN_FILES', '256'))
+stream_files = FileHandleCache(STREAM_MAX_OPEN_FILES)
+# Behind nginx, hand files over with X-Accel-Redirect to this internal
+# location (aliased to MEDIA_ROOT) so nginx sendfile()s them; uvicorn can
+# only copy bytes through Python
+STREAM_ACCEL_REDIRECT_PREFIX = os.environ.get('STREAM_ACCEL_REDIRECT_PREFIX', '')
+
+# Slot times are local to the venues
+VENUE_TIMEZONE = ZoneInfo(os.environ.get('VENUE_TIMEZONE', 'Asia/Kolkata'))
+SLOT_DURATION_MINUTES = 60
+
+# Per-route deadline budgets (ms) for MongoDB work, longest prefix wins.
+# Routes not listed get MONGO_MAX_TIME_MS.
+ROUTE_DEADLINES_MS = [
+    ("/api/admin/dashboard", 8000),
+    ("/api/admin/users/", 5000),
+    ("/api/admin/", 4000),
+    ("/api/auth/", 2000),
+    ("/api/venues", 1500),
+    ("/api/videos", 1500),
+    ("/api/uploads", None),  # chunk bodies stream for a while; see db_deadline()
+    ("/api/admin/import", None),  # bounded per batch instead
+]
+admission = AdmissionController(
+    pool_monitor,
+    budgets=ROUTE_DEADLINES_MS,
+    default_budget_ms=mongo_settings.max_time_ms,
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_pool_waiting=ADMISSION_MAX_POOL_WAITING,
+    retry_after_seconds=ADMISSION_RETRY_AFTER_SECONDS,
+    exempt_paths=ADMISSION_EXEMPT_PATHS,
+    exempt_patterns=ADMISSION_EXEMPT_PATTERNS,
+)
+
+def media_source_hosts() -> Optional[List[str]]:
+    """Hosts image variants may be fetched from; None allows any public host"""
+    if "*" in MEDIA_SOURCE_HOSTS:
+        return None
+    storage_host = urlsplit(storage.base_url).hostname
+    return MEDIA_SOURCE_HOSTS + ([storage_host] if storage_host else [])
+
+def connect_db():
+    """Create this process's Mongo client and the objects bound to it"""
+    global client, db, job_queue, media_executor, media_pipeline, upload_manager, feed_ranker, comment_store, user_stats, venue_daily_stats, event_hub, dashboard_feed, cascade_deletes, booking_archive, name_propagator, pricing_engine, slot_templates
+    client = create_client(mongo_settings, pool_monitor)
+    db = client[mongo_settings.db_name]
+    job_queue = JobQueue(
+        db,
+        visibility_timeout=JOB_VISIBILITY_TIMEOUT_SECONDS,
+        max_attempts=JOB_MAX_ATTEMPTS,
+    )
+    media_executor = ProcessPoolExecutor(max_workers=MEDIA_PROCESS_WORKERS)
+    media_pipeline = MediaPipeline(db, storage, media_executor, allowed_hosts=media_source_hosts())
+    upload_manager = UploadManager(
+        db, storage, default_chunk_size=UPLOAD_CHUNK_SIZE, ttl_hours=UPLOAD_TTL_HOURS, max_size=UPLOAD_MAX_SIZE
+    )
+    feed_ranker = FeedRanker(
+        db,
+        per_user=FEED_CANDIDATES_PER_USER,
+        pool_size=FEED_CANDIDATE_POOL,
+        active_days=FEED_ACTIVE_DAYS,
+    )
+    comment_store = CommentStore(db, bucket_size=COMMENT_BUCKET_SIZE)
+    user_stats = UserStats(db, booking_collections=BOOKING_COLLECTIONS)
+    venue_daily_stats = VenueDailyStats(db, booking_collections=BOOKING_COLLECTIONS)
+    booking_archive = BookingArchive(
+        db, horizon_days=BOOKING_ARCHIVE_DAYS, batch_size=BOOKING_ARCHIVE_BATCH_SIZE, tz=VENUE_TIMEZONE
+    )
+    slot_templates = SlotTemplates(db)
+    pricing_engine = PricingEngine(db, slot_templates)
+    name_propagator = NamePropagator(
+        db,
+        NAME_COPIES,
+        batch_size=NAME_PROPAGATION_BATCH_SIZE,
+        pause=NAME_PROPAGATION_PAUSE_SECONDS,
+    )
+    cascade_deletes = CascadeDelete(db, batch_size=CASCADE_BATCH_SIZE, pause=CASCADE_PAUSE_SECONDS)
+    event_hub = Hub(MongoChangeStreamBackend(db) if PUBSUB_BACKEND == "mongo" else LocalBackend())
+    dashboard_feed = DashboardFeed(db, event_hub, DASHBOARD_CHANNEL, resync_key=DASHBOARD_RESYNC_KEY)
+
+def close_db():
+    media_executor.shutdown(wait=False, cancel_futures=True)
+    client.close()
+
+async def ensure_indexes():
+    await db.videos.create_index([("is_public", 1), ("created_at", -1), ("id", -1)])
+    await db.videos.create_index("booking_id")
+    await db.bookings.create_index([("venue_id", 1), ("date", 1)])
+    await db.bookings.create_index([("user_id", 1), ("created_at", -1)])
+    await db.bookings.create_index([("venue_id", 1), ("date", 1), ("time_slot", 1), ("user_id", 1)])
+    await db.venues.create_index([("name", 1), ("location", 1)])
+    await db.videos.create_index("venue_id")
+    await db.videos.create_index("user_id")
+    await job_queue.ensure_indexes()
+    await media_pipeline.ensure_indexes()
+    await upload_manager.ensure_indexes()
+    await feed_ranker.ensure_indexes()
+    await comment_store.ensure_indexes()
+    await user_stats.ensure_indexes()
+    await venue_daily_stats.ensure_indexes()
+    await cascade_deletes.ensure_indexes()
+    await booking_archive.ensure_indexes()
+    await pricing_engine.ensure_indexes()
+    await slot_templates.ensure_indexes()
+    await db.venues.create_index("slot_template_id")
+
+def db_deadline():
+    """Deadline for Mongo work on routes exempt from the request-wide budget"""
+    return pymongo.timeout(mongo_settings.max_time_ms / 1000)
+
+def create_job_workers(concurrency: int) -> WorkerPool:
+    return WorkerPool(job_queue, JOB_HANDLERS, concurrency=concurrency,
+                      dead_letter_handlers=JOB_DEAD_LETTER_HANDLERS)
+
+def create_job_scheduler() -> Scheduler:
+    return Scheduler(job_queue, PERIODIC_JOBS)
+
+def warmup_steps() -> list:
+    return [
+        lambda: warm_pool(client, mongo_settings),
+        ensure_indexes,
+        lambda: event_hub.start(),
+        lambda: dashboard_feed.start(),
+        prime_hot_caches,
+    ]
+
+async def run_warmup(steps: list) -> bool:
+    """Run the remaining warmup steps in order; each one that succeeds is removed"""
+    try:
+        while steps:
+            await steps[0]()
+            steps.pop(0)
+    except Exception as e:
+        logger.error(f"Warmup failed: {e}")
+        return False
+    worker_state["ready"] = True
+    return True
+
+def start_job_workers():
+    """In-process job workers; only started once warmup has succeeded"""
+    global job_workers, job_scheduler
+    if JOB_WORKERS > 0:
+        job_workers = create_job_workers(JOB_WORKERS)
+        job_workers.start()
+        job_scheduler = create_job_scheduler()
+        job_scheduler.start()
+
+async def retry_warmup(steps: list):
+    """Retry warmup with backoff until the worker is ready, then start its job workers"""
+    delay = WARMUP_RETRY_MIN_SECONDS
+    while True:
+        await asyncio.sleep(delay)
+        if await run_warmup(steps):
+            logger.info("Warmup succeeded after retrying")
+            start_job_workers()
+            return
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global job_workers, job_scheduler
+    connect_db()
+    steps = warmup_steps()
+    warmup_task = None
+    if await run_warmup(steps):
+        start_job_workers()
+    else:
+        # Stay up so /api/health/ready reports not_ready while retrying
+        warmup_task = asyncio.create_task(retry_warmup(steps))
+    yield
+    worker_state["ready"] = False
+    if warmup_task:
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    if job_workers:
+        await job_scheduler.stop()
+        await job_workers.stop()
+        job_workers = job_scheduler = None
+    await dashboard_feed.stop()
+    await event_hub.stop()
+    close_db()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -100,6 +444,12 @@ class TimeSlot(BaseModel):
     available: bool = True
     price: float
 
+class ImageVariant(BaseModel):
+    width: int
+    height: int
+    webp: str
+    jpeg: str
+
 class Venue(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -108,6 +458,8 @@ class Venue(BaseModel):
     sport: str
     image: Optional[str] = None
     images: List[str] = []  # Multiple images
+    image_variants: Dict[str, ImageVariant] = {}  # Resized copies of `image`, by size
+    gallery_variants: List[Dict[str, ImageVariant]] = []  # Same for `images`, in order
     rating: float = 4.5
     total_reviews: int = 0
     smart_recording: bool = True
@@ -119,9 +471,12 @@ class Venue(BaseModel):
     contact_email: Optional[str] = None
     opening_time: str = "06:00 AM"
     closing_time: str = "10:00 PM"
-    slots: List[TimeSlot] = []
+    slot_template_id: Optional[str] = None  # None: hourly slots within opening hours
+    slots: List[TimeSlot] = []  # Today's slots, generated on read; never stored
     is_active: bool = True
+    revision: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class VenueCreate(BaseModel):
     name: str
@@ -140,6 +495,7 @@ class VenueCreate(BaseModel):
     contact_email: Optional[str] = None
     opening_time: str = "06:00 AM"
     closing_time: str = "10:00 PM"
+    slot_template_id: Optional[str] = None
 
 class VenueUpdate(BaseModel):
     name: Optional[str] = None
@@ -158,8 +514,71 @@ class VenueUpdate(BaseModel):
     contact_email: Optional[str] = None
     opening_time: Optional[str] = None
     closing_time: Optional[str] = None
+    slot_template_id: Optional[str] = None  # "" goes back to opening hours
+    is_active: Optional[bool] = None
+
+
+# ============= SLOT TEMPLATE MODELS =============
+
+class DayHours(BaseModel):
+    opening_time: str
+    closing_time: str
+
+class SlotTemplateCreate(BaseModel):
+    name: str
+    duration_minutes: int = 60
+    gap_minutes: int = 0
+    opening_time: str = "06:00 AM"
+    closing_time: str = "10:00 PM"
+    weekday_hours: Dict[str, Optional[DayHours]] = {}  # "0" (Monday) to "6"; null closes that day
+
+class SlotTemplateUpdate(BaseModel):
+    name: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    gap_minutes: Optional[int] = None
+    opening_time: Optional[str] = None
+    closing_time: Optional[str] = None
+    weekday_hours: Optional[Dict[str, Optional[DayHours]]] = None
+
+class SlotTemplate(SlotTemplateCreate):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ============= PRICING MODELS =============
+
+class PricingRuleCreate(BaseModel):
+    name: str
+    venue_id: Optional[str] = None  # None applies to every venue
+    weekdays: List[int] = []  # 0 = Monday; empty means every day
+    start_time: Optional[str] = None  # e.g. "06:00 PM", inclusive
+    end_time: Optional[str] = None  # exclusive
+    dates: List[str] = []  # Holidays etc.; the rule then applies only on these dates
+    multiplier: float = 1.0
+    surcharge: float = 0
+    priority: int = 0  # Lower runs first
+    is_active: bool = True
+
+class PricingRuleUpdate(BaseModel):
+    name: Optional[str] = None
+    weekdays: Optional[List[int]] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    dates: Optional[List[str]] = None
+    multiplier: Optional[float] = None
+    surcharge: Optional[float] = None
+    priority: Optional[int] = None
     is_active: Optional[bool] = None
 
+# An update sending null for one of these removes the time limit
+CLEARABLE_RULE_FIELDS = {"start_time", "end_time"}
+
+class PricingRule(PricingRuleCreate):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 
 # ============= BOOKING MODELS =============
 
@@ -170,7 +589,7 @@ class BookingCreate(BaseModel):
     time_slot: str
     sport: str
     super_video_enabled: bool = False
-    total_price: float
+    total_price: Optional[float] = None  # Ignored on public bookings; priced server-side
     user_id: str
     user_name: str
 
@@ -197,8 +616,12 @@ class Booking(BaseModel):
     status: str = "confirmed"
     video_status: str = "pending"
     video_url: Optional[str] = None
+    recording_url: Optional[str] = None  # Raw upload the Super Video is cut from
+    recording_key: Optional[str] = None
     notes: Optional[str] = None
+    revision: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 # ============= VIDEO MODELS =============
@@ -206,23 +629,30 @@ class Booking(BaseModel):
 class Video(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     booking_id: Optional[str] = None
+    venue_id: Optional[str] = None
     venue_name: str
     sport: str
     title: Optional[str] = None
     description: Optional[str] = None
     thumbnail: Optional[str] = None
+    thumbnail_variants: Dict[str, ImageVariant] = {}
     video_url: Optional[str] = None
+    storage_key: Optional[str] = None  # Set when the file lives in our storage
     duration: int = 45
     likes: int = 0
     views: int = 0
+    comment_count: int = 0
     user_id: str
     user_name: str
     is_featured: bool = False
     is_public: bool = True
+    revision: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class VideoCreate(BaseModel):
     booking_id: Optional[str] = None
+    venue_id: Optional[str] = None
     venue_name: str
     sport: str
     title: Optional[str] = None
@@ -233,6 +663,57 @@ class VideoCreate(BaseModel):
     user_id: str
     user_name: str
 
+class NextSlot(BaseModel):
+    date: str
+    time: str
+    price: float
+
+class VenueCard(BaseModel):
+    """Compact venue summary embedded in feed items for "Book this Court" """
+    id: str
+    name: str
+    location: str
+    sport: str
+    base_price: float
+    rating: float
+    image: Optional[str] = None
+    next_free_slot: Optional[NextSlot] = None
+
+class FeedItem(BaseModel):
+    video: Video
+    venue: Optional[VenueCard] = None
+
+class FeedPage(BaseModel):
+    items: List[FeedItem]
+    next_cursor: Optional[str] = None
+
+class UploadInit(BaseModel):
+    filename: str
+    content_type: str = "video/mp4"
+    total_size: int
+    chunk_size: Optional[int] = None
+    booking_id: Optional[str] = None
+    video_id: Optional[str] = None
+    user_id: Optional[str] = None
+
+class Comment(BaseModel):
+    id: str
+    video_id: str
+    user_id: str
+    user_name: str
+    text: str
+    seq: int
+    created_at: datetime
+
+class CommentCreate(BaseModel):
+    user_id: str
+    user_name: str
+    text: str = Field(min_length=1, max_length=1000)
+
+class CommentPage(BaseModel):
+    items: List[Comment]
+    next_cursor: Optional[int] = None
+
 class VideoUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -242,6 +723,55 @@ class VideoUpdate(BaseModel):
     is_public: Optional[bool] = None
 
 
+# ============= WRITE HOOKS =============
+# Booking and video write paths call these once the write has succeeded, so
+# derived state (collection versions, video jobs, user stats, ...) is
+# maintained in one place.
+
+def booking_version_keys(booking: dict) -> List[str]:
+    return ["bookings", f"bookings:user:{booking['user_id']}", f"bookings:venue:{booking['venue_id']}"]
+
+async def on_booking_created(booking: dict):
+    await bump(db, *booking_version_keys(booking))
+    await publish_slot_changes(None, booking)
+    await user_stats.booking_changed(None, booking)
+    await venue_daily_stats.booking_changed(None, booking)
+    if booking.get("super_video_enabled"):
+        await schedule_super_video(booking)
+
+async def on_booking_updated(before: dict, after: dict):
+    await bump(db, *dict.fromkeys(booking_version_keys(before) + booking_version_keys(after)))
+    await publish_slot_changes(before, after)
+    if before.get("video_status") != after.get("video_status"):
+        await publish_video_status(after)
+    await user_stats.booking_changed(before, after)
+    await venue_daily_stats.booking_changed(before, after)
+    if after.get("status") == "cancelled" or not after.get("super_video_enabled"):
+        await job_queue.cancel(super_video_job_key(after["id"]))
+    elif any(before.get(f) != after.get(f) for f in ("date", "time_slot", "super_video_enabled", "status")):
+        await schedule_super_video(after)
+
+async def on_booking_deleted(booking: dict):
+    await bump(db, *booking_version_keys(booking))
+    await publish_slot_changes(booking, None)
+    await user_stats.booking_changed(booking, None)
+    await venue_daily_stats.booking_changed(booking, None)
+    await job_queue.cancel(super_video_job_key(booking["id"]))
+
+async def on_renamed(kind: str, parent_id: str):
+    # Runs from the current name, so back-to-back renames settle on the last one
+    await job_queue.enqueue("propagate_names", {"kind": kind, "id": parent_id})
+
+async def on_video_created(video: dict):
+    await bump(db, "videos")
+    await user_stats.video_changed(video, 1)
+
+async def on_video_deleted(video: dict):
+    await bump(db, "videos")
+    await user_stats.video_changed(video, -1)
+    await comment_store.delete_all(video["id"])
+
+
 # ============= AUTH ROUTES =============
 
 @api_router.post("/auth/check-user-type")
@@ -251,7 +781,7 @@ async def check_user_type(request: OTPRequest):
     if admin:
         return {"user_type": "admin", "name": admin.get("name", "Admin")}
     
-    user = await db.users.find_one({"phone": request.phone})
+    user = await db.users.find_one({"phone": request.phone, **LIVE})
     if user:
         return {"user_type": "user", "name": user.get("name", "")}
     
@@ -303,7 +833,7 @@ async def verify_otp(verify: OTPVerify):
         await db.otps.update_one({"phone": verify.phone}, {"$set": {"verified": True}})
     
     # Find or create user
-    user = await db.users.find_one({"phone": verify.phone})
+    user = await db.users.find_one({"phone": verify.phone, **LIVE})
     
     if not user:
         new_user = User(phone=verify.phone, name=verify.name)
@@ -364,24 +894,25 @@ async def admin_verify_otp(verify: AdminOTPVerify):
 async def get_admin_stats():
     """Get dashboard statistics"""
     try:
-        total_users = await db.users.count_documents({})
-        total_venues = await db.venues.count_documents({})
-        total_bookings = await db.bookings.count_documents({})
+        total_users = await db.users.count_documents(LIVE)
+        total_venues = await db.venues.count_documents(LIVE)
+        archived = {row["_id"]: row["count"] async for row in db.bookings_archive.aggregate(
+            [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        )}
+        total_bookings = await db.bookings.count_documents({}) + sum(archived.values())
         total_videos = await db.videos.count_documents({})
         total_admins = await db.admins.count_documents({})
         
         confirmed_bookings = await db.bookings.count_documents({"status": "confirmed"})
-        completed_bookings = await db.bookings.count_documents({"status": "completed"})
-        cancelled_bookings = await db.bookings.count_documents({"status": "cancelled"})
+        completed_bookings = await db.bookings.count_documents({"status": "completed"}) + archived.get("completed", 0)
+        cancelled_bookings = await db.bookings.count_documents({"status": "cancelled"}) + archived.get("cancelled", 0)
         
         active_venues = await db.venues.count_documents({"is_active": True})
         
-        revenue_pipeline = [{"$group": {"_id": None, "total": {"$sum": "$total_price"}}}]
-        revenue_result = await db.bookings.aggregate(revenue_pipeline).to_list(1)
-        total_revenue = revenue_result[0]["total"] if revenue_result else 0
+        total_revenue = (await venue_daily_stats.totals())["revenue"]
         
         recent_bookings = await db.bookings.find().sort("created_at", -1).limit(5).to_list(5)
-        recent_users = await db.users.find().sort("created_at", -1).limit(5).to_list(5)
+        recent_users = await db.users.find(LIVE).sort("created_at", -1).limit(5).to_list(5)
         
         return {
             "total_users": total_users,
@@ -400,49 +931,135 @@ async def get_admin_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Connected dashboards get deltas instead of re-polling /stats: new
+# bookings, status changes, revenue changes and new users, one SSE event
+# each, from this worker's dashboard_feed change stream (see DashboardFeed).
+
+@api_router.get("/admin/dashboard/stream")
+async def admin_dashboard_stream(request: Request):
+    """Server-sent events with dashboard deltas; load /admin/dashboard/stats once, then apply these"""
+    subscriber = Subscriber(WS_QUEUE_SIZE)
+    event_hub.subscribe(subscriber, DASHBOARD_CHANNEL)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message['data'])}\n\n"
+                if subscriber.lagged and subscriber.queue.empty():
+                    subscriber.lagged = False
+                    yield "event: resync\ndata: {}\n\n"
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+    })
+
+def chart_range(start: Optional[str], end: Optional[str], days: int = 30):
+    """Default to the last `days` days of slot dates, in venue time"""
+    today = datetime.now(VENUE_TIMEZONE).date()
+    end = end or today.isoformat()
+    start = start or (today - timedelta(days=days - 1)).isoformat()
+    try:
+        datetime.strptime(start, "%Y-%m-%d")
+        datetime.strptime(end, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    return start, end
+
+@api_router.get("/admin/dashboard/revenue")
+async def get_revenue_chart(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    venue_id: Optional[str] = None,
+    group_by: str = "date",
+):
+    """Bookings, cancellations, revenue and super video attach rate per day or per venue"""
+    if group_by not in ("date", "venue_id"):
+        raise HTTPException(status_code=400, detail="group_by must be date or venue_id")
+    start, end = chart_range(start, end)
+    rows = await venue_daily_stats.series(start, end, group_by=group_by, venue_id=venue_id)
+    return {"start": start, "end": end, "group_by": group_by, "rows": rows}
+
+@api_router.post("/admin/dashboard/rollups/rebuild")
+async def admin_rebuild_rollups(start: Optional[str] = None, end: Optional[str] = None):
+    """Queue a recompute of daily venue rollups for a slot date range (all dates by default)"""
+    job = await job_queue.enqueue("rebuild_venue_rollups", {"start": start, "end": end})
+    return {"success": True, "job_id": job["id"]}
+
+async def rebuild_venue_rollups(job: dict) -> Optional[dict]:
+    payload = job["payload"]
+    rows = await venue_daily_stats.rebuild(payload.get("start"), payload.get("end"))
+    # Revenue totals may have moved; connected dashboards reload their stats
+    await bump(db, DASHBOARD_RESYNC_KEY)
+    return {"rows": rows}
+
+@api_router.get("/admin/venues/{venue_id}/utilization")
+async def get_slot_utilization(venue_id: str, start: Optional[str] = None, end: Optional[str] = None):
+    """Weekday x time slot booking utilization for a venue"""
+    start, end = chart_range(start, end, days=90)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    venue = await db.venues.find_one(
+        {"id": venue_id}, {"_id": 0, "id": 1, "slot_template_id": 1, "opening_time": 1, "closing_time": 1}
+    )
+    if not venue:
+        raise HTTPException(status_code=404, detail="Venue not found")
+    layout = await slot_templates.layout(venue)
+    version = await current(db, f"bookings:venue:{venue_id}")
+    cache_key = f"utilization:{venue_id}:{version}:{start}:{end}:{make_etag(*('|'.join(day) for day in layout))}"
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    result = await slot_utilization(
+        booking_archive.collections(start), venue_id, layout,
+        datetime.strptime(start, "%Y-%m-%d").date(), datetime.strptime(end, "%Y-%m-%d").date()
+    )
+    analytics_cache.set(cache_key, result)
+    return result
+
 
 # ============= ADMIN VENUE CRUD =============
 
 @api_router.get("/admin/venues", response_model=List[Venue])
-async def admin_get_all_venues(is_active: Optional[bool] = None, sport: Optional[str] = None):
-    """Get all venues with optional filters"""
-    query = {}
+async def admin_get_all_venues(is_active: Optional[bool] = None, sport: Optional[str] = None,
+                               date: Optional[str] = None):
+    """Get all venues with optional filters; slots are for `date` (default today)"""
+    query = dict(LIVE)
     if is_active is not None:
         query["is_active"] = is_active
     if sport:
         query["sport"] = sport
     venues = await db.venues.find(query).sort("created_at", -1).to_list(1000)
-    return [Venue(**venue) for venue in venues]
+    return [Venue(**venue) for venue in await with_slots(venues, slot_date(date))]
 
 @api_router.get("/admin/venues/{venue_id}", response_model=Venue)
-async def admin_get_venue(venue_id: str):
-    """Get single venue details"""
-    venue = await db.venues.find_one({"id": venue_id})
+async def admin_get_venue(venue_id: str, date: Optional[str] = None):
+    """Get single venue details with its slots for `date` (default today)"""
+    day = slot_date(date)
+    venue = await db.venues.find_one({"id": venue_id, **LIVE})
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
-    return Venue(**venue)
+    return Venue(**(await with_slots([venue], day))[0])
 
 @api_router.post("/admin/venues", response_model=Venue)
 async def admin_create_venue(venue: VenueCreate):
     """Create a new venue"""
-    # Generate time slots
-    slots = []
-    start_hour = 6
-    for i in range(16):
-        hour = start_hour + i
-        am_pm = "AM" if hour < 12 else "PM"
-        display_hour = hour if hour <= 12 else hour - 12
-        if display_hour == 0:
-            display_hour = 12
-        time_str = f"{display_hour:02d}:00 {am_pm}"
-        slots.append(TimeSlot(time=time_str, available=True, price=venue.base_price))
-    
-    venue_dict = venue.dict()
-    venue_dict['slots'] = [slot.dict() for slot in slots]
-    venue_obj = Venue(**venue_dict)
-    
-    await db.venues.insert_one(venue_obj.dict())
-    return venue_obj
+    await check_slot_template(venue.slot_template_id)
+    venue_obj = Venue(**venue.dict())
+    
+    await db.venues.insert_one(venue_obj.dict(exclude={"slots"}))
+    await bump(db, "venues")
+    await schedule_image_variants("venues", venue_obj.dict())
+    return Venue(**(await with_slots([venue_obj.dict()]))[0])
 
 @api_router.put("/admin/venues/{venue_id}", response_model=Venue)
 async def admin_update_venue(venue_id: str, venue_update: VenueUpdate):
@@ -452,31 +1069,202 @@ async def admin_update_venue(venue_id: str, venue_update: VenueUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    # If base_price is updated, also update slot prices
-    if "base_price" in update_data:
-        venue = await db.venues.find_one({"id": venue_id})
-        if venue and venue.get('slots'):
-            updated_slots = []
-            for slot in venue['slots']:
-                slot['price'] = update_data['base_price']
-                updated_slots.append(slot)
-            update_data['slots'] = updated_slots
+    if "slot_template_id" in update_data:
+        update_data["slot_template_id"] = update_data["slot_template_id"] or None
+        await check_slot_template(update_data["slot_template_id"])
+    before = await db.venues.find_one_and_update({"id": venue_id, **LIVE}, touch({"$set": update_data}))
     
-    result = await db.venues.update_one({"id": venue_id}, {"$set": update_data})
-    
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Venue not found")
+    await bump(db, "venues")
+    if PRICED_FIELDS.keys() & update_data.keys():
+        await pricing_engine.invalidate([venue_id])
     
     venue = await db.venues.find_one({"id": venue_id})
-    return Venue(**venue)
+    if venue["name"] != before["name"]:
+        await on_renamed("venue", venue_id)
+    if "image" in update_data or "images" in update_data:
+        await schedule_image_variants("venues", venue)
+    return Venue(**(await with_slots([venue]))[0])
 
 @api_router.delete("/admin/venues/{venue_id}")
 async def admin_delete_venue(venue_id: str):
-    """Delete a venue"""
-    result = await db.venues.delete_one({"id": venue_id})
-    if result.deleted_count == 0:
+    """Delete a venue; its bookings and videos are removed in the background"""
+    cascade = await soft_delete("venues", venue_id)
+    if not cascade:
+        raise HTTPException(status_code=404, detail="Venue not found")
+    return {"success": True, "message": "Venue deleted", "cascade_id": cascade["id"]}
+
+
+# ============= ADMIN PRICING =============
+# Admins define rules (peak hours, weekends, holidays); each venue's rules
+# compile into a weekday x slot price matrix cached per worker, so pricing
+# a booking is a lookup. Changing a rule recompiles only the venues it
+# applies to.
+
+async def quote_booking(booking: BookingCreate) -> float:
+    """Server-side price of a booking, including the Super Video add-on"""
+    try:
+        price = await pricing_engine.quote(booking.venue_id, booking.date, booking.time_slot,
+                                           booking.super_video_enabled)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    if price is None:
+        raise HTTPException(status_code=400, detail="Unknown venue or time slot")
+    return price
+
+def checked_rule(rule: dict) -> dict:
+    try:
+        validate_rule(rule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return rule
+
+@api_router.get("/admin/pricing/rules", response_model=List[PricingRule])
+async def admin_get_pricing_rules(venue_id: Optional[str] = None):
+    """List pricing rules, optionally those of one venue (plus global ones)"""
+    query = {"venue_id": {"$in": [None, venue_id]}} if venue_id else {}
+    return await db.pricing_rules.find(query, {"_id": 0}).sort("priority", 1).to_list(1000)
+
+@api_router.post("/admin/pricing/rules", response_model=PricingRule)
+async def admin_create_pricing_rule(rule: PricingRuleCreate):
+    """Create a pricing rule"""
+    rule_obj = PricingRule(**checked_rule(rule.dict()))
+    await db.pricing_rules.insert_one(rule_obj.dict())
+    await pricing_engine.invalidate([rule_obj.venue_id] if rule_obj.venue_id else None)
+    return rule_obj
+
+@api_router.put("/admin/pricing/rules/{rule_id}", response_model=PricingRule)
+async def admin_update_pricing_rule(rule_id: str, rule_update: PricingRuleUpdate):
+    """Update a pricing rule"""
+    # Fields the client sent; null clears start_time/end_time
+    update_data = rule_update.dict(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    cleared = sorted(k for k, v in update_data.items() if v is None and k not in CLEARABLE_RULE_FIELDS)
+    if cleared:
+        raise HTTPException(status_code=400, detail=f"Cannot clear {', '.join(cleared)}")
+    rule = await db.pricing_rules.find_one({"id": rule_id}, {"_id": 0})
+    if not rule:
+        raise HTTPException(status_code=404, detail="Pricing rule not found")
+    checked_rule({**rule, **update_data})
+    update_data["updated_at"] = datetime.utcnow()
+    await db.pricing_rules.update_one({"id": rule_id}, {"$set": update_data})
+    await pricing_engine.invalidate([rule["venue_id"]] if rule["venue_id"] else None)
+    return PricingRule(**{**rule, **update_data})
+
+@api_router.delete("/admin/pricing/rules/{rule_id}")
+async def admin_delete_pricing_rule(rule_id: str):
+    """Delete a pricing rule"""
+    rule = await db.pricing_rules.find_one_and_delete({"id": rule_id})
+    if not rule:
+        raise HTTPException(status_code=404, detail="Pricing rule not found")
+    await pricing_engine.invalidate([rule["venue_id"]] if rule["venue_id"] else None)
+    return {"success": True, "message": "Pricing rule deleted"}
+
+@api_router.get("/admin/venues/{venue_id}/price-matrix")
+async def admin_get_price_matrix(venue_id: str):
+    """Compiled weekday x slot prices (and holiday rows) for a venue"""
+    matrix = await pricing_engine.matrix(venue_id)
+    if not matrix:
         raise HTTPException(status_code=404, detail="Venue not found")
-    return {"success": True, "message": "Venue deleted"}
+    return {"venue_id": venue_id, "weekdays": WEEKDAYS, **matrix.dict()}
+
+
+# ============= ADMIN SLOT TEMPLATES =============
+# A template (slot length, gap between slots, opening hours per weekday)
+# generates a venue's slots for any date; venues without one get hourly
+# slots within their own opening hours. Layouts are memoized per template,
+# so venue documents no longer carry a slots array.
+
+def checked_template(template: dict) -> dict:
+    try:
+        validate_template(template)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return template
+
+async def check_slot_template(template_id: Optional[str]):
+    if template_id and not await db.slot_templates.find_one({"id": template_id}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="Unknown slot template")
+
+def slot_date(date: Optional[str] = None) -> str:
+    """A YYYY-MM-DD date parameter, today in venue time by default"""
+    if not date:
+        return datetime.now(VENUE_TIMEZONE).date().isoformat()
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+
+async def with_slots(venues: List[dict], day: Optional[str] = None) -> List[dict]:
+    """Fill in each venue's slots for a date (default today) at their rule-adjusted prices"""
+    day = day or slot_date()
+    matrices = await pricing_engine.matrices([venue["id"] for venue in venues])
+    for venue in venues:
+        matrix = matrices.get(venue["id"])
+        prices = matrix.prices(day) if matrix else {}
+        venue["slots"] = [TimeSlot(time=time, price=price).dict() for time, price in prices.items()]
+    return venues
+
+async def slot_template_changed(template_id: str):
+    """Rebuild the layout of a template and of the venues using it"""
+    await bump(db, SlotTemplates.version_key(template_id))
+    venue_ids = await db.venues.distinct("id", {"slot_template_id": template_id})
+    if venue_ids:
+        # New revisions so venue ETags change along with their slots
+        await db.venues.update_many({"slot_template_id": template_id}, touch({}))
+        await bump(db, "venues")
+        await pricing_engine.invalidate(venue_ids)
+
+@api_router.get("/admin/slot-templates", response_model=List[SlotTemplate])
+async def admin_get_slot_templates():
+    """List slot templates"""
+    return await db.slot_templates.find({}, {"_id": 0}).sort("name", 1).to_list(1000)
+
+@api_router.get("/admin/slot-templates/{template_id}")
+async def admin_get_slot_template(template_id: str):
+    """A slot template with the slots it generates for each weekday"""
+    template = await db.slot_templates.find_one({"id": template_id}, {"_id": 0})
+    if not template:
+        raise HTTPException(status_code=404, detail="Slot template not found")
+    venues = await db.venues.count_documents({"slot_template_id": template_id, **LIVE})
+    return {**SlotTemplate(**template).dict(), "weekdays": WEEKDAYS, "venues": venues,
+            "slots": build_layout(template)}
+
+@api_router.post("/admin/slot-templates", response_model=SlotTemplate)
+async def admin_create_slot_template(template: SlotTemplateCreate):
+    """Create a slot template"""
+    template_obj = SlotTemplate(**checked_template(template.dict()))
+    await db.slot_templates.insert_one(template_obj.dict())
+    return template_obj
+
+@api_router.put("/admin/slot-templates/{template_id}", response_model=SlotTemplate)
+async def admin_update_slot_template(template_id: str, template_update: SlotTemplateUpdate):
+    """Update a slot template; every venue using it gets the new slots"""
+    update_data = {k: v for k, v in template_update.dict().items() if v is not None}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    template = await db.slot_templates.find_one({"id": template_id}, {"_id": 0})
+    if not template:
+        raise HTTPException(status_code=404, detail="Slot template not found")
+    checked_template({**template, **update_data})
+    update_data["updated_at"] = datetime.utcnow()
+    await db.slot_templates.update_one({"id": template_id}, {"$set": update_data})
+    await slot_template_changed(template_id)
+    return SlotTemplate(**{**template, **update_data})
+
+@api_router.delete("/admin/slot-templates/{template_id}")
+async def admin_delete_slot_template(template_id: str):
+    """Delete a slot template that no venue uses"""
+    in_use = await db.venues.count_documents({"slot_template_id": template_id, **LIVE})
+    if in_use:
+        raise HTTPException(status_code=400, detail=f"Slot template is used by {in_use} venues")
+    template = await db.slot_templates.find_one_and_delete({"id": template_id})
+    if not template:
+        raise HTTPException(status_code=404, detail="Slot template not found")
+    await slot_template_changed(template_id)
+    return {"success": True, "message": "Slot template deleted"}
 
 
 # ============= ADMIN USER CRUD =============
@@ -484,7 +1272,7 @@ async def admin_delete_venue(venue_id: str):
 @api_router.get("/admin/users", response_model=List[User])
 async def admin_get_all_users(search: Optional[str] = None):
     """Get all users with optional search"""
-    query = {}
+    query = dict(LIVE)
     if search:
         query["$or"] = [
             {"name": {"$regex": search, "$options": "i"}},
@@ -497,7 +1285,7 @@ async def admin_get_all_users(search: Optional[str] = None):
 @api_router.get("/admin/users/{user_id}", response_model=User)
 async def admin_get_user(user_id: str):
     """Get single user details"""
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id, **LIVE})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return User(**user)
@@ -505,36 +1293,39 @@ async def admin_get_user(user_id: str):
 @api_router.get("/admin/users/{user_id}/stats")
 async def admin_get_user_stats(user_id: str):
     """Get detailed stats for a user"""
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id, **LIVE})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    total_bookings = await db.bookings.count_documents({"user_id": user_id})
-    completed_bookings = await db.bookings.count_documents({"user_id": user_id, "status": "completed"})
-    
-    spent_pipeline = [
-        {"$match": {"user_id": user_id}},
-        {"$group": {"_id": None, "total": {"$sum": "$total_price"}}}
-    ]
-    spent_result = await db.bookings.aggregate(spent_pipeline).to_list(1)
-    total_spent = spent_result[0]["total"] if spent_result else 0
-    
-    total_videos = await db.videos.count_documents({"user_id": user_id})
-    recent_bookings = await db.bookings.find({"user_id": user_id}).sort("created_at", -1).limit(10).to_list(10)
+    stats, recent_bookings = await asyncio.gather(
+        user_stats.get(user_id),
+        booking_archive.find({"user_id": user_id}, 10),
+    )
     
     return {
         "user": User(**user),
-        "total_bookings": total_bookings,
-        "completed_bookings": completed_bookings,
-        "total_spent": total_spent,
-        "total_videos": total_videos,
+        "total_bookings": stats["total_bookings"],
+        "completed_bookings": stats["completed_bookings"],
+        "cancelled_bookings": stats["cancelled_bookings"],
+        "total_spent": stats["total_spent"],
+        "total_videos": stats["total_videos"],
+        "last_booking_at": stats["last_booking_at"],
         "recent_bookings": [Booking(**b) for b in recent_bookings]
     }
 
+@api_router.post("/admin/users/stats/rebuild")
+async def admin_rebuild_user_stats(user_id: Optional[str] = None):
+    """Queue a recompute of user_stats from bookings and videos"""
+    job = await job_queue.enqueue("rebuild_user_stats", {"user_ids": [user_id] if user_id else None})
+    return {"success": True, "job_id": job["id"]}
+
+async def rebuild_user_stats(job: dict) -> Optional[dict]:
+    return {"users": await user_stats.rebuild(job["payload"].get("user_ids"))}
+
 @api_router.post("/admin/users", response_model=User)
 async def admin_create_user(user: UserCreate):
     """Create a new user"""
-    existing = await db.users.find_one({"phone": user.phone})
+    existing = await db.users.find_one({"phone": user.phone, **LIVE})
     if existing:
         raise HTTPException(status_code=400, detail="User with this phone already exists")
     
@@ -552,37 +1343,143 @@ async def admin_update_user(user_id: str, user_update: UserUpdate):
     
     # Check phone uniqueness if updating phone
     if "phone" in update_data:
-        existing = await db.users.find_one({"phone": update_data["phone"], "id": {"$ne": user_id}})
+        existing = await db.users.find_one({"phone": update_data["phone"], "id": {"$ne": user_id}, **LIVE})
         if existing:
             raise HTTPException(status_code=400, detail="Phone number already in use")
     
-    result = await db.users.update_one({"id": user_id}, {"$set": update_data})
+    before = await db.users.find_one_and_update({"id": user_id, **LIVE}, {"$set": update_data})
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="User not found")
     
     user = await db.users.find_one({"id": user_id})
+    if user["name"] != before["name"]:
+        await on_renamed("user", user_id)
     return User(**user)
 
 @api_router.delete("/admin/users/{user_id}")
 async def admin_delete_user(user_id: str):
-    """Delete a user"""
-    result = await db.users.delete_one({"id": user_id})
-    if result.deleted_count == 0:
+    """Delete a user; their bookings and videos are removed in the background"""
+    cascade = await soft_delete("users", user_id)
+    if not cascade:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"success": True, "message": "User deleted"}
+    return {"success": True, "message": "User deleted", "cascade_id": cascade["id"]}
+
+
+# ============= ADMIN CASCADE DELETES =============
+# A deleted venue or user is marked with deleted_at (and venues go
+# inactive) right away; a cascade_delete job then archives and removes its
+# bookings and videos in throttled batches, refreshes the stats they fed,
+# and finally removes the parent itself.
+
+CASCADE_DEPENDENTS = {
+    "venues": [("bookings", "venue_id", "deleted_bookings"), ("bookings_archive", "venue_id", "deleted_bookings"),
+               ("videos", "venue_id", None)],
+    "users": [("bookings", "user_id", "deleted_bookings"), ("bookings_archive", "user_id", "deleted_bookings"),
+              ("videos", "user_id", None)],
+}
+
+async def soft_delete(collection: str, parent_id: str) -> Optional[dict]:
+    """Mark a venue or user deleted and queue its cascade; None if there is no such live document"""
+    update = {"$set": {"deleted_at": datetime.utcnow()}}
+    if collection == "venues":
+        update = touch({"$set": {**update["$set"], "is_active": False}})
+    result = await db[collection].update_one({"id": parent_id, **LIVE}, update)
+    if result.matched_count == 0:
+        return None
+    if collection == "venues":
+        await bump(db, "venues")
+        await pricing_engine.invalidate([parent_id])
+    cascade = await cascade_deletes.start(collection, parent_id, CASCADE_DEPENDENTS[collection])
+    await job_queue.enqueue("cascade_delete", {"cascade_id": cascade["id"]}, dedupe_key=f"cascade_delete:{cascade['id']}")
+    return cascade
+
+async def cascade_batch(collection: str, docs: List[dict]) -> Dict[str, list]:
+    """Per-batch cleanup before dependents are removed; returns what to refresh at the end"""
+    if collection in BOOKING_COLLECTIONS:
+        await job_queue.cancel_many([super_video_job_key(b["id"]) for b in docs])
+        return {
+            "users": [b["user_id"] for b in docs],
+            "venues": [b["venue_id"] for b in docs],
+            "dates": [b["date"] for b in docs],
+        }
+    for video in docs:
+        await comment_store.delete_all(video["id"])
+    return {"users": [v["user_id"] for v in docs]}
+
+async def cascade_finished(cascade: dict):
+    """Refresh versions and stats once, for everything the cascade removed"""
+    touched = cascade["touched"]
+    users = set(touched.get("users", []))
+    if cascade["collection"] == "users":
+        users.discard(cascade["parent_id"])
+        await user_stats.delete(cascade["parent_id"])
+    await bump(db, "bookings", "videos",
+               *(f"bookings:user:{u}" for u in touched.get("users", [])),
+               *(f"bookings:venue:{v}" for v in touched.get("venues", [])))
+    if users:
+        await user_stats.rebuild(sorted(users))
+    if touched.get("dates"):
+        await venue_daily_stats.rebuild(min(touched["dates"]), max(touched["dates"]))
+
+async def process_cascade_delete(job: dict) -> Optional[dict]:
+    return await cascade_deletes.run(
+        job["payload"]["cascade_id"], cascade_batch, cascade_finished, heartbeat=lambda: job_queue.extend(job)
+    )
+
+@api_router.get("/admin/cascades")
+async def admin_get_cascades(status: Optional[str] = None):
+    """Recent cascade deletes and their progress"""
+    return await cascade_deletes.list(status)
+
+@api_router.get("/admin/cascades/{cascade_id}")
+async def admin_get_cascade(cascade_id: str):
+    """Progress of one cascade delete: documents removed so far per collection"""
+    cascade = await cascade_deletes.get(cascade_id)
+    if not cascade:
+        raise HTTPException(status_code=404, detail="Cascade not found")
+    return cascade
+
+
+# ============= NAME PROPAGATION =============
+# Bookings and videos keep copies of venue_name/user_name so lists never
+# join. A rename queues propagate_names, which rewrites the stale copies in
+# throttled chunks; see NamePropagator.
+
+NAME_PARENTS = {"venue": "venues", "user": "users"}
+NAME_COPIES = {
+    "venue": [(c, "venue_id", "venue_name") for c in ("bookings", "bookings_archive", "videos")],
+    "user": [(c, "user_id", "user_name") for c in ("bookings", "bookings_archive", "videos")],
+}
+
+async def propagate_names(job: dict) -> Optional[dict]:
+    kind, parent_id = job["payload"]["kind"], job["payload"]["id"]
+    parent = await db[NAME_PARENTS[kind]].find_one({"id": parent_id, **LIVE}, {"_id": 0, "name": 1})
+    if not parent:
+        return {"skipped": True}
+
+    async def renamed(collection: str, docs: List[dict]):
+        if collection in BOOKING_COLLECTIONS:
+            await bump(db, *dict.fromkeys(key for b in docs for key in booking_version_keys(b)))
+        else:
+            await bump(db, "videos")
+
+    updated = await name_propagator.propagate(
+        kind, parent_id, parent["name"], on_batch=renamed, heartbeat=lambda: job_queue.extend(job)
+    )
+    return {"name": parent["name"], "updated": updated}
 
 
 # ============= ADMIN BOOKING CRUD =============
 
-@api_router.get("/admin/bookings", response_model=List[Booking])
-async def admin_get_all_bookings(
+def booking_filters(
     status: Optional[str] = None,
     user_id: Optional[str] = None,
     venue_id: Optional[str] = None,
-    date: Optional[str] = None
-):
-    """Get all bookings with optional filters"""
+    date: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> dict:
     query = {}
     if status:
         query['status'] = status
@@ -592,14 +1489,27 @@ async def admin_get_all_bookings(
         query['venue_id'] = venue_id
     if date:
         query['date'] = date
+    elif date_from or date_to:
+        query['date'] = {**({"$gte": date_from} if date_from else {}), **({"$lte": date_to} if date_to else {})}
+    return query
+
+@api_router.get("/admin/bookings", response_model=List[Booking])
+async def admin_get_all_bookings(
+    status: Optional[str] = None,
+    user_id: Optional[str] = None,
+    venue_id: Optional[str] = None,
+    date: Optional[str] = None
+):
+    """Get all bookings with optional filters"""
+    query = booking_filters(status, user_id, venue_id, date)
     
-    bookings = await db.bookings.find(query).sort("created_at", -1).to_list(1000)
+    bookings = await booking_archive.find(query, 1000)
     return [Booking(**booking) for booking in bookings]
 
 @api_router.get("/admin/bookings/{booking_id}", response_model=Booking)
 async def admin_get_booking(booking_id: str):
     """Get single booking details"""
-    booking = await db.bookings.find_one({"id": booking_id})
+    booking = await booking_archive.find_one({"id": booking_id})
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     return Booking(**booking)
@@ -607,10 +1517,20 @@ async def admin_get_booking(booking_id: str):
 @api_router.post("/admin/bookings", response_model=Booking)
 async def admin_create_booking(booking: BookingCreate):
     """Create a new booking (admin)"""
-    booking_obj = Booking(**booking.dict())
+    booking_dict = booking.dict()
+    if booking.total_price is None:
+        booking_dict["total_price"] = await quote_booking(booking)
+    booking_obj = Booking(**booking_dict)
     await db.bookings.insert_one(booking_obj.dict())
+    await on_booking_created(booking_obj.dict())
     return booking_obj
 
+async def raise_booking_not_updatable(booking_id: str):
+    """404, or 409 if the booking exists but has been archived (archived bookings are final)"""
+    if await db.bookings_archive.count_documents({"id": booking_id}, limit=1):
+        raise HTTPException(status_code=409, detail="Booking is archived and can no longer be changed")
+    raise HTTPException(status_code=404, detail="Booking not found")
+
 @api_router.put("/admin/bookings/{booking_id}", response_model=Booking)
 async def admin_update_booking(booking_id: str, booking_update: BookingUpdate):
     """Update booking details"""
@@ -622,12 +1542,13 @@ async def admin_update_booking(booking_id: str, booking_update: BookingUpdate):
     if "status" in update_data and update_data["status"] not in ["confirmed", "completed", "cancelled"]:
         raise HTTPException(status_code=400, detail="Invalid status")
     
-    result = await db.bookings.update_one({"id": booking_id}, {"$set": update_data})
+    before = await db.bookings.find_one_and_update({"id": booking_id}, touch({"$set": update_data}))
     
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Booking not found")
+    if before is None:
+        await raise_booking_not_updatable(booking_id)
     
     booking = await db.bookings.find_one({"id": booking_id})
+    await on_booking_updated(before, booking)
     return Booking(**booking)
 
 @api_router.put("/admin/bookings/{booking_id}/status")
@@ -636,21 +1557,39 @@ async def admin_update_booking_status(booking_id: str, status: str):
     if status not in ["confirmed", "completed", "cancelled"]:
         raise HTTPException(status_code=400, detail="Invalid status")
     
-    result = await db.bookings.update_one({"id": booking_id}, {"$set": {"status": status}})
+    before = await db.bookings.find_one_and_update({"id": booking_id}, touch({"$set": {"status": status}}))
     
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Booking not found")
+    if before is None:
+        await raise_booking_not_updatable(booking_id)
     
+    await on_booking_updated(before, {**before, "status": status})
     return {"success": True, "status": status}
 
 @api_router.delete("/admin/bookings/{booking_id}")
 async def admin_delete_booking(booking_id: str):
     """Delete a booking"""
-    result = await db.bookings.delete_one({"id": booking_id})
-    if result.deleted_count == 0:
+    booking = (await db.bookings.find_one_and_delete({"id": booking_id})
+               or await db.bookings_archive.find_one_and_delete({"id": booking_id}))
+    if booking is None:
         raise HTTPException(status_code=404, detail="Booking not found")
+    await on_booking_deleted(booking)
     return {"success": True, "message": "Booking deleted"}
 
+@api_router.post("/admin/bookings/archive")
+async def admin_archive_bookings():
+    """Queue a move of finished bookings past the archive horizon into bookings_archive"""
+    job = await job_queue.enqueue("archive_bookings", {})
+    return {"success": True, "job_id": job["id"], "cutoff": booking_archive.cutoff()}
+
+async def move_to_archive(heartbeat=None) -> int:
+    async def moved(batch: List[dict]):
+        # Paged booking lists may now reach into the archive; refresh their ETags
+        await bump(db, *dict.fromkeys(key for b in batch for key in booking_version_keys(b)))
+    return await booking_archive.run(moved, heartbeat)
+
+async def archive_bookings(job: dict) -> Optional[dict]:
+    return {"moved": await move_to_archive(lambda: job_queue.extend(job)), "cutoff": booking_archive.cutoff()}
+
 
 # ============= ADMIN VIDEO CRUD =============
 
@@ -683,8 +1622,10 @@ async def admin_get_video(video_id: str):
 @api_router.post("/admin/videos", response_model=Video)
 async def admin_create_video(video: VideoCreate):
     """Create a new video"""
-    video_obj = Video(**video.dict())
+    video_obj = Video(**await with_venue_id(video.dict()))
     await db.videos.insert_one(video_obj.dict())
+    await on_video_created(video_obj.dict())
+    await schedule_image_variants("videos", video_obj.dict())
     return video_obj
 
 @api_router.put("/admin/videos/{video_id}", response_model=Video)
@@ -695,22 +1636,272 @@ async def admin_update_video(video_id: str, video_update: VideoUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await db.videos.update_one({"id": video_id}, {"$set": update_data})
+    result = await db.videos.update_one({"id": video_id}, touch({"$set": update_data}))
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Video not found")
+    await bump(db, "videos")
     
     video = await db.videos.find_one({"id": video_id})
+    if "thumbnail" in update_data:
+        await schedule_image_variants("videos", video)
     return Video(**video)
 
 @api_router.delete("/admin/videos/{video_id}")
 async def admin_delete_video(video_id: str):
     """Delete a video"""
-    result = await db.videos.delete_one({"id": video_id})
-    if result.deleted_count == 0:
+    video = await db.videos.find_one_and_delete({"id": video_id})
+    if not video:
         raise HTTPException(status_code=404, detail="Video not found")
+    await on_video_deleted(video)
     return {"success": True, "message": "Video deleted"}
 
+@api_router.delete("/admin/videos/{video_id}/comments/{comment_id}")
+async def admin_delete_comment(video_id: str, comment_id: str):
+    """Remove any comment on a video"""
+    if not await comment_store.delete(video_id, comment_id):
+        raise HTTPException(status_code=404, detail="Comment not found")
+    await bump(db, VIDEO_COUNTERS_KEY)
+    return {"success": True, "message": "Comment deleted"}
+
+
+# ============= ADMIN EXPORTS =============
+# Full exports stream straight from the cursor, so they are exempt from
+# the request-wide deadline and bound each batch fetch instead.
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_MODELS = {"bookings": Booking, "bookings_archive": Booking, "users": User, "videos": Video}
+EXPORT_EXCLUDED_COLUMNS = {"thumbnail_variants"}
+
+@api_router.get("/admin/export/{collection}")
+async def admin_export(
+    collection: str,
+    format: str = "csv",
+    columns: Optional[str] = None,
+    gzip: bool = False,
+    status: Optional[str] = None,
+    user_id: Optional[str] = None,
+    venue_id: Optional[str] = None,
+    date: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+):
+    """Stream a whole collection as CSV or NDJSON, optionally gzipped"""
+    model = EXPORT_MODELS.get(collection)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    available = [f for f in model.model_fields if f not in EXPORT_EXCLUDED_COLUMNS]
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else available
+    unknown = [c for c in selected if c not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+
+    if collection in BOOKING_COLLECTIONS:
+        query = booking_filters(status, user_id, venue_id, date, date_from, date_to)
+    elif collection == "videos":
+        query = {k: v for k, v in {"user_id": user_id, "venue_id": venue_id}.items() if v}
+    else:
+        query = {}
+
+    filename = f"{collection}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}" + (".gz" if gzip else "")
+    body = stream_export(db[collection], query, selected, format, compress=gzip,
+                         batch_size=EXPORT_BATCH_SIZE, deadline=db_deadline)
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ============= ADMIN IMPORTS =============
+# CSV/NDJSON imports are validated row by row against the create models and
+# written in unordered batches. Rows upsert on a natural key, so re-running
+# a file is safe: venues on (name, location) update in place, bookings on
+# (venue_id, date, time_slot, user_id) are only inserted once. Bad rows are
+# reported with their row number and never abort the rest.
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_STATUSES = ("confirmed", "completed", "cancelled")
+
+def validate_venue_row(raw: dict) -> dict:
+    for field in ("images", "amenities"):
+        if field in raw:
+            raw[field] = split_list(raw[field])
+    # Only the columns present are written, so a partial file updates in place
+    return VenueCreate(**raw).dict(exclude_unset=True)
+
+def validate_booking_row(raw: dict) -> dict:
+    status = raw.pop("status", "confirmed")
+    if status not in IMPORT_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(IMPORT_STATUSES)}")
+    booking = BookingCreate(**raw).dict()
+    slot_start_utc(booking["date"], booking["time_slot"])  # ValueError if unparseable
+    return {**booking, "status": status}
+
+def dedupe_batch(batch: List[tuple], key) -> Tuple[List[tuple], Dict[int, str]]:
+    """Keep the last row per natural key; earlier duplicates become errors"""
+    latest, errors = {}, {}
+    for number, doc in batch:
+        k = key(doc)
+        if k in latest:
+            errors[latest[k][0]] = f"Superseded by row {number} with the same key"
+        latest[k] = (number, doc)
+    return list(latest.values()), errors
+
+async def bulk_upsert(collection, rows: List[tuple], ops: List[UpdateOne]) -> Tuple[dict, Dict[int, str]]:
+    """Unordered bulk write; returns the raw result and per-row errors"""
+    if not ops:
+        return {}, {}
+    try:
+        with db_deadline():
+            result = await collection.bulk_write(ops, ordered=False)
+        return result.bulk_api_result, {}
+    except BulkWriteError as e:
+        errors = {rows[err["index"]][0]: err.get("errmsg", "Write failed") for err in e.details["writeErrors"]}
+        return e.details, errors
+
+async def write_venue_batch(batch: List[tuple]) -> Tuple[int, int, Dict[int, str]]:
+    rows, errors = dedupe_batch(batch, lambda v: (v["name"], v["location"]))
+    template_ids = list({f["slot_template_id"] for _, f in rows if f.get("slot_template_id")})
+    if template_ids:
+        known = set(await db.slot_templates.distinct("id", {"id": {"$in": template_ids}}))
+        unknown = {n for n, f in rows if f.get("slot_template_id") and f["slot_template_id"] not in known}
+        errors.update({n: "Unknown slot template" for n in unknown})
+        rows = [(n, f) for n, f in rows if n not in unknown]
+    ops = []
+    for _, fields in rows:
+        venue = Venue(**fields).dict(exclude={"slots"})
+        on_insert = {k: v for k, v in venue.items() if k not in fields and k not in ("revision", "updated_at")}
+        ops.append(UpdateOne(
+            {"name": fields["name"], "location": fields["location"]},
+            touch({"$set": fields, "$setOnInsert": on_insert}),
+            upsert=True,
+        ))
+    result, write_errors = await bulk_upsert(db.venues, rows, ops)
+    errors.update(write_errors)
+
+    written = [(f["name"], f["location"]) for n, f in rows if n not in errors]
+    if written:
+        await bump(db, "venues")
+        with db_deadline():
+            cursor = db.venues.find(
+                {"$or": [{"name": name, "location": location} for name, location in written]},
+                {"_id": 0, "id": 1, "image": 1, "images": 1, "revision": 1},
+            )
+            venue_ids = []
+            async for venue in cursor:
+                venue_ids.append(venue["id"])
+                await schedule_image_variants("venues", venue)
+        await pricing_engine.invalidate(venue_ids)
+    return result.get("nUpserted", 0), result.get("nModified", 0), errors
+
+def booking_import_writer(touched: dict):
+    """Batch writer for bookings; records users and dates whose derived stats need rebuilding"""
+    async def write_booking_batch(batch: List[tuple]) -> Tuple[int, int, Dict[int, str]]:
+        rows, errors = dedupe_batch(batch, lambda b: (b["venue_id"], b["date"], b["time_slot"], b["user_id"]))
+        with db_deadline():
+            matrices = await pricing_engine.matrices(list({b["venue_id"] for _, b in rows}))
+        for number, booking in rows:
+            matrix = matrices.get(booking["venue_id"])
+            if not matrix:
+                errors[number] = f"Unknown venue_id {booking['venue_id']}"
+            elif booking["total_price"] is None:
+                # Rows without a price are priced like a new booking
+                price = matrix.price(booking["date"], booking["time_slot"])
+                if price is None:
+                    errors[number] = f"Unknown time_slot {booking['time_slot']}"
+                else:
+                    booking["total_price"] = price + (matrix.super_video_price if booking["super_video_enabled"] else 0)
+        rows = [(n, b) for n, b in rows if n not in errors]
+        if not rows:
+            return 0, 0, errors
+
+        docs = [Booking(**fields).dict() for _, fields in rows]
+        ops = [
+            UpdateOne(
+                {k: doc[k] for k in ("venue_id", "date", "time_slot", "user_id")},
+                {"$setOnInsert": doc},
+                upsert=True,
+            )
+            for doc in docs
+        ]
+        result, write_errors = await bulk_upsert(db.bookings, rows, ops)
+        errors.update(write_errors)
+
+        inserted = [docs[u["index"]] for u in result.get("upserted", [])]
+        now = datetime.utcnow()
+        for booking in inserted:
+            touched["users"].add(booking["user_id"])
+            touched["dates"].add(booking["date"])
+            touched["version_keys"].update(booking_version_keys(booking))
+            if booking["super_video_enabled"] and booking["status"] != "cancelled" and slot_end_utc(booking) > now:
+                await schedule_super_video(booking)
+        return len(inserted), 0, errors
+
+    return write_booking_batch
+
+async def import_records(kind: str, stream, fmt: str) -> dict:
+    """Import venues or bookings from a binary CSV/NDJSON stream; returns the row report"""
+    if kind == "venues":
+        report = await run_import(stream, fmt, validate_venue_row, write_venue_batch, IMPORT_BATCH_SIZE)
+        return report.dict()
+
+    touched = {"users": set(), "dates": set(), "version_keys": set()}
+    report = await run_import(stream, fmt, validate_booking_row, booking_import_writer(touched),
+                              IMPORT_BATCH_SIZE)
+    # Imported bookings skip the per-write hooks; refresh what they feed in bulk
+    if touched["users"]:
+        await bump(db, *touched["version_keys"])
+        await user_stats.rebuild(sorted(touched["users"]))
+        await venue_daily_stats.rebuild(min(touched["dates"]), max(touched["dates"]))
+    return report.dict()
+
+@api_router.post("/admin/import/{kind}")
+async def admin_import(kind: str, request: Request, format: str = "csv"):
+    """Bulk import venues or bookings from a CSV or NDJSON request body"""
+    if kind not in ("venues", "bookings"):
+        raise HTTPException(status_code=404, detail="Unknown import")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    # Spool the body to disk so memory stays flat however big the file is
+    with tempfile.TemporaryFile() as staged:
+        async for chunk in request.stream():
+            await anyio.to_thread.run_sync(staged.write, chunk)
+        staged.seek(0)
+        return await import_records(kind, staged, format)
+
+
+# ============= ADMIN JOBS =============
+
+@api_router.get("/admin/jobs/stats")
+async def admin_get_job_stats():
+    """Queue depth by job type and status, plus worker latency metrics"""
+    snapshot = metrics.snapshot()
+    return {
+        "depth": await job_queue.depth(),
+        "metrics": {k: v for k, v in snapshot.items() if k.startswith("job")},
+    }
+
+@api_router.get("/admin/jobs")
+async def admin_get_jobs(status: Optional[str] = None, type: Optional[str] = None):
+    """List jobs, e.g. status=dead for the dead-letter queue"""
+    query = {}
+    if status:
+        query["status"] = status
+    if type:
+        query["type"] = type
+    jobs = await job_queue.collection.find(query, {"_id": 0}).sort("updated_at", -1).to_list(100)
+    return jobs
+
+@api_router.post("/admin/jobs/{job_id}/retry")
+async def admin_retry_job(job_id: str):
+    """Re-queue a dead job"""
+    if not await job_queue.retry(job_id):
+        raise HTTPException(status_code=404, detail="Dead job not found")
+    return {"success": True}
+
 
 # ============= ADMIN MANAGEMENT =============
 
@@ -756,6 +1947,47 @@ async def admin_delete_admin(admin_id: str):
     return {"success": True, "message": "Admin deleted"}
 
 
+# ============= HEALTH ROUTES =============
+
+async def prime_hot_caches():
+    """Load the venue lists and feed head into the hot cache"""
+    venues_version = await current(db, "venues")
+    pricing_version, today = await current(db, "pricing"), slot_date()
+    await load_venues(None, venues_version, pricing_version, today)
+    for sport in await db.venues.distinct("sport", {"is_active": True}):
+        await load_venues(sport, venues_version, pricing_version, today)
+    await load_feed_head(await current(db, "videos"), await current(db, VIDEO_COUNTERS_KEY))
+
+@api_router.get("/health/live")
+async def health_live():
+    """Liveness probe - the process is up and serving"""
+    return {"status": "alive", "uptime_seconds": round(time.time() - worker_state["started_at"], 1)}
+
+@api_router.get("/health/metrics")
+async def health_metrics():
+    """Process-local counters: shed requests, deadline hits, pool usage"""
+    return {
+        "in_flight": admission.in_flight,
+        "ws_subscribers": event_hub.subscriber_count,
+        "pool": pool_monitor.snapshot(),
+        "metrics": metrics.snapshot(),
+    }
+
+@api_router.get("/health/ready")
+async def health_ready():
+    """Readiness probe - warmed up and MongoDB reachable"""
+    pool = pool_monitor.snapshot()
+    try:
+        await db.command("ping", maxTimeMS=mongo_settings.max_time_ms)
+        mongo_ok = True
+    except Exception as e:
+        logger.warning(f"Readiness ping failed: {e}")
+        mongo_ok = False
+    ready = worker_state["ready"] and mongo_ok
+    body = {"status": "ready" if ready else "not_ready", "warmed_up": worker_state["ready"], "mongo": mongo_ok, "pool": pool}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
 # ============= PUBLIC USER ROUTES =============
 
 @api_router.get("/")
@@ -771,7 +2003,7 @@ async def root():
 @api_router.get("/auth/user/{user_id}")
 async def get_user(user_id: str):
     """Get user profile"""
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id, **LIVE})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return User(**user)
@@ -780,122 +2012,889 @@ async def get_user(user_id: str):
 async def update_user(user_id: str, update: UserUpdate):
     """Update user profile"""
     update_data = {k: v for k, v in update.dict().items() if v is not None}
-    result = await db.users.update_one({"id": user_id}, {"$set": update_data})
-    if result.matched_count == 0:
+    before = await db.users.find_one_and_update({"id": user_id, **LIVE}, {"$set": update_data})
+    if before is None:
         raise HTTPException(status_code=404, detail="User not found")
     user = await db.users.find_one({"id": user_id})
+    if user["name"] != before["name"]:
+        await on_renamed("user", user_id)
     return User(**user)
 
+@api_router.get("/auth/user/{user_id}/stats")
+async def get_user_stats(user_id: str):
+    """Booking and video totals for the profile screen"""
+    return await user_stats.get(user_id)
+
 
 # ============= PUBLIC VENUE ROUTES =============
 
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def set_cache_headers(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
 @api_router.post("/venues", response_model=Venue)
 async def create_venue(venue: VenueCreate):
     """Create a new venue (public)"""
-    slots = []
-    start_hour = 6
-    for i in range(16):
-        hour = start_hour + i
-        am_pm = "AM" if hour < 12 else "PM"
-        display_hour = hour if hour <= 12 else hour - 12
-        if display_hour == 0:
-            display_hour = 12
-        time_str = f"{display_hour:02d}:00 {am_pm}"
-        slots.append(TimeSlot(time=time_str, available=True, price=venue.base_price))
-    
-    venue_dict = venue.dict()
-    venue_dict['slots'] = [slot.dict() for slot in slots]
-    venue_obj = Venue(**venue_dict)
-    
-    await db.venues.insert_one(venue_obj.dict())
-    return venue_obj
-
-@api_router.get("/venues", response_model=List[Venue])
-async def get_venues(sport: Optional[str] = None):
-    """Get all active venues"""
+    await check_slot_template(venue.slot_template_id)
+    venue_obj = Venue(**venue.dict())
+    
+    await db.venues.insert_one(venue_obj.dict(exclude={"slots"}))
+    await bump(db, "venues")
+    await schedule_image_variants("venues", venue_obj.dict())
+    return Venue(**(await with_slots([venue_obj.dict()]))[0])
+
+async def load_venues(sport: Optional[str], version: int, pricing_version: int, day: str) -> List[Venue]:
+    """Active venues for a sport with their slots on a date, cached per venues and pricing version"""
+    cache_key = f"venues:{version}:{pricing_version}:{day}:{sport or '*'}"
+    cached = hot_cache.get(cache_key)
+    if cached is not None:
+        return cached
     query = {"is_active": True}
     if sport:
         query['sport'] = sport
     venues = await db.venues.find(query).to_list(100)
-    return [Venue(**venue) for venue in venues]
+    result = [Venue(**venue) for venue in await with_slots(venues, day)]
+    hot_cache.set(cache_key, result)
+    return result
+
+@api_router.get("/venues", response_model=List[Venue])
+async def get_venues(
+    response: Response,
+    sport: Optional[str] = None,
+    date: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get all active venues with their slots and prices for `date` (default today)"""
+    day = slot_date(date)
+    version, pricing_version = await current(db, "venues"), await current(db, "pricing")
+    etag = make_etag("venues", version, pricing_version, day, sport)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PUBLIC_CACHE_CONTROL)
+    set_cache_headers(response, etag, PUBLIC_CACHE_CONTROL)
+    return await load_venues(sport, version, pricing_version, day)
 
 @api_router.get("/venues/{venue_id}", response_model=Venue)
-async def get_venue(venue_id: str):
-    """Get a specific venue"""
-    venue = await db.venues.find_one({"id": venue_id})
+async def get_venue(venue_id: str, response: Response, date: Optional[str] = None,
+                    if_none_match: Optional[str] = Header(None)):
+    """Get a specific venue with its slots, prices and availability for `date` (default today)"""
+    day = slot_date(date)
+    # Slots change with the venue, its prices and its bookings
+    versions = (await current(db, PricingEngine.version_key(venue_id)),
+                await current(db, f"bookings:venue:{venue_id}"))
+    if if_none_match:
+        head = await db.venues.find_one({"id": venue_id, **LIVE}, {"_id": 0, "revision": 1})
+        if not head:
+            raise HTTPException(status_code=404, detail="Venue not found")
+        etag = make_etag("venue", venue_id, head.get("revision", 0), day, *versions)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, PUBLIC_CACHE_CONTROL)
+    venue = await db.venues.find_one({"id": venue_id, **LIVE})
     if not venue:
         raise HTTPException(status_code=404, detail="Venue not found")
+    slots = await slot_snapshot(venue_id, day) or []
+    venue["slots"] = [TimeSlot(time=s["time_slot"], price=s["price"], available=s["available"]).dict() for s in slots]
+    etag = make_etag("venue", venue_id, venue.get("revision", 0), day, *versions)
+    set_cache_headers(response, etag, PUBLIC_CACHE_CONTROL)
     return Venue(**venue)
 
+@api_router.get("/venues/{venue_id}/prices")
+async def get_venue_prices(venue_id: str, date: str):
+    """Slot prices for a date, after pricing rules"""
+    matrix = await pricing_engine.matrix(venue_id)
+    if not matrix:
+        raise HTTPException(status_code=404, detail="Venue not found")
+    try:
+        prices = matrix.prices(date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    return {"venue_id": venue_id, "date": date, "super_video_price": matrix.super_video_price, "prices": prices}
+
+@api_router.get("/venues/{venue_id}/slots")
+async def get_venue_slots(venue_id: str, date: str):
+    """Slots for a date with their price and whether they are still free"""
+    slots = await slot_snapshot(venue_id, date)
+    if slots is None:
+        raise HTTPException(status_code=404, detail="Venue not found or invalid date")
+    return {"venue_id": venue_id, "date": date, "slots": slots}
 
 # ============= PUBLIC BOOKING ROUTES =============
 
 @api_router.post("/bookings", response_model=Booking)
 async def create_booking(booking: BookingCreate):
     """Create a new booking"""
-    booking_obj = Booking(**booking.dict())
+    booking_obj = Booking(**{**booking.dict(), "total_price": await quote_booking(booking)})
     await db.bookings.insert_one(booking_obj.dict())
+    await on_booking_created(booking_obj.dict())
     return booking_obj
 
 @api_router.get("/bookings", response_model=List[Booking])
-async def get_bookings(user_id: Optional[str] = None):
+async def get_bookings(
+    response: Response,
+    user_id: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
     """Get bookings for a user"""
+    version_key = f"bookings:user:{user_id}" if user_id else "bookings"
+    etag = make_etag(version_key, await current(db, version_key))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PRIVATE_CACHE_CONTROL)
+    set_cache_headers(response, etag, PRIVATE_CACHE_CONTROL)
     query = {}
     if user_id:
         query['user_id'] = user_id
-    bookings = await db.bookings.find(query).sort("created_at", -1).to_list(100)
+    bookings = await booking_archive.find(query, 100)
     return [Booking(**booking) for booking in bookings]
 
 @api_router.get("/bookings/{booking_id}", response_model=Booking)
 async def get_booking(booking_id: str):
     """Get a specific booking"""
-    booking = await db.bookings.find_one({"id": booking_id})
+    booking = await booking_archive.find_one({"id": booking_id})
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     return Booking(**booking)
 
-@api_router.put("/bookings/{booking_id}/video-status")
-async def update_video_status(booking_id: str, status: str, video_url: Optional[str] = None):
-    """Update video status for a booking"""
+async def set_video_status(booking_id: str, status: str, video_url: Optional[str] = None) -> Optional[dict]:
+    """Move a booking's Super Video along; returns the booking as it was before"""
     update_data = {"video_status": status}
     if video_url:
         update_data["video_url"] = video_url
-    
-    result = await db.bookings.update_one({"id": booking_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Booking not found")
+    before = await db.bookings.find_one_and_update({"id": booking_id}, touch({"$set": update_data}))
+    if before is not None:
+        await on_booking_updated(before, {**before, **update_data})
+    return before
+
+@api_router.put("/bookings/{booking_id}/video-status")
+async def update_video_status(booking_id: str, status: str, video_url: Optional[str] = None):
+    """Update video status for a booking"""
+    if await set_video_status(booking_id, status, video_url) is None:
+        await raise_booking_not_updatable(booking_id)
     return {"success": True, "status": status}
 
 
+# ============= LIVE SLOT UPDATES =============
+# Clients open /api/ws/slots and send {"action": "subscribe", "venue_id",
+# "date"}. They get a snapshot of the day's slots, then {"type": "slot"}
+# deltas as bookings take or free them. A {"type": "resync"} means updates
+# were dropped because the client fell behind; re-subscribe to recover.
+
+def slot_channel(venue_id: str, date: str) -> str:
+    return f"slots:{venue_id}:{date}"
+
+def held_slot(booking: Optional[dict]):
+    if booking and booking.get("status") != "cancelled":
+        return booking["venue_id"], booking["date"], booking["time_slot"]
+    return None
+
+async def publish_slot_changes(before: Optional[dict], after: Optional[dict]):
+    freed, taken = held_slot(before), held_slot(after)
+    if freed == taken:
+        return
+    try:
+        for slot, available in ((freed, True), (taken, False)):
+            if slot:
+                venue_id, date, time_slot = slot
+                await event_hub.publish(slot_channel(venue_id, date), {
+                    "type": "slot", "venue_id": venue_id, "date": date,
+                    "time_slot": time_slot, "available": available,
+                })
+    except Exception as e:
+        # Subscribers resync on reconnect; never fail the booking write
+        logger.warning(f"Slot update publish failed: {e}")
+
+async def slot_snapshot(venue_id: str, date: str) -> Optional[List[dict]]:
+    with db_deadline():
+        matrix = await pricing_engine.matrix(venue_id)
+        if not matrix:
+            return None
+        try:
+            prices = matrix.prices(date)
+        except ValueError:
+            return None  # Not a YYYY-MM-DD date
+        taken = {
+            booking["time_slot"]
+            async for booking in db.bookings.find(
+                {"venue_id": venue_id, "date": date, "status": {"$ne": "cancelled"}}, {"_id": 0, "time_slot": 1}
+            )
+        }
+    return [
+        {"time_slot": time, "price": price, "available": time not in taken}
+        for time, price in prices.items()
+    ]
+
+async def forward_slot_updates(websocket: WebSocket, subscriber: Subscriber, syncing: Dict[str, list]):
+    """Send queued messages; deltas for a channel still loading wait for its snapshot"""
+    while True:
+        message = await subscriber.queue.get()
+        channel = message["channel"]
+        if message["type"] == "snapshot":
+            await websocket.send_json(message)
+            for delta in syncing.pop(channel, []):
+                await websocket.send_json(delta)
+        elif channel in syncing:
+            syncing[channel].append(message)
+        else:
+            await websocket.send_json(message)
+        if subscriber.lagged and subscriber.queue.empty():
+            subscriber.lagged = False
+            await websocket.send_json({"type": "resync"})
+
+@api_router.websocket("/ws/slots")
+async def slot_updates(websocket: WebSocket):
+    """Live slot availability for (venue, date) channels"""
+    await websocket.accept()
+    subscriber = Subscriber(WS_QUEUE_SIZE)
+    syncing: Dict[str, list] = {}
+    sender = asyncio.create_task(forward_slot_updates(websocket, subscriber, syncing))
+    metrics.inc("ws_connections")
+    try:
+        while True:
+            try:
+                request = await websocket.receive_json()
+                action, venue_id, date = request.get("action"), request.get("venue_id"), request.get("date")
+            except (ValueError, AttributeError):
+                action = None
+            if action not in ("subscribe", "unsubscribe") or not venue_id or not date:
+                await subscriber.queue.put({"type": "error", "channel": None, "detail": "Invalid request"})
+                continue
+            channel = slot_channel(venue_id, date)
+            if action == "unsubscribe":
+                event_hub.unsubscribe(subscriber, channel)
+                syncing.pop(channel, None)
+                continue
+            if channel not in subscriber.channels and len(subscriber.channels) >= WS_MAX_SUBSCRIPTIONS:
+                await subscriber.queue.put({"type": "error", "channel": channel, "detail": "Too many subscriptions"})
+                continue
+            # Subscribe before reading so no delta between the read and the
+            # snapshot is lost; deltas are absolute, so replaying them is safe
+            syncing[channel] = []
+            event_hub.subscribe(subscriber, channel)
+            slots = await slot_snapshot(venue_id, date)
+            if slots is None:
+                event_hub.unsubscribe(subscriber, channel)
+                syncing.pop(channel, None)
+                await subscriber.queue.put({"type": "error", "channel": channel, "detail": "Venue not found"})
+                continue
+            await subscriber.queue.put({
+                "type": "snapshot", "channel": channel, "venue_id": venue_id, "date": date, "slots": slots,
+            })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_hub.unsubscribe(subscriber)
+        sender.cancel()
+        metrics.inc("ws_disconnections")
+
+
+# ============= VIDEO STATUS UPDATES =============
+# Clients waiting for a Super Video hold a long-poll or WebSocket that wakes
+# when the status changes, instead of re-fetching bookings. Status changes
+# are published on video_status:{booking_id} by the booking update hook,
+# from API workers and job workers alike.
+
+VIDEO_STATUS_FINAL = ("ready", "failed")
+
+def video_status_channel(booking_id: str) -> str:
+    return f"video_status:{booking_id}"
+
+def video_status_message(booking: dict) -> dict:
+    return {"type": "video_status", "booking_id": booking["id"], "video_status": booking["video_status"],
+            "video_url": booking.get("video_url")}
+
+async def publish_video_status(booking: dict):
+    try:
+        await event_hub.publish(video_status_channel(booking["id"]), video_status_message(booking))
+    except Exception as e:
+        logger.warning(f"Video status publish failed: {e}")
+
+async def read_video_status(booking_id: str) -> dict:
+    with db_deadline():
+        booking = await db.bookings.find_one(
+            {"id": booking_id}, {"_id": 0, "id": 1, "video_status": 1, "video_url": 1}
+        )
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    return video_status_message(booking)
+
+@api_router.get("/bookings/{booking_id}/video-status/wait")
+async def wait_video_status(booking_id: str, since: Optional[str] = None, timeout: float = 25):
+    """Long-poll: returns once video_status differs from `since`, or after `timeout` seconds"""
+    timeout = max(0, min(timeout, LONG_POLL_MAX_SECONDS))
+    with event_hub.waiter(video_status_channel(booking_id)) as waiter:
+        status = await read_video_status(booking_id)
+        if since is None or status["video_status"] != since:
+            return {**status, "changed": since is not None}
+        message = await waiter.wait(timeout)
+    if message is None:
+        return {**status, "changed": False}
+    return {**{k: v for k, v in message.items() if k != "channel"}, "changed": message["video_status"] != since}
+
+@api_router.websocket("/ws/bookings/{booking_id}/video-status")
+async def video_status_updates(websocket: WebSocket, booking_id: str):
+    """Sends the current video status, then each change until it is ready or failed"""
+    await websocket.accept()
+    subscriber = Subscriber(WS_QUEUE_SIZE)
+    event_hub.subscribe(subscriber, video_status_channel(booking_id))
+
+    async def until_closed():
+        # Notice clients that go away while nothing is being sent
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    closed = asyncio.create_task(until_closed())
+    try:
+        try:
+            message = await read_video_status(booking_id)
+        except HTTPException as e:
+            await websocket.close(code=4404, reason=e.detail)
+            return
+        while True:
+            await websocket.send_json(message)
+            if message["video_status"] in VIDEO_STATUS_FINAL:
+                await websocket.close()
+                return
+            update = asyncio.ensure_future(subscriber.queue.get())
+            await asyncio.wait({update, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if not update.done():
+                update.cancel()
+                return
+            message = {k: v for k, v in update.result().items() if k != "channel"}
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        event_hub.unsubscribe(subscriber)
+
+
+# ============= SUPER VIDEO PROCESSING =============
+# Bookings with super_video_enabled get a job that becomes due when the slot
+# ends. The worker moves video_status pending -> processing -> ready and
+# creates the Video for the Flex Feed.
+
+def super_video_job_key(booking_id: str) -> str:
+    return f"super_video:{booking_id}"
+
+def slot_start_utc(date: str, time_slot: str) -> datetime:
+    local = datetime.strptime(f"{date} {time_slot}", "%Y-%m-%d %I:%M %p").replace(tzinfo=VENUE_TIMEZONE)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+def slot_end_utc(booking: dict) -> datetime:
+    try:
+        return slot_start_utc(booking["date"], booking["time_slot"]) + timedelta(minutes=SLOT_DURATION_MINUTES)
+    except ValueError:
+        logger.warning(f"Unparseable slot for booking {booking['id']}, processing immediately")
+        return datetime.utcnow()
+
+async def schedule_super_video(booking: dict):
+    key = super_video_job_key(booking["id"])
+    run_at = slot_end_utc(booking)
+    await job_queue.enqueue("super_video", {"booking_id": booking["id"]}, run_at=run_at, dedupe_key=key)
+    await job_queue.reschedule(key, run_at)
+
+async def render_super_video(booking: dict) -> dict:
+    """Produce the highlight for a booking.
+
+    Returns the fields for the Video document. The recording itself comes
+    from the venue cameras; until it arrives video_url is None.
+    """
+    return {
+        "video_url": booking.get("recording_url") or booking.get("video_url"),
+        "storage_key": booking.get("recording_key"),
+    }
+
+async def process_super_video(job: dict) -> Optional[dict]:
+    booking = await db.bookings.find_one({"id": job["payload"]["booking_id"]})
+    if not booking or booking.get("status") == "cancelled" or not booking.get("super_video_enabled"):
+        return {"skipped": True}
+    if booking.get("video_status") == "ready":
+        return {"skipped": True}
+
+    await set_video_status(booking["id"], "processing")
+    rendered = await render_super_video(booking)
+    if not rendered.get("video_url"):
+        # Retried with backoff (a recording upload brings the retry forward);
+        # dead-lettered as failed if the recording never shows up
+        await set_video_status(booking["id"], "pending")
+        raise RuntimeError(f"No recording yet for booking {booking['id']}")
+    video = Video(
+        booking_id=booking["id"],
+        venue_id=booking["venue_id"],
+        venue_name=booking["venue_name"],
+        sport=booking["sport"],
+        title=f"{booking['sport']} at {booking['venue_name']}",
+        user_id=booking["user_id"],
+        user_name=booking["user_name"],
+        **rendered,
+    )
+    # Keyed on booking_id so a retried job never creates a second Video
+    result = await db.videos.update_one({"booking_id": booking["id"]}, {"$setOnInsert": video.dict()}, upsert=True)
+    if result.upserted_id is not None:
+        await on_video_created(video.dict())
+    await set_video_status(booking["id"], "ready", rendered.get("video_url"))
+    return {"booking_id": booking["id"]}
+
+async def super_video_dead(job: dict):
+    await set_video_status(job["payload"]["booking_id"], "failed")
+
+# ============= MEDIA PIPELINE =============
+# Venue photos and video thumbnails get resized WebP/JPEG variants so the
+# home screen and Flex Feed don't download full-size originals.
+
+def venue_image_urls(venue: dict) -> List[Optional[str]]:
+    return [venue.get("image")] + list(venue.get("images") or [])
+
+async def schedule_image_variants(collection: str, doc: dict):
+    """Queue variants for a venue's or video's current images"""
+    urls = venue_image_urls(doc) if collection == "venues" else [doc.get("thumbnail")]
+    if not any(urls):
+        return
+    digest = hashlib.sha1("|".join(u or "" for u in urls).encode()).hexdigest()[:12]
+    # Finished jobs keep their dedupe key for a week; the revision lets an
+    # image that changes A -> B -> A be processed again
+    await job_queue.enqueue(
+        "image_variants",
+        {"collection": collection, "id": doc["id"], "urls": urls},
+        dedupe_key=f"image_variants:{collection}:{doc['id']}:{doc.get('revision', 0)}:{digest}",
+    )
+
+async def process_image_variants(job: dict) -> Optional[dict]:
+    collection, doc_id, urls = job["payload"]["collection"], job["payload"]["id"], job["payload"]["urls"]
+    variants = []
+    for url in urls:
+        try:
+            variants.append(await media_pipeline.variants_for(url) if url else {})
+        except MediaSourceError as e:
+            logger.warning(f"Skipping image variants: {e}")
+            variants.append({})
+
+    # Only write back if the document still points at the same images
+    if collection == "venues":
+        query = {"id": doc_id, "image": urls[0], "images": urls[1:]}
+        update = {"image_variants": variants[0], "gallery_variants": variants[1:]}
+    else:
+        query = {"id": doc_id, "thumbnail": urls[0]}
+        update = {"thumbnail_variants": variants[0]}
+    result = await db[collection].update_one(query, touch({"$set": update}))
+    if result.modified_count:
+        await bump(db, collection)
+    return {"updated": result.modified_count}
+
+@api_router.post("/admin/media/backfill")
+async def admin_backfill_media():
+    """Queue variant generation for venues and videos that have none yet"""
+    queued = 0
+    async for venue in db.venues.find({"image_variants": {"$in": [None, {}]}, "image": {"$ne": None}}):
+        await schedule_image_variants("venues", venue)
+        queued += 1
+    async for video in db.videos.find({"thumbnail_variants": {"$in": [None, {}]}, "thumbnail": {"$ne": None}}):
+        await schedule_image_variants("videos", video)
+        queued += 1
+    return {"success": True, "queued": queued}
+
+# ============= UPLOADS =============
+# Resumable chunked upload: init -> PUT each chunk (X-Chunk-SHA256) -> complete.
+# Clients resume by reading `missing` ([first, last] chunk ranges, the first
+# 100 of them) and re-sending only those chunks.
+
+def upload_status(upload: dict) -> dict:
+    return {
+        "id": upload["id"],
+        "status": upload["status"],
+        "chunk_size": upload["chunk_size"],
+        "total_chunks": upload["total_chunks"],
+        "total_size": upload["total_size"],
+        "missing": upload_manager.missing_ranges(upload),
+        "missing_count": upload_manager.missing_count(upload),
+        "url": upload.get("url"),
+    }
+
+@api_router.post("/uploads")
+async def init_upload(request: UploadInit):
+    """Start a chunked upload for a Booking recording or a Video"""
+    with db_deadline():
+        if request.booking_id and not await db.bookings.find_one({"id": request.booking_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Booking not found")
+        if request.video_id and not await db.videos.find_one({"id": request.video_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Video not found")
+        upload = await upload_manager.init(**request.dict())
+    return upload_status(upload)
+
+@api_router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Upload progress, including the chunks still missing"""
+    with db_deadline():
+        return upload_status(await upload_manager.get(upload_id))
+
+@api_router.put("/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(upload_id: str, index: int, request: Request, x_chunk_sha256: str = Header(...)):
+    """Stream one chunk into storage; re-sending a chunk replaces it"""
+    with db_deadline():
+        upload = await upload_manager.get(upload_id)
+    part = await upload_manager.put_chunk(upload, index, request.stream(), x_chunk_sha256)
+    return {"index": index, "size": part["size"], "sha256": part["sha256"]}
+
+@api_router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str):
+    """Assemble the chunks and queue the file for processing"""
+    with db_deadline():
+        upload = await upload_manager.get(upload_id)
+    upload = await upload_manager.complete(upload)
+    with db_deadline():
+        await job_queue.enqueue("upload_ingest", {"upload_id": upload_id}, dedupe_key=f"upload_ingest:{upload_id}")
+    return upload_status(upload)
+
+@api_router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Abandon an upload and discard its chunks"""
+    with db_deadline():
+        await upload_manager.abort(await upload_manager.get(upload_id))
+    return {"success": True}
+
+async def process_upload_ingest(job: dict) -> Optional[dict]:
+    """Attach a completed upload to its Booking and/or Video"""
+    upload = await upload_manager.get(job["payload"]["upload_id"])
+    media = {"video_url": upload["url"], "storage_key": upload["key"]}
+
+    if upload.get("booking_id"):
+        booking_id = upload["booking_id"]
+        recording = {"recording_url": upload["url"], "recording_key": upload["key"]}
+        before = await db.bookings.find_one_and_update({"id": booking_id}, touch({"$set": recording}))
+        if before is not None:
+            await on_booking_updated(before, {**before, **recording})
+            video = await db.videos.find_one_and_update({"booking_id": booking_id}, touch({"$set": media}))
+            if video is not None:
+                await bump(db, "videos")
+                await set_video_status(booking_id, "ready", upload["url"])
+            elif before.get("super_video_enabled"):
+                # The slot is over if there is a recording - process now
+                key = super_video_job_key(booking_id)
+                await job_queue.enqueue("super_video", {"booking_id": booking_id}, dedupe_key=key)
+                await job_queue.reschedule(key, datetime.utcnow())
+
+    if upload.get("video_id"):
+        result = await db.videos.update_one({"id": upload["video_id"]}, touch({"$set": media}))
+        if result.modified_count:
+            await bump(db, "videos")
+
+    await upload_manager.mark_ready(upload["id"])
+    return {"upload_id": upload["id"]}
+
+async def expire_uploads(job: dict) -> Optional[dict]:
+    return {"aborted": await upload_manager.abort_expired()}
+
+
+# ============= FLEX FEED =============
+# One call renders a feed screen: a page of videos, each with the card for
+# its venue. Cards come from the hot cache; misses are fetched with one $in,
+# and next free slots with one bookings query per page - never per video.
+
+FEED_PAGE_SIZE = 10
+FEED_MAX_PAGE_SIZE = 50
+PERSONAL_CURSOR_PREFIX = "p:"  # offsets into a user's candidate list
+VENUE_CARD_FIELDS = {"_id": 0, "id": 1, "name": 1, "location": 1, "sport": 1, "base_price": 1,
+                     "rating": 1, "image": 1, "image_variants": 1}
+
+def encode_cursor(video: dict) -> str:
+    raw = f"{video['created_at'].isoformat()}|{video['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, video_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), video_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def venue_card_sources(venue_ids: List[str]) -> Dict[str, dict]:
+    version = await current(db, "venues")
+    found, missing = {}, []
+    for venue_id in venue_ids:
+        cached = hot_cache.get(f"venue_card:{version}:{venue_id}")
+        if cached is not None:
+            found[venue_id] = cached
+        else:
+            missing.append(venue_id)
+    if missing:
+        async for venue in db.venues.find({"id": {"$in": missing}, "is_active": True}, VENUE_CARD_FIELDS):
+            hot_cache.set(f"venue_card:{version}:{venue['id']}", venue)
+            found[venue["id"]] = venue
+    return found
+
+async def next_free_slots(venues: Dict[str, dict]) -> Dict[str, NextSlot]:
+    """First unbooked slot today or tomorrow for each venue"""
+    now_local = datetime.now(VENUE_TIMEZONE)
+    days = [now_local.date(), now_local.date() + timedelta(days=1)]
+    dates = [d.isoformat() for d in days]
+    taken = set()
+    cursor = db.bookings.find(
+        {"venue_id": {"$in": list(venues)}, "date": {"$in": dates}, "status": {"$ne": "cancelled"}},
+        {"_id": 0, "venue_id": 1, "date": 1, "time_slot": 1},
+    )
+    async for booking in cursor:
+        taken.add((booking["venue_id"], booking["date"], booking["time_slot"]))
+    matrices = await pricing_engine.matrices(list(venues))
+
+    result = {}
+    for venue_id, matrix in matrices.items():
+        for day in dates:
+            for time, price in matrix.prices(day).items():
+                if (venue_id, day, time) in taken:
+                    continue
+                if day == dates[0]:
+                    starts = datetime.strptime(f"{day} {time}", "%Y-%m-%d %I:%M %p")
+                    if starts <= now_local.replace(tzinfo=None):
+                        continue
+                result[venue_id] = NextSlot(date=day, time=time, price=price)
+                break
+            if venue_id in result:
+                break
+    return result
+
+def venue_card(venue: dict, next_slot: Optional[NextSlot]) -> VenueCard:
+    thumb = (venue.get("image_variants") or {}).get("thumb")
+    return VenueCard(
+        id=venue["id"],
+        name=venue["name"],
+        location=venue["location"],
+        sport=venue["sport"],
+        base_price=venue["base_price"],
+        rating=venue.get("rating", 4.5),
+        image=thumb["webp"] if thumb else venue.get("image"),
+        next_free_slot=next_slot,
+    )
+
+@api_router.get("/feed", response_model=FeedPage)
+async def get_feed(cursor: Optional[str] = None, limit: int = FEED_PAGE_SIZE, user_id: Optional[str] = None):
+    """A page of Flex Feed videos with embedded venue cards, personalized when user_id is given"""
+    limit = max(1, min(limit, FEED_MAX_PAGE_SIZE))
+    if user_id and (cursor is None or cursor.startswith(PERSONAL_CURSOR_PREFIX)):
+        candidates = await feed_ranker.for_user(user_id)
+        if candidates:
+            return await personal_feed_page(candidates, cursor, limit)
+        metrics.inc("feed_fallbacks")
+    query = {"is_public": True}
+    if cursor:
+        created_at, video_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": video_id}},
+        ]
+    videos = await db.videos.find(query).sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(limit)
+    return await build_feed_page(videos, limit)
+
+async def personal_feed_page(candidates: List[str], cursor: Optional[str], limit: int) -> FeedPage:
+    """Serve a slice of the user's precomputed candidate list"""
+    offset = 0
+    if cursor:
+        try:
+            offset = int(cursor[len(PERSONAL_CURSOR_PREFIX):])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    page_ids = candidates[offset:offset + limit]
+    found = {
+        video["id"]: video
+        async for video in db.videos.find({"id": {"$in": page_ids}, "is_public": True})
+    }
+    # Keep the ranked order; videos hidden or deleted since ranking drop out
+    page = await build_feed_page([found[i] for i in page_ids if i in found], limit)
+    end = offset + len(page_ids)
+    page.next_cursor = f"{PERSONAL_CURSOR_PREFIX}{end}" if end < len(candidates) else None
+    return page
+
+async def build_feed_page(videos: List[dict], limit: int) -> FeedPage:
+    venue_ids = list({v["venue_id"] for v in videos if v.get("venue_id")})
+    venues = await venue_card_sources(venue_ids) if venue_ids else {}
+    slots = await next_free_slots(venues) if venues else {}
+    items = [
+        FeedItem(
+            video=Video(**video),
+            venue=venue_card(venues[video["venue_id"]], slots.get(video["venue_id"]))
+            if video.get("venue_id") in venues else None,
+        )
+        for video in videos
+    ]
+    next_cursor = encode_cursor(videos[-1]) if len(videos) == limit else None
+    return FeedPage(items=items, next_cursor=next_cursor)
+
+async def backfill_video_venue_ids(job: dict) -> Optional[dict]:
+    """Copy venue_id onto videos from their booking, in batches"""
+    updated = 0
+    while True:
+        videos = await db.videos.find(
+            {"venue_id": None, "booking_id": {"$ne": None}, "venue_backfill_failed": {"$ne": True}},
+            {"_id": 0, "id": 1, "booking_id": 1},
+        ).limit(500).to_list(500)
+        if not videos:
+            break
+        booking_ids = [v["booking_id"] for v in videos]
+        bookings = {
+            b["id"]: b["venue_id"]
+            async for b in db.bookings.find({"id": {"$in": booking_ids}}, {"_id": 0, "id": 1, "venue_id": 1})
+        }
+        ops = []
+        for video in videos:
+            venue_id = bookings.get(video["booking_id"])
+            if venue_id:
+                ops.append(UpdateOne({"id": video["id"]}, touch({"$set": {"venue_id": venue_id}})))
+            else:
+                # Booking is gone; flag it so the loop doesn't pick it up again
+                ops.append(UpdateOne({"id": video["id"]}, {"$set": {"venue_backfill_failed": True}}))
+        result = await db.videos.bulk_write(ops, ordered=False)
+        updated += result.modified_count
+    if updated:
+        await bump(db, "videos")
+    return {"updated": updated}
+
+async def rank_feed_candidates(job: dict) -> Optional[dict]:
+    return await feed_ranker.rebuild()
+
+@api_router.post("/admin/videos/backfill-venues")
+async def admin_backfill_video_venues():
+    """Queue the venue_id backfill for videos created before it existed"""
+    job = await job_queue.enqueue("backfill_video_venue_ids", {})
+    return {"success": True, "job_id": job["id"]}
+
+
+# ============= JOB REGISTRY =============
+
+JOB_HANDLERS = {
+    "super_video": process_super_video,
+    "image_variants": process_image_variants,
+    "upload_ingest": process_upload_ingest,
+    "expire_uploads": expire_uploads,
+    "backfill_video_venue_ids": backfill_video_venue_ids,
+    "rank_feed_candidates": rank_feed_candidates,
+    "rebuild_user_stats": rebuild_user_stats,
+    "rebuild_venue_rollups": rebuild_venue_rollups,
+    "cascade_delete": process_cascade_delete,
+    "archive_bookings": archive_bookings,
+    "propagate_names": propagate_names,
+}
+JOB_DEAD_LETTER_HANDLERS = {"super_video": super_video_dead}
+
+# Recurring jobs: type -> interval in seconds
+PERIODIC_JOBS = {
+    "expire_uploads": 3600,
+    "rank_feed_candidates": FEED_RANK_INTERVAL_SECONDS,
+    "archive_bookings": 24 * 3600,
+}
+
+
 # ============= PUBLIC VIDEO ROUTES =============
 
 @api_router.post("/videos", response_model=Video)
 async def create_video(video: VideoCreate):
     """Create a new video"""
-    video_obj = Video(**video.dict())
+    video_obj = Video(**await with_venue_id(video.dict()))
     await db.videos.insert_one(video_obj.dict())
+    await on_video_created(video_obj.dict())
+    await schedule_image_variants("videos", video_obj.dict())
     return video_obj
 
+# Likes, views and comments bump their own version rather than "videos":
+# the feed head below carries the counts and folds it into its ETag and
+# cache key, while caches that don't show counts stay valid.
+VIDEO_COUNTERS_KEY = "video_counters"
+
+async def load_feed_head(version: int, counters_version: int) -> List[Video]:
+    """Newest public videos, cached per collection and counters version"""
+    cache_key = f"videos:{version}:{counters_version}:feed"
+    cached = hot_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    videos = await db.videos.find({"is_public": True}).sort("created_at", -1).to_list(100)
+    result = [Video(**video) for video in videos]
+    hot_cache.set(cache_key, result)
+    return result
+
 @api_router.get("/videos", response_model=List[Video])
-async def get_videos():
+async def get_videos(response: Response, if_none_match: Optional[str] = Header(None)):
     """Get all public videos for Flex Feed"""
-    videos = await db.videos.find({"is_public": True}).sort("created_at", -1).to_list(100)
-    return [Video(**video) for video in videos]
+    version, counters_version = await current(db, "videos"), await current(db, VIDEO_COUNTERS_KEY)
+    etag = make_etag("videos", version, counters_version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PUBLIC_CACHE_CONTROL)
+    set_cache_headers(response, etag, PUBLIC_CACHE_CONTROL)
+    return await load_feed_head(version, counters_version)
+
+async def with_venue_id(video: dict) -> dict:
+    """Fill venue_id from the video's booking when the client didn't send it"""
+    if not video.get("venue_id") and video.get("booking_id"):
+        booking = await db.bookings.find_one({"id": video["booking_id"]}, {"_id": 0, "venue_id": 1})
+        if booking:
+            video["venue_id"] = booking["venue_id"]
+    return video
+
+@api_router.get("/videos/{video_id}/stream")
+async def stream_video(
+    video_id: str,
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
+):
+    """Serve a video with HTTP Range support so the player only fetches what it plays"""
+    with db_deadline():
+        video = await db.videos.find_one({"id": video_id}, {"_id": 0, "storage_key": 1, "video_url": 1})
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if not video.get("storage_key") or not isinstance(storage, LocalStorage):
+        # Hosted elsewhere (S3/CDN) - those serve ranges themselves
+        if video.get("video_url"):
+            return RedirectResponse(video["video_url"], status_code=307)
+        raise HTTPException(status_code=404, detail="Video has no recording yet")
+    path = storage.path(video["storage_key"])
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Recording file missing")
+    content_type = mimetypes.guess_type(path.name)[0] or "video/mp4"
+    if STREAM_ACCEL_REDIRECT_PREFIX:
+        # nginx answers Range and If-Range itself
+        return Response(media_type=content_type, headers={
+            "X-Accel-Redirect": f"{STREAM_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(video['storage_key'])}",
+            "Cache-Control": "public, max-age=86400",
+        })
+    return RangeFileResponse(stream_files, str(path), content_type, range_header=range, if_range=if_range)
 
 @api_router.put("/videos/{video_id}/like")
 async def like_video(video_id: str):
     """Like a video"""
-    result = await db.videos.update_one({"id": video_id}, {"$inc": {"likes": 1}})
+    result = await db.videos.update_one({"id": video_id}, touch({"$inc": {"likes": 1}}))
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Video not found")
+    await bump(db, VIDEO_COUNTERS_KEY)
     return {"success": True}
 
 @api_router.put("/videos/{video_id}/view")
 async def view_video(video_id: str):
     """Increment video view count"""
-    result = await db.videos.update_one({"id": video_id}, {"$inc": {"views": 1}})
+    result = await db.videos.update_one({"id": video_id}, touch({"$inc": {"views": 1}}))
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Video not found")
+    await bump(db, VIDEO_COUNTERS_KEY)
+    return {"success": True}
+
+@api_router.get("/videos/{video_id}/comments", response_model=CommentPage)
+async def get_comments(video_id: str, cursor: Optional[int] = None, limit: int = COMMENT_PAGE_SIZE):
+    """Comments on a video, newest first"""
+    limit = max(1, min(limit, 100))
+    items, next_cursor = await comment_store.page(video_id, cursor, limit)
+    return CommentPage(items=[Comment(**c) for c in items], next_cursor=next_cursor)
+
+@api_router.post("/videos/{video_id}/comments", response_model=Comment)
+async def add_comment(video_id: str, comment: CommentCreate):
+    """Comment on a video"""
+    created = await comment_store.add(video_id, comment.user_id, comment.user_name, comment.text)
+    if not created:
+        raise HTTPException(status_code=404, detail="Video not found")
+    await bump(db, VIDEO_COUNTERS_KEY)
+    return Comment(**created)
+
+@api_router.delete("/videos/{video_id}/comments/{comment_id}")
+async def delete_comment(video_id: str, comment_id: str, user_id: str):
+    """Delete your own comment"""
+    if not await comment_store.delete(video_id, comment_id, user_id=user_id):
+        raise HTTPException(status_code=404, detail="Comment not found")
+    await bump(db, VIDEO_COUNTERS_KEY)
     return {"success": True}
 
 
@@ -903,6 +2902,38 @@ async def view_video(video_id: str):
 
 app.include_router(api_router)
 
+if isinstance(storage, LocalStorage) and storage.base_url.startswith("/"):
+    app.mount(storage.base_url, StaticFiles(directory=storage.root), name="media")
+
+@app.exception_handler(UploadError)
+async def upload_error_handler(request: Request, exc: UploadError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+@app.exception_handler(PyMongoError)
+async def mongo_error_handler(request: Request, exc: PyMongoError):
+    """Deadline or pool timeouts become a retryable 503 instead of a hung worker"""
+    if not exc.timeout:
+        raise exc
+    # Label by route template so ids in the path don't make a series per request
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.inc("deadline_exceeded", route=route)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database deadline exceeded, please retry"},
+        headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
+app.add_middleware(
+    CoalescingMiddleware,
+    paths=COALESCED_PATHS,
+    stale_seconds=COALESCE_STALE_SECONDS,
+    max_stale_entries=COALESCE_MAX_STALE_ENTRIES,
+)
+
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE, offload_size=COMPRESSION_OFFLOAD_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -916,7 +2947,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
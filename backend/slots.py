@@ -0,0 +1,136 @@
+from datetime import date as Date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+# Slot layouts: the start times of a venue's bookable slots for each
+# weekday (0 = Monday). They are generated from a slot template - a slot
+# duration, a gap between slots and opening hours, optionally per weekday -
+# rather than stored on every venue.
+
+Layout = List[List[str]]
+
+
+def slot_minutes(time_slot: str) -> int:
+    """Minutes after midnight for a "06:00 PM" style time"""
+    parsed = datetime.strptime(time_slot, "%I:%M %p")
+    return parsed.hour * 60 + parsed.minute
+
+
+def label(minutes: int) -> str:
+    return (datetime.min + timedelta(minutes=minutes)).strftime("%I:%M %p")
+
+
+def day_slots(opening_time: str, closing_time: str, duration: int, gap: int = 0) -> List[str]:
+    """Start times of every slot that fits between opening and closing"""
+    start, end = slot_minutes(opening_time), slot_minutes(closing_time)
+    if end <= start:
+        end += 24 * 60  # Closes at or after midnight
+    times = []
+    while start + duration <= end and start < 24 * 60:
+        times.append(label(start))
+        start += duration + gap
+    return times
+
+
+def validate_template(template: dict):
+    """Raise ValueError if a template can't generate slots"""
+    if template.get("duration_minutes", 60) < 5:
+        raise ValueError("duration_minutes must be at least 5")
+    if template.get("gap_minutes", 0) < 0:
+        raise ValueError("gap_minutes must not be negative")
+    slot_minutes(template.get("opening_time", "06:00 AM"))
+    slot_minutes(template.get("closing_time", "10:00 PM"))
+    for weekday, hours in (template.get("weekday_hours") or {}).items():
+        if weekday not in {str(d) for d in range(7)}:
+            raise ValueError("weekday_hours keys must be 0 (Monday) to 6 (Sunday)")
+        if hours:
+            slot_minutes(hours["opening_time"])
+            slot_minutes(hours["closing_time"])
+
+
+def build_layout(template: dict) -> Layout:
+    duration, gap = template.get("duration_minutes", 60), template.get("gap_minutes", 0)
+    weekday_hours = template.get("weekday_hours") or {}
+    layout = []
+    for weekday in range(7):
+        hours = weekday_hours.get(str(weekday), template)
+        # An explicit null in weekday_hours closes the venue that day
+        layout.append(day_slots(hours["opening_time"], hours["closing_time"], duration, gap) if hours else [])
+    return layout
+
+
+def venue_hours_template(venue: dict) -> dict:
+    """Implicit template for venues without one: hourly slots within opening hours"""
+    return {
+        "duration_minutes": 60,
+        "gap_minutes": 0,
+        "opening_time": venue.get("opening_time") or "06:00 AM",
+        "closing_time": venue.get("closing_time") or "10:00 PM",
+    }
+
+
+def slot_order(layout: Layout) -> List[str]:
+    """Every start time used on any weekday, earliest first"""
+    return sorted({time for day in layout for time in day}, key=slot_minutes)
+
+
+class SlotTemplates:
+    """Loads slot templates and memoizes their layouts.
+
+    A stored template's layout is memoized by template id and tagged with
+    its `slot_template:<id>` version, so editing a template makes every
+    worker rebuild it once. Venues without a template use their own
+    opening hours; those layouts depend only on the hours and are memoized
+    forever.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.templates = db.slot_templates
+        self._by_template: Dict[str, Tuple[int, Layout]] = {}
+        self._by_hours: Dict[Tuple[str, str], Layout] = {}
+
+    async def ensure_indexes(self):
+        await self.templates.create_index("id", unique=True)
+
+    @staticmethod
+    def version_key(template_id: str) -> str:
+        return f"slot_template:{template_id}"
+
+    def _hours_layout(self, venue: dict) -> Layout:
+        template = venue_hours_template(venue)
+        key = (template["opening_time"], template["closing_time"])
+        if key not in self._by_hours:
+            self._by_hours[key] = build_layout(template)
+        return self._by_hours[key]
+
+    async def layouts(self, venues: Iterable[dict]) -> Dict[str, Layout]:
+        """Layout per venue id; one versions query covers every template involved"""
+        venues = list(venues)
+        template_ids = list({v["slot_template_id"] for v in venues if v.get("slot_template_id")})
+        stale = []
+        if template_ids:
+            keys = {self.version_key(t): t for t in template_ids}
+            versions = {keys[doc["_id"]]: doc["version"]
+                        async for doc in self.db.revisions.find({"_id": {"$in": list(keys)}})}
+            for template_id in template_ids:
+                cached = self._by_template.get(template_id)
+                if not cached or cached[0] != versions.get(template_id, 0):
+                    stale.append((template_id, versions.get(template_id, 0)))
+        if stale:
+            async for template in self.templates.find({"id": {"$in": [t for t, _ in stale]}}, {"_id": 0}):
+                version = dict(stale)[template["id"]]
+                self._by_template[template["id"]] = (version, build_layout(template))
+
+        result = {}
+        for venue in venues:
+            cached = self._by_template.get(venue.get("slot_template_id"))
+            # A venue whose template has been deleted falls back to its opening hours
+            result[venue["id"]] = cached[1] if cached else self._hours_layout(venue)
+        return result
+
+    async def layout(self, venue: dict) -> Layout:
+        return (await self.layouts([venue]))[venue["id"]]
+
+    async def times_on(self, venue: dict, day: str) -> List[str]:
+        """Slot start times for a venue on one date (YYYY-MM-DD)"""
+        return (await self.layout(venue))[Date.fromisoformat(day).weekday()]
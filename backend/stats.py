@@ -0,0 +1,236 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from pymongo import ReplaceOne
+
+
+def booking_delta(booking: Optional[dict], sign: int) -> Dict[str, float]:
+    """What one booking contributes to its user's counters, times `sign`"""
+    if not booking:
+        return {}
+    status = booking.get("status")
+    return {
+        "total_bookings": sign,
+        "completed_bookings": sign if status == "completed" else 0,
+        "cancelled_bookings": sign if status == "cancelled" else 0,
+        "total_spent": sign * booking.get("total_price", 0),
+    }
+
+
+def venue_day_delta(booking: Optional[dict], sign: int) -> Dict[str, float]:
+    """What one booking contributes to its venue's row for the slot date, times `sign`"""
+    if not booking:
+        return {}
+    if booking.get("status") == "cancelled":
+        return {"bookings": sign, "cancellations": sign}
+    return {
+        "bookings": sign,
+        "revenue": sign * booking.get("total_price", 0),
+        "super_videos": sign if booking.get("super_video_enabled") else 0,
+    }
+
+
+def merge(*deltas: Dict[str, float]) -> Dict[str, float]:
+    merged = defaultdict(int)
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] += value
+    return {k: v for k, v in merged.items() if v}
+
+
+class UserStats:
+    """One `user_stats` document per user, kept current with $inc.
+
+    Write paths report each booking/video change here, so reading a user's
+    totals is a single lookup by user_id. `last_booking_at` only moves
+    forward; deleting the latest booking leaves it until the next rebuild.
+    """
+
+    FIELDS = ("total_bookings", "completed_bookings", "cancelled_bookings", "total_spent", "total_videos")
+
+    def __init__(self, db, booking_collections: Sequence[str] = ("bookings",)):
+        self.db = db
+        self.stats = db.user_stats
+        self.booking_collections = booking_collections
+
+    async def ensure_indexes(self):
+        await self.stats.create_index("user_id", unique=True)
+
+    async def get(self, user_id: str) -> dict:
+        doc = await self.stats.find_one({"user_id": user_id}, {"_id": 0})
+        return {"user_id": user_id, **{f: 0 for f in self.FIELDS}, "last_booking_at": None, **(doc or {})}
+
+    async def _apply(self, user_id: str, delta: Dict[str, float], last_booking_at: Optional[datetime] = None):
+        update = {"$set": {"updated_at": datetime.utcnow()}}
+        if delta:
+            update["$inc"] = delta
+        if last_booking_at:
+            update["$max"] = {"last_booking_at": last_booking_at}
+        if delta or last_booking_at:
+            await self.stats.update_one({"user_id": user_id}, update, upsert=True)
+
+    async def booking_changed(self, before: Optional[dict], after: Optional[dict]):
+        """Apply a booking create (before=None), update, or delete (after=None)"""
+        if before and after and before["user_id"] != after["user_id"]:
+            await self._apply(before["user_id"], merge(booking_delta(before, -1)))
+            await self._apply(after["user_id"], merge(booking_delta(after, 1)), after.get("created_at"))
+            return
+        user_id = (after or before)["user_id"]
+        created_at = after.get("created_at") if after and not before else None
+        await self._apply(user_id, merge(booking_delta(before, -1), booking_delta(after, 1)), created_at)
+
+    async def video_changed(self, video: dict, sign: int):
+        await self._apply(video["user_id"], {"total_videos": sign})
+
+    async def delete(self, user_id: str):
+        await self.stats.delete_one({"user_id": user_id})
+
+    async def rebuild(self, user_ids: Optional[List[str]] = None, batch_size: int = 500) -> int:
+        """Recompute stats from bookings (all `booking_collections`) and videos; returns users written.
+
+        Writes that land while a user is being recomputed can be lost, so
+        run it when traffic is low or rerun it for the affected users.
+        """
+        match = {"user_id": {"$in": user_ids}} if user_ids else {}
+        empty = {**{f: 0 for f in self.FIELDS}, "last_booking_at": None}
+        totals = defaultdict(lambda: dict(empty))
+        booking_pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$user_id",
+                "total_bookings": {"$sum": 1},
+                "completed_bookings": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+                "cancelled_bookings": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}},
+                "total_spent": {"$sum": "$total_price"},
+                "last_booking_at": {"$max": "$created_at"},
+            }},
+        ]
+        for name in self.booking_collections:
+            async for row in self.db[name].aggregate(booking_pipeline, allowDiskUse=True):
+                user = totals[row.pop("_id")]
+                latest = row.pop("last_booking_at")
+                if latest and (not user["last_booking_at"] or latest > user["last_booking_at"]):
+                    user["last_booking_at"] = latest
+                for field, value in row.items():
+                    user[field] += value
+        video_pipeline = [{"$match": match}, {"$group": {"_id": "$user_id", "total_videos": {"$sum": 1}}}]
+        async for row in self.db.videos.aggregate(video_pipeline, allowDiskUse=True):
+            totals[row["_id"]]["total_videos"] = row["total_videos"]
+        for user_id in user_ids or []:
+            # Users with nothing left are reset to zero
+            totals.setdefault(user_id, dict(empty))
+
+        now = datetime.utcnow()
+        ops = [
+            ReplaceOne({"user_id": user_id}, {"user_id": user_id, **values, "updated_at": now}, upsert=True)
+            for user_id, values in totals.items()
+        ]
+        for offset in range(0, len(ops), batch_size):
+            await self.stats.bulk_write(ops[offset:offset + batch_size], ordered=False)
+        if not user_ids:
+            # Anyone not rewritten above has no bookings or videos left
+            await self.stats.delete_many({"updated_at": {"$lt": now}})
+        return len(ops)
+
+
+class VenueDailyStats:
+    """Per-venue, per-slot-date booking rollups in `daily_venue_stats`.
+
+    Rows hold bookings (all, including cancelled), cancellations, revenue and
+    super_videos (both over bookings that are not cancelled). Booking writes
+    apply $inc deltas; `rebuild` recomputes a date range from every
+    collection in `booking_collections` (live and archived bookings).
+    """
+
+    FIELDS = ("bookings", "cancellations", "revenue", "super_videos")
+
+    def __init__(self, db, booking_collections: Sequence[str] = ("bookings",)):
+        self.db = db
+        self.rollups = db.daily_venue_stats
+        self.booking_collections = booking_collections
+
+    async def ensure_indexes(self):
+        await self.rollups.create_index([("venue_id", 1), ("date", 1)], unique=True)
+        await self.rollups.create_index("date")
+
+    async def _apply(self, venue_id: str, date: str, delta: Dict[str, float]):
+        if delta:
+            await self.rollups.update_one(
+                {"venue_id": venue_id, "date": date},
+                {"$inc": delta, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True,
+            )
+
+    async def booking_changed(self, before: Optional[dict], after: Optional[dict]):
+        """Apply a booking create (before=None), update, or delete (after=None)"""
+        if before and after and (before["venue_id"], before["date"]) != (after["venue_id"], after["date"]):
+            await self._apply(before["venue_id"], before["date"], merge(venue_day_delta(before, -1)))
+            await self._apply(after["venue_id"], after["date"], merge(venue_day_delta(after, 1)))
+            return
+        booking = after or before
+        await self._apply(booking["venue_id"], booking["date"],
+                          merge(venue_day_delta(before, -1), venue_day_delta(after, 1)))
+
+    def _range(self, start: Optional[str], end: Optional[str], venue_id: Optional[str] = None) -> dict:
+        query = {}
+        if start or end:
+            query["date"] = {**({"$gte": start} if start else {}), **({"$lte": end} if end else {})}
+        if venue_id:
+            query["venue_id"] = venue_id
+        return query
+
+    async def series(self, start: str, end: str, group_by: str = "date", venue_id: Optional[str] = None) -> List[dict]:
+        """Rollup totals between two slot dates (inclusive), by date or by venue"""
+        pipeline = [
+            {"$match": self._range(start, end, venue_id)},
+            {"$group": {"_id": f"${group_by}", **{f: {"$sum": f"${f}"} for f in self.FIELDS}}},
+            {"$sort": {"_id": 1}},
+        ]
+        rows = []
+        async for row in self.rollups.aggregate(pipeline):
+            row[group_by] = row.pop("_id")
+            kept = row["bookings"] - row["cancellations"]
+            row["attach_rate"] = round(row["super_videos"] / kept, 4) if kept else 0
+            rows.append(row)
+        return rows
+
+    async def totals(self) -> Dict[str, float]:
+        pipeline = [{"$group": {"_id": None, **{f: {"$sum": f"${f}"} for f in self.FIELDS}}}]
+        rows = await self.rollups.aggregate(pipeline).to_list(1)
+        return {f: rows[0][f] if rows else 0 for f in self.FIELDS}
+
+    async def rebuild(self, start: Optional[str] = None, end: Optional[str] = None, batch_size: int = 500) -> int:
+        """Recompute rows for slot dates in [start, end] (everything by default)"""
+        pipeline = [
+            {"$match": self._range(start, end)},
+            {"$group": {
+                "_id": {"venue_id": "$venue_id", "date": "$date"},
+                "bookings": {"$sum": 1},
+                "cancellations": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}},
+                "revenue": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 0, "$total_price"]}},
+                "super_videos": {"$sum": {"$cond": [
+                    {"$and": [{"$ne": ["$status", "cancelled"]}, {"$eq": ["$super_video_enabled", True]}]}, 1, 0,
+                ]}},
+            }},
+        ]
+        rows = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+        for name in self.booking_collections:
+            async for row in self.db[name].aggregate(pipeline, allowDiskUse=True):
+                key = row.pop("_id")
+                totals = rows[(key["venue_id"], key["date"])]
+                for field in self.FIELDS:
+                    totals[field] += row[field]
+
+        now = datetime.utcnow()
+        ops = [
+            ReplaceOne({"venue_id": venue_id, "date": date},
+                       {"venue_id": venue_id, "date": date, **totals, "updated_at": now}, upsert=True)
+            for (venue_id, date), totals in rows.items()
+        ]
+        for offset in range(0, len(ops), batch_size):
+            await self.rollups.bulk_write(ops[offset:offset + batch_size], ordered=False)
+        written = len(ops)
+        # Rows in the range with no bookings left
+        await self.rollups.delete_many({**self._range(start, end), "updated_at": {"$lt": now}})
+        return written
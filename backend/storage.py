@@ -0,0 +1,180 @@
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import List, Tuple
+
+import anyio
+
+
+class LocalStorage:
+    """Stores objects under a directory that the API serves at `base_url`.
+
+    Stand-in for the S3 bucket in development and single-host deployments.
+    """
+
+    def __init__(self, root: Path, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+        # In-progress uploads live next to (not inside) the served directory
+        self.upload_root = self.root.parent / f"{self.root.name}-uploads"
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str) -> str:
+        def write():
+            path = self.path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+        await anyio.to_thread.run_sync(write)
+        return self.url(key)
+
+    async def exists(self, key: str) -> bool:
+        return await anyio.to_thread.run_sync(self.path(key).exists)
+
+    # Multipart uploads mirror the S3 API: parts are staged as files and
+    # concatenated on completion with a fixed-size copy buffer.
+
+    min_part_size = 1
+
+    @property
+    def staging_dir(self) -> Path:
+        path = self.upload_root / "staging"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _parts_dir(self, upload_id: str) -> Path:
+        return self.upload_root / upload_id
+
+    async def create_multipart(self, key: str, content_type: str) -> str:
+        upload_id = uuid.uuid4().hex
+        await anyio.to_thread.run_sync(lambda: self._parts_dir(upload_id).mkdir(parents=True, exist_ok=True))
+        return upload_id
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, path: Path, size: int) -> str:
+        """Takes ownership of the staged file at `path`"""
+        target = self._parts_dir(upload_id) / f"{part_number:06d}"
+        await anyio.to_thread.run_sync(os.replace, path, target)
+        return f"{upload_id}-{part_number}"
+
+    async def complete_multipart(self, key: str, upload_id: str, parts: List[Tuple[int, str]]) -> str:
+        def assemble():
+            final = self.path(key)
+            final.parent.mkdir(parents=True, exist_ok=True)
+            tmp = final.with_suffix(final.suffix + ".tmp")
+            with open(tmp, "wb") as out:
+                for part_number, _ in sorted(parts):
+                    with open(self._parts_dir(upload_id) / f"{part_number:06d}", "rb") as part:
+                        shutil.copyfileobj(part, out, 1024 * 1024)
+            os.replace(tmp, final)
+            shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+        await anyio.to_thread.run_sync(assemble)
+        return self.url(key)
+
+    async def abort_multipart(self, key: str, upload_id: str):
+        await anyio.to_thread.run_sync(lambda: shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True))
+
+
+class S3Storage:
+    """Stores objects in an S3-compatible bucket (AWS, MinIO, R2, ...)"""
+
+    def __init__(self, bucket: str, base_url: str, endpoint_url: str = None, region: str = None):
+        import boto3
+
+        self.bucket = bucket
+        self.base_url = base_url.rstrip("/")
+        self.s3 = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str) -> str:
+        await anyio.to_thread.run_sync(
+            lambda: self.s3.put_object(
+                Bucket=self.bucket, Key=key, Body=data, ContentType=content_type,
+                CacheControl="public, max-age=31536000, immutable",
+            )
+        )
+        return self.url(key)
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        def head():
+            try:
+                self.s3.head_object(Bucket=self.bucket, Key=key)
+                return True
+            except ClientError:
+                return False
+
+        return await anyio.to_thread.run_sync(head)
+
+    # S3 rejects parts under 5 MiB except for the last one
+    min_part_size = 5 * 1024 * 1024
+
+    @property
+    def staging_dir(self) -> Path:
+        return Path(tempfile.gettempdir())
+
+    async def create_multipart(self, key: str, content_type: str) -> str:
+        response = await anyio.to_thread.run_sync(
+            lambda: self.s3.create_multipart_upload(Bucket=self.bucket, Key=key, ContentType=content_type)
+        )
+        return response["UploadId"]
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, path: Path, size: int) -> str:
+        """Takes ownership of the staged file at `path`"""
+        def send():
+            try:
+                with open(path, "rb") as body:
+                    response = self.s3.upload_part(
+                        Bucket=self.bucket, Key=key, UploadId=upload_id,
+                        PartNumber=part_number, Body=body, ContentLength=size,
+                    )
+                return response["ETag"]
+            finally:
+                os.unlink(path)
+
+        return await anyio.to_thread.run_sync(send)
+
+    async def complete_multipart(self, key: str, upload_id: str, parts: List[Tuple[int, str]]) -> str:
+        await anyio.to_thread.run_sync(
+            lambda: self.s3.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in sorted(parts)]},
+            )
+        )
+        return self.url(key)
+
+    async def abort_multipart(self, key: str, upload_id: str):
+        await anyio.to_thread.run_sync(
+            lambda: self.s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+        )
+
+
+def storage_from_env(root_dir: Path):
+    backend = os.environ.get('STORAGE_BACKEND', 'local')
+    if backend == 's3':
+        return S3Storage(
+            bucket=os.environ['S3_BUCKET'],
+            base_url=os.environ['S3_PUBLIC_BASE_URL'],
+            endpoint_url=os.environ.get('S3_ENDPOINT_URL'),
+            region=os.environ.get('S3_REGION'),
+        )
+    return LocalStorage(
+        Path(os.environ.get('MEDIA_ROOT', root_dir / 'media')),
+        os.environ.get('MEDIA_BASE_URL', '/api/media'),
+    )
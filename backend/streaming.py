@@ -0,0 +1,191 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+
+READ_CHUNK_SIZE = 256 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _identity(stat: os.stat_result) -> Tuple[int, int, int]:
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class FileHandleCache:
+    """Keeps descriptors of hot video files open across requests.
+
+    Reads use os.pread with an explicit offset, so any number of concurrent
+    viewers can share one descriptor. Descriptors beyond `max_open` are
+    closed least-recently-used first, once no response is using them.
+
+    Each acquire re-stats the path, so a recording replaced or re-uploaded
+    in place is reopened (with a fresh ETag) rather than served from the
+    old inode; responses still reading the old descriptor finish first.
+    """
+
+    def __init__(self, max_open: int = 256):
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # path -> [fd, stat, users]
+        self._retired: Dict[int, int] = {}  # fd of a replaced file -> users
+
+    def acquire(self, path: str) -> Tuple[int, os.stat_result]:
+        current = _identity(os.stat(path))
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and _identity(entry[1]) == current:
+                self._entries.move_to_end(path)
+                entry[2] += 1
+                return entry[0], entry[1]
+        fd = os.open(path, os.O_RDONLY)
+        stat = os.fstat(fd)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and _identity(entry[1]) == _identity(stat):
+                # Another request opened it meanwhile
+                os.close(fd)
+                entry[2] += 1
+                return entry[0], entry[1]
+            if entry is not None:
+                self._retire(entry[0], entry[2])
+            self._entries[path] = [fd, stat, 1]
+            self._entries.move_to_end(path)
+            self._evict()
+        return fd, stat
+
+    def release(self, path: str, fd: int):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == fd:
+                entry[2] -= 1
+            elif fd in self._retired:
+                self._retire(fd, self._retired.pop(fd) - 1)
+            self._evict()
+
+    def _retire(self, fd: int, users: int):
+        if users > 0:
+            self._retired[fd] = users
+        else:
+            os.close(fd)
+
+    def _evict(self):
+        for path in list(self._entries):
+            if len(self._entries) <= self.max_open:
+                break
+            fd, _, users = self._entries[path]
+            if users == 0:
+                os.close(fd)
+                del self._entries[path]
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Single byte range -> inclusive (start, end); None for the whole file.
+
+    Raises ValueError for an unsatisfiable range. Multi-range requests are
+    answered with the whole file, which RFC 9110 allows.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """Response serving a byte range of a cached file descriptor.
+
+    Uses the ASGI `http.response.zerocopysend` extension (sendfile) when the
+    server offers it. Uvicorn doesn't, and ASGI gives no access to its
+    socket, so there every byte is pread() in a worker thread and copied
+    through Python. For zero-copy, put nginx in front and set
+    STREAM_ACCEL_REDIRECT_PREFIX so it serves the file itself (see
+    stream_video).
+    """
+
+    def __init__(self, cache: FileHandleCache, path: str, content_type: str, range_header: Optional[str] = None,
+                 if_range: Optional[str] = None, cache_control: str = "public, max-age=86400"):
+        self.cache = cache
+        self.path = path
+        self.content_type = content_type
+        self.range_header = range_header
+        self.if_range = if_range
+        self.cache_control = cache_control
+        self.background = None
+
+    async def __call__(self, scope, receive, send):
+        fd, stat = self.cache.acquire(self.path)
+        try:
+            await self._send(scope, send, fd, stat)
+        finally:
+            self.cache.release(self.path, fd)
+        if self.background is not None:
+            await self.background()
+
+    async def _send(self, scope, send, fd: int, stat: os.stat_result):
+        size = stat.st_size
+        etag = f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        headers = [
+            (b"accept-ranges", b"bytes"),
+            (b"content-type", self.content_type.encode()),
+            (b"etag", etag.encode()),
+            (b"last-modified", formatdate(stat.st_mtime, usegmt=True).encode()),
+            (b"cache-control", self.cache_control.encode()),
+        ]
+        range_header = self.range_header
+        if self.if_range and self.if_range != etag:
+            range_header = None  # file changed since the client's partial copy
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers.append((b"content-range", f"bytes */{size}".encode()))
+            headers.append((b"content-length", b"0"))
+            await send({"type": "http.response.start", "status": 416, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if byte_range is None:
+            status, start, end = 200, 0, size - 1
+        else:
+            status, (start, end) = 206, byte_range
+            headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+        length = max(end - start + 1, 0)
+        headers.append((b"content-length", str(length).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+
+        if scope.get("method") == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            await send({"type": "http.response.zerocopysend", "file": fd, "offset": start, "count": length})
+            return
+
+        offset, remaining = start, length
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(READ_CHUNK_SIZE, remaining), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; end the response cleanly
+            await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,176 @@
+import hashlib
+import math
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional
+
+import anyio
+
+# Upload lifecycle: uploading -> processing (assembled, ingest job queued)
+# -> ready once attached to its Booking/Video; aborted is terminal.
+UPLOADING, PROCESSING, READY, ABORTED = "uploading", "processing", "ready", "aborted"
+
+# Multipart uploads (S3 and compatible stores) allow at most this many parts
+MAX_CHUNKS = 10000
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class UploadManager:
+    """Resumable chunked uploads streamed straight into storage.
+
+    Each chunk is streamed to a staging file while its SHA-256 is computed,
+    then handed to the storage backend as one multipart part, so memory per
+    upload stays at one read buffer regardless of file size. Received parts
+    are recorded on the `uploads` document, which is what makes resuming
+    after a dropped connection possible.
+    """
+
+    def __init__(self, db, storage, default_chunk_size: int = 8 * 1024 * 1024, ttl_hours: int = 24,
+                 max_size: int = 5 * 1024 ** 3):
+        self.uploads = db.uploads
+        self.storage = storage
+        self.default_chunk_size = default_chunk_size
+        self.max_size = max_size
+        self.ttl = timedelta(hours=ttl_hours)
+
+    async def ensure_indexes(self):
+        await self.uploads.create_index("id", unique=True)
+        await self.uploads.create_index([("status", 1), ("expires_at", 1)])
+
+    async def init(self, filename: str, content_type: str, total_size: int, chunk_size: Optional[int] = None,
+                   **attach) -> dict:
+        chunk_size = max(chunk_size or self.default_chunk_size, self.storage.min_part_size)
+        if total_size <= 0:
+            raise UploadError(400, "total_size must be positive")
+        if total_size > self.max_size:
+            raise UploadError(400, f"total_size must be at most {self.max_size} bytes")
+        total_chunks = math.ceil(total_size / chunk_size)
+        if total_chunks > MAX_CHUNKS:
+            raise UploadError(400, f"Upload would need {total_chunks} chunks; use a chunk_size of at least "
+                                   f"{math.ceil(total_size / MAX_CHUNKS)} bytes")
+        upload_id = str(uuid.uuid4())
+        extension = os.path.splitext(filename)[1].lower()[:10]
+        key = f"videos/{datetime.utcnow():%Y/%m}/{upload_id}{extension}"
+        now = datetime.utcnow()
+        upload = {
+            "id": upload_id,
+            "filename": filename,
+            "content_type": content_type,
+            "total_size": total_size,
+            "chunk_size": chunk_size,
+            "total_chunks": total_chunks,
+            "key": key,
+            "storage_upload_id": await self.storage.create_multipart(key, content_type),
+            "parts": {},
+            "status": UPLOADING,
+            "url": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + self.ttl,
+            **attach,
+        }
+        await self.uploads.insert_one(dict(upload))
+        return upload
+
+    async def get(self, upload_id: str) -> dict:
+        upload = await self.uploads.find_one({"id": upload_id}, {"_id": 0})
+        if not upload:
+            raise UploadError(404, "Upload not found")
+        return upload
+
+    def expected_size(self, upload: dict, index: int) -> int:
+        if index == upload["total_chunks"] - 1:
+            return upload["total_size"] - index * upload["chunk_size"]
+        return upload["chunk_size"]
+
+    async def put_chunk(self, upload: dict, index: int, body: AsyncIterator[bytes], sha256: str) -> dict:
+        if upload["status"] != UPLOADING:
+            raise UploadError(409, f"Upload is {upload['status']}")
+        if not 0 <= index < upload["total_chunks"]:
+            raise UploadError(400, "Chunk index out of range")
+        expected = self.expected_size(upload, index)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, staged = tempfile.mkstemp(dir=self.storage.staging_dir, prefix=f"{upload['id']}-{index}-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                async for data in body:
+                    size += len(data)
+                    if size > expected:
+                        raise UploadError(400, f"Chunk larger than {expected} bytes")
+                    digest.update(data)
+                    await anyio.to_thread.run_sync(out.write, data)
+            if size != expected:
+                raise UploadError(400, f"Chunk is {size} bytes, expected {expected}")
+            if digest.hexdigest() != sha256.lower():
+                raise UploadError(400, "Chunk checksum mismatch")
+            etag = await self.storage.upload_part(upload["key"], upload["storage_upload_id"], index + 1,
+                                                  staged, size)
+        except BaseException:
+            if os.path.exists(staged):
+                os.unlink(staged)
+            raise
+
+        part = {"size": size, "sha256": digest.hexdigest(), "etag": etag}
+        await self.uploads.update_one(
+            {"id": upload["id"]},
+            {"$set": {f"parts.{index}": part, "updated_at": datetime.utcnow()}},
+        )
+        return part
+
+    def missing_count(self, upload: dict) -> int:
+        return upload["total_chunks"] - len(upload["parts"])
+
+    def missing_ranges(self, upload: dict, limit: int = 100) -> List[List[int]]:
+        """First `limit` runs of chunks not yet received, as inclusive [first, last] pairs"""
+        ranges, start = [], 0
+        for index in sorted(int(i) for i in upload["parts"]):
+            if index > start:
+                ranges.append([start, index - 1])
+            start = index + 1
+        if start < upload["total_chunks"]:
+            ranges.append([start, upload["total_chunks"] - 1])
+        return ranges[:limit]
+
+    async def complete(self, upload: dict) -> dict:
+        if upload["status"] != UPLOADING:
+            raise UploadError(409, f"Upload is {upload['status']}")
+        if self.missing_count(upload):
+            raise UploadError(409, f"Missing chunks: {self.missing_ranges(upload, limit=20)}")
+        parts = [(int(i) + 1, p["etag"]) for i, p in upload["parts"].items()]
+        url = await self.storage.complete_multipart(upload["key"], upload["storage_upload_id"], parts)
+        await self.uploads.update_one(
+            {"id": upload["id"], "status": UPLOADING},
+            {"$set": {"status": PROCESSING, "url": url, "updated_at": datetime.utcnow()}},
+        )
+        return {**upload, "status": PROCESSING, "url": url}
+
+    async def abort(self, upload: dict):
+        if upload["status"] != UPLOADING:
+            raise UploadError(409, f"Upload is {upload['status']}")
+        await self.storage.abort_multipart(upload["key"], upload["storage_upload_id"])
+        await self.uploads.update_one(
+            {"id": upload["id"]}, {"$set": {"status": ABORTED, "updated_at": datetime.utcnow()}}
+        )
+
+    async def mark_ready(self, upload_id: str):
+        await self.uploads.update_one(
+            {"id": upload_id}, {"$set": {"status": READY, "updated_at": datetime.utcnow()}}
+        )
+
+    async def abort_expired(self) -> int:
+        """Abort uploads abandoned past their TTL; returns how many"""
+        count = 0
+        async for upload in self.uploads.find({"status": UPLOADING, "expires_at": {"$lte": datetime.utcnow()}}):
+            await self.abort(upload)
+            count += 1
+        return count
@@ -0,0 +1,46 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from pymongo import UpdateOne
+
+
+def touch(update: dict) -> dict:
+    """Add revision bookkeeping to a Mongo update document.
+
+    Every write path goes through this so `revision`/`updated_at` always move
+    together with the data they describe.
+    """
+    update.setdefault("$set", {})["updated_at"] = datetime.utcnow()
+    update.setdefault("$inc", {})["revision"] = 1
+    return update
+
+
+async def bump(db, *keys: str):
+    """Increment collection-level versions, e.g. "venues" or "bookings:user:<id>" """
+    if not keys:
+        return
+    await db.revisions.bulk_write(
+        [UpdateOne({"_id": key}, {"$inc": {"version": 1}}, upsert=True) for key in keys],
+        ordered=False,
+    )
+
+
+async def current(db, key: str) -> int:
+    doc = await db.revisions.find_one({"_id": key})
+    return doc["version"] if doc else 0
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c[2:] == etag if c.startswith("W/") else c == etag for c in candidates)
@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+import signal
+
+import server
+
+
+async def start_workers(concurrency: int):
+    """Connect and start the job workers and scheduler; returns them for stop_workers"""
+    server.connect_db()
+    await server.ensure_indexes()
+    await server.event_hub.start()
+    pool = server.create_job_workers(concurrency)
+    pool.start()
+    scheduler = server.create_job_scheduler()
+    scheduler.start()
+    return pool, scheduler
+
+
+async def stop_workers(pool, scheduler):
+    await scheduler.stop()
+    await pool.stop()
+    await server.event_hub.stop()
+    server.close_db()
+
+
+async def run_workers(concurrency: int):
+    """Drain the job queue without serving HTTP"""
+    pool, scheduler = await start_workers(concurrency)
+    print(f"Job workers started (concurrency={concurrency})")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await stop_workers(pool, scheduler)
+    print("Job workers stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ClashON background job workers")
+    parser.add_argument("--concurrency", type=int, default=4, help="async workers in this process")
+    args = parser.parse_args()
+    asyncio.run(run_workers(args.concurrency))
@@ -24,6 +24,7 @@ export default function CheckoutScreen() {
   const [superVideoEnabled, setSuperVideoEnabled] = useState(false);
   const [loading, setLoading] = useState(false);
 
+  // Shown as a quote; the server computes the charged price when booking
   const basePrice = parseFloat(params.base_price as string);
   const superVideoPrice = parseFloat(params.super_video_price as string);
   const totalPrice = basePrice + (superVideoEnabled ? superVideoPrice : 0);
@@ -43,7 +44,7 @@ export default function CheckoutScreen() {
         time_slot: params.time_slot,
         sport: params.sport,
         super_video_enabled: superVideoEnabled,
-        total_price: totalPrice,
+        // No total_price: the server prices the booking from its rules
         user_id: user?.id || '',
         user_name: user?.name || 'Guest User',
       };
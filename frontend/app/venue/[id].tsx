@@ -26,13 +26,17 @@ export default function VenueDetailScreen() {
 
   useEffect(() => {
     loadVenue();
-  }, [id]);
+  }, [id, selectedDate]);
 
   const loadVenue = async () => {
     try {
-      setLoading(true);
-      const response = await axios.get(`${BACKEND_URL}/api/venues/${id}`);
+      setLoading(!venue);
+      // Slots, prices and availability are for the selected date
+      const response = await axios.get(`${BACKEND_URL}/api/venues/${id}`, {
+        params: { date: format(selectedDate, 'yyyy-MM-dd') },
+      });
       setVenue(response.data);
+      setSelectedSlot(null);
     } catch (error) {
       console.error('Error loading venue:', error);
     } finally {
@@ -62,7 +66,7 @@ export default function VenueDetailScreen() {
         sport: venue.sport,
         date: format(selectedDate, 'yyyy-MM-dd'),
         time_slot: selectedSlot.time,
-        base_price: venue.base_price,
+        base_price: selectedSlot.price,
         super_video_price: venue.super_video_price,
       },
     });
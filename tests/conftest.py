@@ -0,0 +1,58 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "clashon_test")
+os.environ["PUBSUB_BACKEND"] = "local"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["clashon_test"]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """The server module bound to an in-memory database"""
+    import server
+
+    monkeypatch.setattr(server, "create_client", lambda settings, monitor: AsyncMongoMockClient())
+    return server
+
+
+@pytest.fixture
+def app(server):
+    """The server module connected, without starting the app"""
+    server.connect_db()
+    yield server
+    server.close_db()
+
+
+@pytest.fixture
+def client_factory(server, monkeypatch):
+    """Builds TestClients over the full app; entering one runs the lifespan"""
+    from fastapi.testclient import TestClient
+
+    async def no_warm_pool(client, settings):
+        pass
+
+    monkeypatch.setattr(server, "warm_pool", no_warm_pool)
+    monkeypatch.setattr(server, "JOB_WORKERS", 0)
+    return lambda: TestClient(server.app)
+
+
+@pytest.fixture
+def client(client_factory):
+    with client_factory() as test_client:
+        yield test_client
@@ -0,0 +1,45 @@
+from analytics import utilization_matrix
+
+
+def test_closed_days_and_unoffered_slots_are_not_capacity():
+    # Open 6-7 PM Monday to Saturday, plus 7 PM on Saturdays; closed Sundays
+    layout = [["06:00 PM"]] * 5 + [["06:00 PM", "07:00 PM"], []]
+    # 2026-11-02 is a Monday; two weeks
+    dates = ["2026-11-02", "2026-11-07", "2026-11-07", "2026-11-14"]
+    slots = ["06:00 PM", "06:00 PM", "07:00 PM", "07:00 PM"]
+    matrix = utilization_matrix(dates, slots, layout, "2026-11-02", "2026-11-15")
+
+    assert matrix["slots"] == ["06:00 PM", "07:00 PM"]
+    assert matrix["capacity"][0] == [2, 0] and matrix["capacity"][5] == [2, 2] and matrix["capacity"][6] == [0, 0]
+    assert matrix["utilization"][5] == [0.5, 1.0]
+    assert matrix["by_slot"] == [round(2 / 12, 4), 1.0]
+    assert matrix["by_weekday"][5] == 0.75 and matrix["by_weekday"][6] == 0.0
+    assert matrix["overall"] == round(4 / 14, 4)
+
+
+def test_utilization_endpoint_follows_the_venue_layout(client):
+    venue = client.post("/api/admin/venues", json={
+        "name": "Arena", "location": "Indiranagar", "sport": "Badminton", "base_price": 500,
+        "opening_time": "06:00 PM", "closing_time": "08:00 PM",
+    }).json()
+    for date, time_slot in [("2026-11-02", "06:00 PM"), ("2026-11-07", "06:00 PM"), ("2026-11-07", "07:00 PM")]:
+        client.post("/api/bookings", json={
+            "venue_id": venue["id"], "venue_name": "Arena", "date": date, "time_slot": time_slot,
+            "sport": "Badminton", "user_id": "u1", "user_name": "U",
+        })
+    url = f"/api/admin/venues/{venue['id']}/utilization"
+    week = {"start": "2026-11-02", "end": "2026-11-08"}
+
+    matrix = client.get(url, params=week).json()
+    assert matrix["slots"] == ["06:00 PM", "07:00 PM"]
+    assert matrix["utilization"][0] == [1.0, 0.0] and matrix["utilization"][5] == [1.0, 1.0]
+    assert matrix["overall"] == round(3 / 14, 4)
+
+    # A new layout is a new denominator, even with no new bookings
+    client.put(f"/api/admin/venues/{venue['id']}", json={"closing_time": "07:00 PM"})
+    matrix = client.get(url, params=week).json()
+    assert matrix["slots"] == ["06:00 PM"] and matrix["capacity"][5] == [1]
+    assert matrix["overall"] == round(2 / 7, 4)
+
+    assert client.get(url, params={"start": "2026-11-08", "end": "2026-11-02"}).status_code == 400
+    assert client.get("/api/admin/venues/missing/utilization").status_code == 404
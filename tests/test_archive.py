@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import archive
+from archive import BookingArchive
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        # 00:30 on 3 Nov in Kolkata, still 2 Nov in UTC
+        return datetime(2026, 11, 2, 19, 0, tzinfo=timezone.utc).astimezone(tz)
+
+
+def test_cutoff_follows_the_venue_date(db, monkeypatch):
+    monkeypatch.setattr(archive, "datetime", FrozenDatetime)
+    assert BookingArchive(db, horizon_days=1, tz=ZoneInfo("Asia/Kolkata")).cutoff() == "2026-11-02"
+    assert BookingArchive(db, horizon_days=1).cutoff() == "2026-11-01"
@@ -0,0 +1,9 @@
+def test_updating_an_archived_booking_is_a_conflict(server, client):
+    booking = {"id": "b1", "venue_id": "v1", "venue_name": "Arena", "date": "2020-01-05", "time_slot": "06:00 AM",
+               "sport": "Football", "total_price": 500, "user_id": "u1", "user_name": "U", "status": "completed"}
+    client.portal.call(server.db.bookings_archive.insert_one, booking)
+
+    update = client.put("/api/admin/bookings/b1", json={"status": "cancelled"})
+    assert update.status_code == 409 and "archived" in update.json()["detail"]
+    assert client.put("/api/admin/bookings/b1/status", params={"status": "cancelled"}).status_code == 409
+    assert client.put("/api/admin/bookings/missing/status", params={"status": "cancelled"}).status_code == 404
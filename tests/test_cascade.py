@@ -0,0 +1,84 @@
+import pytest
+
+from cascade import CascadeDelete
+
+
+@pytest.mark.anyio
+async def test_cascade_archives_dependents_in_batches_and_is_idempotent(db):
+    cascades = CascadeDelete(db, batch_size=2, pause=0)
+    await db.venues.insert_one({"id": "v1"})
+    await db.bookings.insert_many([{"id": f"b{i}", "venue_id": "v1", "user_id": f"u{i}"} for i in range(3)])
+    await db.videos.insert_one({"id": "x1", "venue_id": "v1"})
+    dependents = [("bookings", "venue_id", "deleted_bookings"), ("videos", "venue_id", None)]
+    cascade = await cascades.start("venues", "v1", dependents)
+    assert (await cascades.start("venues", "v1", dependents))["id"] == cascade["id"]
+
+    batches, finished = [], []
+
+    async def on_batch(collection, docs):
+        batches.append((collection, len(docs)))
+        return {"users": [d["user_id"] for d in docs if "user_id" in d]}
+
+    async def on_finish(done):
+        finished.append(done["touched"])
+
+    async def heartbeat():
+        return True
+
+    assert await cascades.run(cascade["id"], on_batch, on_finish, heartbeat) == {"bookings": 3, "videos": 1}
+    assert batches == [("bookings", 2), ("bookings", 1), ("videos", 1)]
+    assert sorted(finished[0]["users"]) == ["u0", "u1", "u2"]
+    assert await db.deleted_bookings.count_documents({"archived_at": {"$ne": None}}) == 3
+    assert await db.bookings.count_documents({}) == 0 and await db.venues.count_documents({}) == 0
+    assert await cascades.run(cascade["id"], on_batch, on_finish, heartbeat) == {"skipped": True}
+
+
+@pytest.mark.anyio
+async def test_lost_lease_stops_the_cascade_where_it_was(db):
+    cascades = CascadeDelete(db, batch_size=1, pause=0)
+    await db.bookings.insert_many([{"id": f"b{i}", "user_id": "u1"} for i in range(2)])
+    cascade = await cascades.start("users", "u1", [("bookings", "user_id", None)])
+
+    async def on_batch(collection, docs):
+        return {}
+
+    async def on_finish(done):
+        pass
+
+    async def lost():
+        return False
+
+    with pytest.raises(RuntimeError):
+        await cascades.run(cascade["id"], on_batch, on_finish, lost)
+    assert (await cascades.get(cascade["id"]))["removed"] == {"bookings": 1}
+    assert await db.bookings.count_documents({}) == 1
+
+
+def test_deleting_a_venue_cascades_to_its_bookings_and_videos(server, client):
+    venue = client.post("/api/admin/venues", json={
+        "name": "Arena", "location": "Indiranagar", "sport": "Badminton", "base_price": 500,
+        "opening_time": "06:00 PM", "closing_time": "08:00 PM",
+    }).json()
+    client.post("/api/bookings", json={"venue_id": venue["id"], "venue_name": "Arena", "date": "2026-11-07",
+                                       "time_slot": "06:00 PM", "sport": "Badminton", "user_id": "u1",
+                                       "user_name": "U"})
+    video = client.post("/api/videos", json={"venue_id": venue["id"], "venue_name": "Arena", "sport": "Badminton",
+                                             "user_id": "u1", "user_name": "U"}).json()
+    client.post(f"/api/videos/{video['id']}/comments", json={"user_id": "u2", "user_name": "V", "text": "hi"})
+
+    cascade_id = client.delete(f"/api/admin/venues/{venue['id']}").json()["cascade_id"]
+    # Gone from listings at once, removed by the background job
+    assert client.get(f"/api/venues/{venue['id']}").status_code == 404
+    assert client.delete(f"/api/admin/venues/{venue['id']}").status_code == 404
+    assert client.get(f"/api/admin/cascades/{cascade_id}").json()["status"] == "pending"
+
+    job = client.portal.call(server.job_queue.lease, "test", ["cascade_delete"])
+    client.portal.call(server.process_cascade_delete, job)
+
+    cascade = client.get(f"/api/admin/cascades/{cascade_id}").json()
+    assert cascade["status"] == "done"
+    assert cascade["removed"] == {"bookings": 1, "bookings_archive": 0, "videos": 1}
+    assert client.get("/api/admin/bookings").json() == []
+    assert client.get("/api/videos").json() == []
+    assert client.portal.call(server.db.comment_buckets.count_documents, {}) == 0
+    assert client.portal.call(server.db.deleted_bookings.count_documents, {}) == 1
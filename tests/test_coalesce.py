@@ -0,0 +1,35 @@
+import pytest
+
+import coalesce
+from coalesce import CoalescingMiddleware
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": scope["query_string"]})
+
+
+async def get(middleware, query: bytes):
+    scope = {"type": "http", "method": "GET", "path": "/api/venues", "query_string": query, "headers": []}
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, None, send)
+    return sent[-1]["body"]
+
+
+@pytest.mark.anyio
+async def test_stale_responses_are_capped_and_expire(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(coalesce.time, "monotonic", lambda: clock[0])
+    middleware = CoalescingMiddleware(endpoint, ["/api/venues"], stale_seconds=10, max_stale_entries=2)
+
+    for query in (b"page=1", b"page=2", b"page=3"):
+        assert await get(middleware, query) == query
+    assert len(middleware._recent) == 2
+
+    clock[0] += 11
+    await get(middleware, b"page=4")
+    assert len(middleware._recent) == 1
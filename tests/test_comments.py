@@ -0,0 +1,45 @@
+import pytest
+
+from comments import CommentStore
+
+
+@pytest.mark.anyio
+async def test_comments_fill_fixed_size_buckets(db):
+    store = CommentStore(db, bucket_size=2)
+    await db.videos.insert_one({"id": "v1", "comment_count": 0})
+    comments = [await store.add("v1", "u1", "U", f"#{i}") for i in range(1, 6)]
+    assert await store.add("missing", "u1", "U", "hi") is None
+
+    buckets = await db.comment_buckets.find({}, {"_id": 0, "bucket": 1, "count": 1}).sort("bucket", 1).to_list(None)
+    assert buckets == [{"bucket": 0, "count": 2}, {"bucket": 1, "count": 2}, {"bucket": 2, "count": 1}]
+
+    # Empty out the middle bucket; paging skips over it
+    for comment in comments[2:4]:
+        assert await store.delete("v1", comment["id"])
+    pages, before = [], None
+    while True:
+        page, before = await store.page("v1", before, limit=2)
+        pages.append([c["text"] for c in page])
+        if before is None:
+            break
+    assert [text for page in pages for text in page] == ["#5", "#2", "#1"]
+    assert (await db.videos.find_one({"id": "v1"}))["comment_count"] == 3
+
+
+def test_comment_endpoints_page_newest_first(client):
+    video = client.post("/api/videos", json={"venue_name": "Arena", "sport": "Football", "user_id": "u1",
+                                             "user_name": "U"}).json()
+    url = f"/api/videos/{video['id']}/comments"
+    ids = [client.post(url, json={"user_id": "u2", "user_name": "V", "text": f"#{i}"}).json()["id"]
+           for i in range(1, 4)]
+    assert client.post("/api/videos/missing/comments", json={"user_id": "u2", "user_name": "V",
+                                                              "text": "hi"}).status_code == 404
+
+    page = client.get(url, params={"limit": 2}).json()
+    assert [c["text"] for c in page["items"]] == ["#3", "#2"]
+    rest = client.get(url, params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [c["text"] for c in rest["items"]] == ["#1"] and rest["next_cursor"] is None
+
+    assert client.delete(f"{url}/{ids[0]}", params={"user_id": "u1"}).status_code == 404
+    assert client.delete(f"{url}/{ids[0]}", params={"user_id": "u2"}).status_code == 200
+    assert [c["text"] for c in client.get(url).json()["items"]] == ["#3", "#2"]
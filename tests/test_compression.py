@@ -0,0 +1,38 @@
+from compression import negotiate
+
+CODECS = {"br": None, "zstd": None, "gzip": None}
+
+
+def create_venues(client, count=5):
+    for i in range(count):
+        client.post("/api/admin/venues", json={"name": f"Arena {i}", "location": "Indiranagar",
+                                                "sport": "Badminton", "base_price": 500})
+
+
+def test_negotiation_follows_q_values_then_server_preference():
+    assert negotiate("gzip, br", CODECS) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", CODECS) == "gzip"
+    assert negotiate("br;q=0, *;q=0.1", CODECS) == "zstd"
+    assert negotiate("identity", CODECS) is None
+    assert negotiate("", CODECS) is None
+
+
+def test_large_json_is_gzipped_with_a_weak_etag(client):
+    create_venues(client)
+    plain = client.get("/api/venues", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    response = client.get("/api/venues", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == plain.json()
+    assert response.headers["etag"] == "W/" + plain.headers["etag"]
+
+    revalidated = client.get("/api/venues", headers={"Accept-Encoding": "gzip",
+                                                     "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_small_bodies_are_sent_as_is(client):
+    response = client.get("/api/health/live", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200 and "content-encoding" not in response.headers
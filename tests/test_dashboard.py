@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from dashboard import DashboardFeed
+from pubsub import Hub, Subscriber
+
+
+def booking(status="confirmed", price=500):
+    return {"id": "b1", "venue_id": "v1", "venue_name": "Arena", "user_name": "U", "date": "2026-11-07",
+            "time_slot": "06:00 PM", "total_price": price, "status": status}
+
+
+def change(coll, operation, after=None, before=None, updated=None, _id=1):
+    return {"ns": {"coll": coll}, "operationType": operation, "documentKey": {"_id": _id},
+            "fullDocument": after, "fullDocumentBeforeChange": before,
+            "updateDescription": {"updatedFields": updated or {}}}
+
+
+def listen():
+    hub, subscriber = Hub(), Subscriber()
+    hub.subscribe(subscriber, "admin:dashboard")
+    return DashboardFeed(None, hub, "admin:dashboard"), subscriber
+
+
+def received(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        message = subscriber.queue.get_nowait()
+        messages.append((message["type"], message["data"]))
+    return messages
+
+
+def test_booking_writes_become_deltas():
+    feed, subscriber = listen()
+    feed.handle(change("bookings", "insert", after=booking()))
+    feed.handle(change("bookings", "update", after=booking("cancelled"), before=booking(),
+                       updated={"status": "cancelled"}))
+    feed.handle(change("bookings", "update", after=booking(), before=booking(), updated={"video_status": "ready"}))
+    feed.handle(change("users", "insert", after={"id": "u1", "name": "U", "created_at": datetime(2026, 1, 1)}))
+
+    assert received(subscriber) == [
+        ("booking_created", booking()),
+        ("revenue", {"delta": 500, "booking_id": "b1"}),
+        ("booking_status", {"id": "b1", "from": "confirmed", "to": "cancelled"}),
+        ("revenue", {"delta": -500, "booking_id": "b1"}),
+        ("user_created", {"id": "u1", "name": "U", "created_at": "2026-01-01T00:00:00"}),
+    ]
+
+
+def test_archival_moves_are_silent_but_deletes_are_not():
+    feed, subscriber = listen()
+    feed.handle(change("bookings_archive", "insert", after=booking("completed"), _id=1))
+    feed.handle(change("bookings", "delete", before=booking("completed"), _id=1))
+    assert received(subscriber) == []
+
+    feed.handle(change("bookings", "delete", before=booking("completed"), _id=2))
+    feed.handle(change("bookings", "delete", _id=3))
+    assert received(subscriber) == [
+        ("booking_status", {"id": "b1", "from": "completed", "to": "deleted"}),
+        ("revenue", {"delta": -500, "booking_id": "b1"}),
+        ("resync", {}),
+    ]
@@ -0,0 +1,54 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from exports import stream_export
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.anyio
+async def test_export_streams_selected_columns_in_batches(db):
+    await db.bookings.insert_many([{"id": f"b{i}", "date": "2026-11-07", "notes": {"court": i}, "secret": "x"}
+                                   for i in range(5)])
+
+    body = await collect(stream_export(db.bookings, {}, ["id", "notes"], "csv", batch_size=2))
+    assert list(csv.reader(io.StringIO(body.decode()))) == [
+        ["id", "notes"], *[[f"b{i}", json.dumps({"court": i})] for i in range(5)],
+    ]
+
+    body = await collect(stream_export(db.bookings, {"id": "b1"}, ["id", "date"], "ndjson", compress=True))
+    assert gzip.decompress(body) == b'{"id": "b1", "date": "2026-11-07"}\n'
+
+
+def add_booking(server, client, **fields):
+    booking = server.Booking(venue_id="v1", venue_name="Arena", date="2026-11-07", time_slot="06:00 PM",
+                             sport="Football", total_price=500, user_id="u1", user_name="U",
+                             super_video_enabled=False, **fields)
+    client.portal.call(server.db.bookings.insert_one, booking.dict())
+    return booking
+
+
+def test_export_endpoint_filters_and_formats(server, client):
+    kept = add_booking(server, client)
+    add_booking(server, client, status="cancelled")
+
+    response = client.get("/api/admin/export/bookings",
+                          params={"columns": "id,status,total_price", "status": "confirmed"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith('attachment; filename="bookings-')
+    assert list(csv.reader(io.StringIO(response.text))) == [["id", "status", "total_price"],
+                                                            [kept.id, "confirmed", "500.0"]]
+
+    response = client.get("/api/admin/export/bookings", params={"format": "ndjson", "columns": "id", "gzip": True})
+    rows = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+    assert len(rows) == 2 and rows[0] == {"id": kept.id}
+
+    assert client.get("/api/admin/export/payments").status_code == 404
+    assert client.get("/api/admin/export/bookings", params={"format": "xml"}).status_code == 400
+    assert client.get("/api/admin/export/bookings", params={"columns": "id,password"}).status_code == 400
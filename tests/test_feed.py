@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from feed import CandidatePool, FeedRanker
+
+
+def create_venue(client):
+    venue = {"name": "Arena", "location": "Indiranagar", "sport": "Badminton", "base_price": 500,
+             "opening_time": "05:00 PM", "closing_time": "08:00 PM"}
+    return client.post("/api/admin/venues", json=venue).json()
+
+
+def create_video(client, **fields):
+    video = {"venue_name": "Arena", "sport": "Badminton", "user_id": "u1", "user_name": "U", **fields}
+    return client.post("/api/videos", json=video).json()
+
+
+def test_feed_pages_carry_venue_cards(client):
+    venue = create_venue(client)
+    first = create_video(client, venue_id=venue["id"])
+    second = create_video(client)
+    third = create_video(client, venue_id=venue["id"])
+
+    page = client.get("/api/feed", params={"limit": 2}).json()
+    assert [item["video"]["id"] for item in page["items"]] == [third["id"], second["id"]]
+    card = page["items"][0]["venue"]
+    assert (card["id"], card["name"], card["base_price"]) == (venue["id"], "Arena", 500)
+    assert page["items"][1]["venue"] is None
+
+    rest = client.get("/api/feed", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [item["video"]["id"] for item in rest["items"]] == [first["id"]]
+    assert rest["items"][0]["venue"]["id"] == venue["id"]
+    assert rest["next_cursor"] is None
+
+
+def test_invalid_feed_cursor_is_rejected(client):
+    assert client.get("/api/feed", params={"cursor": "not a cursor"}).status_code == 400
+
+
+def pool_video(video_id, venue_id, sport="Badminton", user_id="u2", hours_old=1, **fields):
+    return {"id": video_id, "venue_id": venue_id, "sport": sport, "user_id": user_id,
+            "created_at": datetime(2026, 11, 1) - timedelta(hours=hours_old), **fields}
+
+
+def test_candidate_pool_ranks_by_affinity():
+    now = datetime(2026, 11, 1)
+    pool = CandidatePool([
+        pool_video("booked", "v1", hours_old=48),
+        pool_video("nearby", "v2", hours_old=24),
+        pool_video("same-sport", "v3", hours_old=2),
+        pool_video("other-sport", "v3", sport="Football"),
+        pool_video("own", "v1", user_id="u1"),
+    ], {"v1": "Indiranagar", "v2": "Indiranagar", "v3": "Koramangala"}, now)
+
+    ranked = pool.rank("u1", {"v1": 2}, {"Badminton": 2}, limit=10)
+    # Own clips are never suggested; unrelated sports at unvisited venues aren't shortlisted
+    assert ranked == ["booked", "nearby", "same-sport"]
+    assert pool.rank("u1", {"v1": 2}, {"Badminton": 2}, limit=1) == ["booked"]
+
+
+@pytest.mark.anyio
+async def test_rebuild_writes_candidates_for_active_users(db):
+    now = datetime.utcnow()
+    await db.venues.insert_many([
+        {"id": "v1", "location": "Indiranagar", "is_active": True},
+        {"id": "v2", "location": "Koramangala", "is_active": True},
+    ])
+    await db.videos.insert_many([
+        {**pool_video("near", "v1", user_id="u2"), "created_at": now, "is_public": True},
+        {**pool_video("far", "v2", user_id="u2"), "created_at": now - timedelta(hours=1), "is_public": True},
+        {**pool_video("hidden", "v1", user_id="u2"), "created_at": now, "is_public": False},
+    ])
+    await db.bookings.insert_many([
+        {"user_id": "u1", "venue_id": "v1", "sport": "Badminton", "status": "confirmed", "created_at": now},
+        {"user_id": "u3", "venue_id": "v1", "sport": "Badminton", "status": "confirmed",
+         "created_at": now - timedelta(days=200)},
+    ])
+
+    ranker = FeedRanker(db, batch_size=1)
+    assert await ranker.rebuild() == {"users": 1, "pool": 2}
+    assert await ranker.for_user("u1") == ["near", "far"]
+    assert await ranker.for_user("u3") is None
+
+
+def test_personal_feed_pages_through_candidates(server, client):
+    for video_id in ("a", "b", "c"):
+        client.portal.call(server.db.videos.insert_one, {
+            "id": video_id, "venue_name": "Arena", "sport": "Badminton", "user_id": "u2", "user_name": "U",
+            "is_public": video_id != "b", "created_at": datetime.utcnow(),
+        })
+    client.portal.call(server.db.feed_candidates.insert_one, {"user_id": "u1", "video_ids": ["c", "b", "a"]})
+
+    page = client.get("/api/feed", params={"user_id": "u1", "limit": 2}).json()
+    # "b" was hidden after ranking and drops out of its slice
+    assert [item["video"]["id"] for item in page["items"]] == ["c"]
+    assert page["next_cursor"] == "p:2"
+    rest = client.get("/api/feed", params={"user_id": "u1", "limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [item["video"]["id"] for item in rest["items"]] == ["a"]
+    assert rest["next_cursor"] is None
+
+    # Users without a candidate list get the public feed
+    fallback = client.get("/api/feed", params={"user_id": "u9"}).json()
+    assert [item["video"]["id"] for item in fallback["items"]] == ["c", "a"]
@@ -0,0 +1,52 @@
+import json
+
+
+def test_venue_import_reports_bad_rows_and_updates_in_place(client):
+    body = (
+        "name,location,sport,base_price,amenities\n"
+        "Arena,Indiranagar,Badminton,500,Parking|Showers\n"
+        "Court,Koramangala,Tennis,cheap,\n"
+        "Field,HSR,Football,900,\n"
+        "Field,HSR,Football,950,\n"
+    )
+    report = client.post("/api/admin/import/venues", content=body).json()
+    assert (report["rows"], report["inserted"], report["updated"], report["failed"]) == (4, 2, 0, 2)
+    assert [e["row"] for e in report["errors"]] == [3, 4]
+    assert report["errors"][0]["error"].startswith("base_price:")
+    assert report["errors"][1]["error"] == "Superseded by row 5 with the same key"
+
+    # Columns left out keep their stored values
+    body = "name,location,sport,base_price\nArena,Indiranagar,Badminton,550\n"
+    report = client.post("/api/admin/import/venues", content=body).json()
+    assert (report["inserted"], report["updated"], report["failed"]) == (0, 1, 0)
+    arena = next(v for v in client.get("/api/admin/venues").json() if v["name"] == "Arena")
+    assert (arena["base_price"], arena["amenities"]) == (550, ["Parking", "Showers"])
+
+
+def test_booking_import_prices_rows_and_reports_errors(client):
+    venue = client.post("/api/admin/venues", json={
+        "name": "Arena", "location": "Indiranagar", "sport": "Badminton", "base_price": 500,
+        "opening_time": "06:00 PM", "closing_time": "08:00 PM",
+    }).json()
+    row = {"venue_id": venue["id"], "venue_name": "Arena", "date": "2026-11-07", "time_slot": "06:00 PM",
+           "sport": "Badminton", "user_id": "u1", "user_name": "U"}
+    lines = [
+        json.dumps(row),
+        json.dumps({**row, "venue_id": "missing"}),
+        json.dumps({**row, "time_slot": "11:00 PM"}),
+        json.dumps({**row, "status": "pending"}),
+        "{not json",
+        "[]",
+    ]
+    report = client.post("/api/admin/import/bookings", params={"format": "ndjson"}, content="\n".join(lines)).json()
+    assert (report["rows"], report["inserted"], report["failed"]) == (6, 1, 5)
+    errors = {e["row"]: e["error"] for e in report["errors"]}
+    assert errors[2] == "Unknown venue_id missing" and errors[3] == "Unknown time_slot 11:00 PM"
+    assert errors[4].startswith("status must be one of") and errors[5].startswith("Invalid JSON")
+    assert errors[6] == "Expected a JSON object"
+
+    booking, = client.get("/api/admin/bookings").json()
+    assert booking["total_price"] == 500
+
+    assert client.post("/api/admin/import/users", content="").status_code == 404
+    assert client.post("/api/admin/import/venues", params={"format": "xlsx"}, content="").status_code == 400
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from jobs import CANCELLED, DEAD, DONE, LEASED, QUEUED, JobQueue, WorkerPool
+
+
+@pytest.fixture
+def queue(db):
+    return JobQueue(db, visibility_timeout=60, max_attempts=2, backoff_base=30)
+
+
+@pytest.mark.anyio
+async def test_dedupe_key_enqueues_once_and_reschedule_revives(queue):
+    first = await queue.enqueue("reminder", {"booking_id": "b1"}, dedupe_key="reminder:b1")
+    second = await queue.enqueue("reminder", {"booking_id": "b1"}, dedupe_key="reminder:b1")
+    assert second["id"] == first["id"]
+    assert await queue.collection.count_documents({}) == 1
+
+    await queue.cancel("reminder:b1")
+    assert (await queue.collection.find_one({"id": first["id"]}))["status"] == CANCELLED
+    run_at = datetime.utcnow() + timedelta(hours=1)
+    await queue.reschedule("reminder:b1", run_at)
+    job = await queue.collection.find_one({"id": first["id"]})
+    assert job["status"] == QUEUED and job["attempts"] == 0
+
+
+@pytest.mark.anyio
+async def test_lease_is_exclusive_until_it_expires(queue):
+    await queue.enqueue("reminder", {})
+    await queue.enqueue("later", {}, run_at=datetime.utcnow() + timedelta(hours=1))
+
+    job = await queue.lease("w1")
+    assert job["type"] == "reminder" and job["status"] == LEASED and job["attempts"] == 1
+    assert await queue.lease("w2") is None
+
+    # w1 dies: once its lease expires w2 takes the job over and w1 can't complete it
+    await queue.collection.update_one({"id": job["id"]}, {"$set": {"lease_expires_at": datetime.utcnow()}})
+    taken = await queue.lease("w2")
+    assert taken["id"] == job["id"] and taken["lease_owner"] == "w2" and taken["attempts"] == 2
+    assert not await queue.extend(job)
+    await queue.complete(job)
+    assert (await queue.collection.find_one({"id": job["id"]}))["status"] == LEASED
+
+    await queue.complete(taken, {"sent": True})
+    done = await queue.collection.find_one({"id": job["id"]})
+    assert done["status"] == DONE and done["result"] == {"sent": True} and done["finished_at"]
+
+
+@pytest.mark.anyio
+async def test_failures_back_off_then_dead_letter(queue):
+    queued = await queue.enqueue("reminder", {})
+
+    job = await queue.lease("w1")
+    assert await queue.fail(job, "boom") == QUEUED
+    retry = await queue.collection.find_one({"id": queued["id"]})
+    assert retry["run_at"] >= datetime.utcnow() + timedelta(seconds=25) and retry["last_error"] == "boom"
+    assert await queue.lease("w1") is None
+
+    await queue.collection.update_one({"id": queued["id"]}, {"$set": {"run_at": datetime.utcnow()}})
+    job = await queue.lease("w1")
+    assert await queue.fail(job, "boom again") == DEAD
+    assert await queue.depth() == {"reminder": {DEAD: 1}}
+
+    assert await queue.retry(queued["id"])
+    assert (await queue.lease("w1"))["attempts"] == 1
+
+
+@pytest.mark.anyio
+async def test_failing_after_the_lease_was_lost_leaves_the_job_alone(queue):
+    await queue.enqueue("super_video", {}, max_attempts=1)
+    job = await queue.lease("w1")
+    await queue.collection.update_one({"id": job["id"]}, {"$set": {"lease_expires_at": datetime.utcnow()}})
+    assert (await queue.lease("w2"))["lease_owner"] == "w2"
+    dead = []
+
+    async def handler(job):
+        raise RuntimeError("boom")
+
+    async def on_dead(job):
+        dead.append(job["id"])
+
+    pool = WorkerPool(queue, {"super_video": handler}, dead_letter_handlers={"super_video": on_dead})
+    await pool._execute(job)
+    assert await queue.fail(job, "boom") is None
+    assert dead == []
+    assert (await queue.collection.find_one({"id": job["id"]}))["lease_owner"] == "w2"
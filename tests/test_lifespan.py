@@ -0,0 +1,47 @@
+import time
+
+
+def wait_until_ready(client, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/api/health/ready")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.02)
+    return response
+
+
+def test_failed_warmup_is_retried_until_ready(server, client_factory, monkeypatch):
+    calls = []
+    ensure_indexes = server.ensure_indexes
+
+    async def flaky_ensure_indexes():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("mongo unavailable")
+        await ensure_indexes()
+
+    monkeypatch.setattr(server, "ensure_indexes", flaky_ensure_indexes)
+    monkeypatch.setattr(server, "WARMUP_RETRY_MIN_SECONDS", 0.2)
+    new_client = client_factory()
+    monkeypatch.setattr(server, "JOB_WORKERS", 1)
+    with new_client as client:
+        assert client.get("/api/health/ready").status_code == 503
+        # Job workers wait for a ready pool
+        assert server.job_workers is None
+        assert wait_until_ready(client).json()["status"] == "ready"
+        assert server.job_workers is not None
+    assert len(calls) == 3
+    assert server.job_workers is None
+
+
+def test_hot_cache_is_bounded(server):
+    cache, limit = server.hot_cache, server.hot_cache.max_entries
+    try:
+        for i in range(limit + 10):
+            cache.set(f"test:{i}", i)
+        assert len(cache._entries) == limit
+        assert cache.get("test:0") is None and cache.get("test:9") is None
+        assert cache.get(f"test:{limit + 9}") == limit + 9
+    finally:
+        cache.invalidate("test:")
@@ -0,0 +1,35 @@
+import pytest
+
+from media import MediaPipeline, MediaSourceError
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/admin.png",
+    "http://localhost:8001/api/admin/stats",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/photo.jpg",
+    "file:///etc/passwd",
+    "/api/media/photo.jpg",
+])
+async def test_rejects_non_public_sources(db, url):
+    pipeline = MediaPipeline(db, storage=None, executor=None)
+    with pytest.raises(MediaSourceError):
+        await pipeline.check_source(url)
+
+
+@pytest.mark.anyio
+async def test_rejects_hosts_outside_the_allowlist(db):
+    pipeline = MediaPipeline(db, storage=None, executor=None, allowed_hosts=["images.unsplash.com"])
+    with pytest.raises(MediaSourceError, match="not allowed"):
+        await pipeline.check_source("https://example.com/photo.jpg")
+
+
+@pytest.mark.anyio
+async def test_image_change_back_is_processed_again(app):
+    venue = {"id": "v1", "image": "https://images.unsplash.com/a.jpg", "images": [], "revision": 0}
+    for revision, image in enumerate(["a", "b", "a"]):
+        venue.update(revision=revision, image=f"https://images.unsplash.com/{image}.jpg")
+        await app.schedule_image_variants("venues", venue)
+    await app.schedule_image_variants("venues", venue)  # Same revision: deduped
+    assert await app.db.jobs.count_documents({"type": "image_variants"}) == 3
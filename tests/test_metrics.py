@@ -0,0 +1,24 @@
+import pytest
+from pymongo.errors import ExecutionTimeout
+from starlette.requests import Request
+
+from metrics import metrics
+
+
+def deadline_counts():
+    return {tuple(row["labels"].items()): row["value"] for row in metrics.snapshot().get("deadline_exceeded", [])}
+
+
+@pytest.mark.anyio
+async def test_deadline_metric_is_labelled_by_route_template(server):
+    route = next(r for r in server.app.routes if getattr(r, "path", None) == "/api/venues/{venue_id}")
+    before = deadline_counts()
+    for venue_id in ("v1", "v2"):
+        scope = {"type": "http", "method": "GET", "path": f"/api/venues/{venue_id}", "headers": [], "route": route}
+        response = await server.mongo_error_handler(Request(scope), ExecutionTimeout("operation exceeded time limit"))
+        assert response.status_code == 503
+
+    after = deadline_counts()
+    key = (("route", "/api/venues/{venue_id}"),)
+    assert after[key] - before.get(key, 0) == 2
+    assert not any("v1" in str(labels) for labels in after)
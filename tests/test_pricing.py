@@ -0,0 +1,74 @@
+import pytest
+
+from pricing import PricingEngine, compile_price_matrix
+from slots import SlotTemplates
+
+
+def create_venue(client, **fields):
+    venue = {"name": "Arena", "location": "Indiranagar", "sport": "Badminton", "base_price": 500,
+             "opening_time": "05:00 PM", "closing_time": "08:00 PM", **fields}
+    return client.post("/api/admin/venues", json=venue).json()
+
+
+def prices(client, venue, date="2026-11-02"):
+    slots = client.get(f"/api/venues/{venue['id']}/slots", params={"date": date}).json()["slots"]
+    return {s["time_slot"]: s["price"] for s in slots}
+
+
+def test_rules_apply_by_priority_with_date_rules_last():
+    layout = [["06:00 PM", "07:00 PM"]] * 7
+    rules = [
+        {"name": "double", "priority": 1, "multiplier": 2},
+        {"name": "evening", "priority": 0, "start_time": "07:00 PM", "surcharge": 100},
+        # Lowest priority, yet a date rule still applies after every weekly rule
+        {"name": "holiday", "priority": -5, "dates": ["2026-11-07"], "surcharge": 50},
+        {"name": "saturday", "priority": 2, "weekdays": [5], "multiplier": 1.5},
+    ]
+    matrix = compile_price_matrix(500, layout, rules)
+
+    # 2026-11-02 is a Monday, 2026-11-07 and 2026-11-14 Saturdays
+    assert matrix.prices("2026-11-02") == {"06:00 PM": 1000, "07:00 PM": 1200}
+    assert matrix.prices("2026-11-14") == {"06:00 PM": 1500, "07:00 PM": 1800}
+    assert matrix.prices("2026-11-07") == {"06:00 PM": 1550, "07:00 PM": 1850}
+    assert list(matrix.dated) == ["2026-11-07"]
+    assert matrix.price("2026-11-07", "05:00 PM") is None
+
+
+def test_rule_time_limits_can_be_cleared(client):
+    venue = create_venue(client)
+    rule = client.post("/api/admin/pricing/rules", json={
+        "name": "peak", "venue_id": venue["id"], "start_time": "06:00 PM", "surcharge": 100,
+    }).json()
+    assert prices(client, venue) == {"05:00 PM": 500, "06:00 PM": 600, "07:00 PM": 600}
+
+    response = client.put(f"/api/admin/pricing/rules/{rule['id']}", json={"start_time": None})
+    assert response.status_code == 200 and response.json()["start_time"] is None
+    assert prices(client, venue) == {"05:00 PM": 600, "06:00 PM": 600, "07:00 PM": 600}
+
+    assert client.put(f"/api/admin/pricing/rules/{rule['id']}", json={"surcharge": None}).status_code == 400
+
+
+@pytest.mark.anyio
+async def test_global_rule_change_recompiles_stale_venues_in_one_batch(db, monkeypatch):
+    engine = PricingEngine(db, SlotTemplates(db))
+    await db.venues.insert_many([
+        {"id": f"v{i}", "base_price": 100 * i, "opening_time": "06:00 PM", "closing_time": "07:00 PM",
+         "deleted_at": None}
+        for i in range(1, 4)
+    ])
+    await db.pricing_rules.insert_one({"id": "r1", "venue_id": None, "surcharge": 10, "is_active": True})
+    compiled = []
+    compile_batch = engine._compile
+
+    async def spy(venue_ids):
+        compiled.append(list(venue_ids))
+        return await compile_batch(venue_ids)
+
+    monkeypatch.setattr(engine, "_compile", spy)
+    await engine.matrices(["v1", "v2", "v3"])
+    await engine.invalidate()
+    matrices = await engine.matrices(["v3", "v1", "v2"])
+
+    assert compiled == [["v1", "v2", "v3"], ["v3", "v1", "v2"]]
+    assert list(matrices) == ["v3", "v1", "v2"]
+    assert matrices["v2"].price("2026-11-02", "06:00 PM") == 210
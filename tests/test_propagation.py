@@ -0,0 +1,55 @@
+import pytest
+
+from propagation import NamePropagator
+
+
+@pytest.mark.anyio
+async def test_only_stale_copies_are_rewritten_in_batches(db):
+    targets = {"venue": [("bookings", "venue_id", "venue_name"), ("videos", "venue_id", "venue_name")]}
+    propagator = NamePropagator(db, targets, batch_size=2, pause=0)
+    await db.bookings.insert_many([
+        {"id": "b1", "venue_id": "v1", "venue_name": "Old"},
+        {"id": "b2", "venue_id": "v1", "venue_name": "Old"},
+        {"id": "b3", "venue_id": "v1", "venue_name": "Old"},
+        {"id": "b4", "venue_id": "v1", "venue_name": "New"},
+        {"id": "b5", "venue_id": "v2", "venue_name": "Old"},
+    ])
+    batches = []
+
+    async def on_batch(collection, docs):
+        batches.append((collection, len(docs)))
+
+    assert await propagator.propagate("venue", "v1", "New", on_batch=on_batch) == {"bookings": 3, "videos": 0}
+    assert batches == [("bookings", 2), ("bookings", 1)]
+    names = {b["id"]: b["venue_name"] async for b in db.bookings.find()}
+    assert names == {"b1": "New", "b2": "New", "b3": "New", "b4": "New", "b5": "Old"}
+    assert (await db.bookings.find_one({"id": "b1"}))["revision"] == 1
+    assert await propagator.propagate("venue", "v1", "New") == {"bookings": 0, "videos": 0}
+
+
+def test_renaming_a_venue_updates_its_bookings_and_videos(server, client):
+    venue = client.post("/api/admin/venues", json={
+        "name": "Arena", "location": "Indiranagar", "sport": "Badminton", "base_price": 500,
+        "opening_time": "06:00 PM", "closing_time": "08:00 PM",
+    }).json()
+    client.post("/api/bookings", json={"venue_id": venue["id"], "venue_name": "Arena", "date": "2026-11-07",
+                                       "time_slot": "06:00 PM", "sport": "Badminton", "user_id": "u1",
+                                       "user_name": "U"})
+    client.post("/api/videos", json={"venue_id": venue["id"], "venue_name": "Arena", "sport": "Badminton",
+                                     "user_id": "u1", "user_name": "U"})
+    etag = client.get("/api/videos").headers["ETag"]
+
+    client.put(f"/api/admin/venues/{venue['id']}", json={"name": "Arena One"})
+    client.put(f"/api/admin/venues/{venue['id']}", json={"name": "Arena Two"})
+    job = client.portal.call(server.job_queue.lease, "test", ["propagate_names"])
+    result = client.portal.call(server.propagate_names, job)
+
+    # Each job applies the current name, so back-to-back renames settle on the last
+    assert result == {"name": "Arena Two", "updated": {"bookings": 1, "bookings_archive": 0, "videos": 1}}
+    job = client.portal.call(server.job_queue.lease, "test", ["propagate_names"])
+    assert client.portal.call(server.propagate_names, job)["updated"] == {
+        "bookings": 0, "bookings_archive": 0, "videos": 0,
+    }
+    assert client.get("/api/admin/bookings").json()[0]["venue_name"] == "Arena Two"
+    response = client.get("/api/videos", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()[0]["venue_name"] == "Arena Two"
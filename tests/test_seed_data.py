@@ -0,0 +1,13 @@
+import pytest
+
+import seed_data
+from versioning import current
+
+
+@pytest.mark.anyio
+async def test_reseeding_invalidates_venue_caches(db, monkeypatch):
+    monkeypatch.setattr(seed_data, "db", db)
+    monkeypatch.setattr(seed_data, "client", db.client)
+    await seed_data.seed_venues()
+    assert await current(db, "venues") == 1
+    assert await current(db, "pricing:venue-001") == 1
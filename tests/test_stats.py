@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from stats import VenueDailyStats
+
+
+def booking(venue_id, date, price=100, status="confirmed"):
+    return {"venue_id": venue_id, "date": date, "total_price": price, "status": status,
+            "super_video_enabled": False}
+
+
+@pytest.mark.anyio
+async def test_rebuild_keeps_rows_outside_range(db):
+    stats = VenueDailyStats(db, booking_collections=("bookings", "bookings_archive"))
+    await db.bookings.insert_many([
+        booking("v1", "2026-01-01"), booking("v1", "2026-01-10"), booking("v1", "2026-01-20"),
+    ])
+    await db.bookings_archive.insert_one(booking("v1", "2026-01-10", price=50, status="completed"))
+    assert await stats.rebuild() == 3
+
+    # Bookings removed outside the window must not affect rows outside it
+    await db.bookings.delete_many({"date": {"$in": ["2026-01-01", "2026-01-20"]}})
+    assert await stats.rebuild("2026-01-05", "2026-01-15", batch_size=1) == 1
+
+    rows = {row["date"]: row async for row in db.daily_venue_stats.find({}, {"_id": 0})}
+    assert sorted(rows) == ["2026-01-01", "2026-01-10", "2026-01-20"]
+    assert rows["2026-01-10"]["bookings"] == 2
+    assert rows["2026-01-10"]["revenue"] == 150
+
+
+@pytest.mark.anyio
+async def test_rebuild_removes_emptied_rows_inside_range(db):
+    stats = VenueDailyStats(db)
+    await db.bookings.insert_many([booking("v1", "2026-01-10"), booking("v2", "2026-01-10")])
+    await stats.rebuild()
+    await db.bookings.delete_one({"venue_id": "v2"})
+    await asyncio.sleep(0.01)  # Stale rows are found by an older (millisecond) updated_at
+    await stats.rebuild("2026-01-10", "2026-01-10")
+    assert [row["venue_id"] async for row in db.daily_venue_stats.find()] == ["v1"]
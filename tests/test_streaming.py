@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from storage import LocalStorage
+from streaming import FileHandleCache, parse_range
+
+
+def test_parse_range():
+    assert parse_range(None, 10) is None
+    assert parse_range("bytes=2-5", 10) == (2, 5)
+    assert parse_range("bytes=7-", 10) == (7, 9)
+    assert parse_range("bytes=-3", 10) == (7, 9)
+    assert parse_range("bytes=5-100", 10) == (5, 9)
+    assert parse_range("bytes=0-1,4-5", 10) is None  # Multi-range: whole file
+    for unsatisfiable in ("bytes=10-", "bytes=5-2", "bytes=-0"):
+        with pytest.raises(ValueError):
+            parse_range(unsatisfiable, 10)
+
+
+def test_replaced_file_is_reopened(tmp_path):
+    path = tmp_path / "rec.mp4"
+    path.write_bytes(b"old recording")
+    cache = FileHandleCache(max_open=4)
+
+    old_fd, old_stat = cache.acquire(str(path))
+    replacement = tmp_path / "rec.mp4.tmp"
+    replacement.write_bytes(b"new recording, longer")
+    os.replace(replacement, path)
+
+    new_fd, new_stat = cache.acquire(str(path))
+    assert new_stat.st_ino != old_stat.st_ino
+    assert os.pread(new_fd, 100, 0) == b"new recording, longer"
+    # The response still streaming the old file keeps its descriptor until it finishes
+    assert os.pread(old_fd, 100, 0) == b"old recording"
+    cache.release(str(path), old_fd)
+    cache.release(str(path), new_fd)
+    assert cache.acquire(str(path))[0] == new_fd
+
+
+def stored_video(server, client, monkeypatch, tmp_path, data: bytes):
+    monkeypatch.setattr(server, "storage", LocalStorage(tmp_path / "media", "/api/media"))
+    (tmp_path / "media" / "videos").mkdir(parents=True)
+    (tmp_path / "media" / "videos" / "rec.mp4").write_bytes(data)
+    video = {"id": "v1", "storage_key": "videos/rec.mp4", "video_url": "/api/media/videos/rec.mp4"}
+    client.portal.call(server.db.videos.insert_one, video)
+    return "/api/videos/v1/stream"
+
+
+def test_accel_redirect_hands_the_file_to_nginx(server, client, monkeypatch, tmp_path):
+    url = stored_video(server, client, monkeypatch, tmp_path, b"0123456789")
+    monkeypatch.setattr(server, "STREAM_ACCEL_REDIRECT_PREFIX", "/internal-media/")
+    response = client.get(url, headers={"Range": "bytes=0-3"})
+    assert response.status_code == 200 and response.content == b""
+    assert response.headers["X-Accel-Redirect"] == "/internal-media/videos/rec.mp4"
+    assert response.headers["Content-Type"] == "video/mp4"
+
+
+def test_range_requests_get_206_or_416(server, client, monkeypatch, tmp_path):
+    url = stored_video(server, client, monkeypatch, tmp_path, b"0123456789")
+
+    full = client.get(url)
+    assert full.status_code == 200 and full.content == b"0123456789"
+    assert full.headers["accept-ranges"] == "bytes"
+
+    partial = client.get(url, headers={"Range": "bytes=2-5"})
+    assert partial.status_code == 206 and partial.content == b"2345"
+    assert partial.headers["content-range"] == "bytes 2-5/10"
+
+    stale = client.get(url, headers={"Range": "bytes=2-5", "If-Range": '"not-the-etag"'})
+    assert stale.status_code == 200 and stale.content == b"0123456789"
+
+    beyond = client.get(url, headers={"Range": "bytes=20-"})
+    assert beyond.status_code == 416 and beyond.headers["content-range"] == "bytes */10"
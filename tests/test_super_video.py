@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+
+async def add_booking(server, **fields):
+    booking = server.Booking(venue_id="v1", venue_name="Arena", date="2026-01-05", time_slot="06:00 AM",
+                             sport="Football", total_price=500, user_id="u1", user_name="U",
+                             super_video_enabled=True, **fields)
+    await server.db.bookings.insert_one(booking.dict())
+    return booking
+
+
+@pytest.mark.anyio
+async def test_no_recording_retries_without_publishing(app):
+    booking = await add_booking(app)
+    with pytest.raises(RuntimeError):
+        await app.process_super_video({"payload": {"booking_id": booking.id}})
+    assert (await app.db.bookings.find_one({"id": booking.id}))["video_status"] == "pending"
+    assert await app.db.videos.count_documents({}) == 0
+
+
+@pytest.mark.anyio
+async def test_recording_creates_one_video(app):
+    booking = await add_booking(app, recording_url="/media/videos/rec.mp4")
+    await app.process_super_video({"payload": {"booking_id": booking.id}})
+    await app.process_super_video({"payload": {"booking_id": booking.id}})
+    saved = await app.db.bookings.find_one({"id": booking.id})
+    assert saved["video_status"] == "ready" and saved["video_url"] == "/media/videos/rec.mp4"
+    assert await app.db.videos.count_documents({"booking_id": booking.id}) == 1
+
+
+def create_booking(server, client):
+    booking = server.Booking(venue_id="v1", venue_name="Arena", date="2026-11-07", time_slot="06:00 PM",
+                             sport="Football", total_price=500, user_id="u1", user_name="U",
+                             super_video_enabled=True)
+    client.portal.call(server.db.bookings.insert_one, booking.dict())
+    return booking.id
+
+
+def test_long_poll_wakes_on_a_status_change(server, client):
+    booking_id = create_booking(server, client)
+    url = f"/api/bookings/{booking_id}/video-status/wait"
+
+    assert client.get(url).json() == {"type": "video_status", "booking_id": booking_id,
+                                      "video_status": "pending", "video_url": None, "changed": False}
+    assert client.get(url, params={"since": "pending", "timeout": 0}).json()["changed"] is False
+
+    with ThreadPoolExecutor(1) as pool:
+        waiting = pool.submit(client.get, url, params={"since": "pending", "timeout": 10})
+        client.put(f"/api/bookings/{booking_id}/video-status", params={"status": "processing"})
+        result = waiting.result(timeout=10).json()
+    assert (result["video_status"], result["changed"]) == ("processing", True)
+
+    assert client.get("/api/bookings/missing/video-status/wait").status_code == 404
+
+
+def test_status_socket_closes_once_the_video_is_ready(server, client):
+    booking_id = create_booking(server, client)
+    with client.websocket_connect(f"/api/ws/bookings/{booking_id}/video-status") as ws:
+        assert ws.receive_json()["video_status"] == "pending"
+        client.put(f"/api/bookings/{booking_id}/video-status", params={"status": "processing"})
+        assert ws.receive_json()["video_status"] == "processing"
+        client.put(f"/api/bookings/{booking_id}/video-status",
+                   params={"status": "ready", "video_url": "/media/videos/rec.mp4"})
+        ready = ws.receive_json()
+        assert (ready["video_status"], ready["video_url"]) == ("ready", "/media/videos/rec.mp4")
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
+
+    with client.websocket_connect("/api/ws/bookings/missing/video-status") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 4404
@@ -0,0 +1,68 @@
+import hashlib
+
+import pytest
+
+from storage import LocalStorage
+from uploads import MAX_CHUNKS, PROCESSING, UploadError, UploadManager
+
+
+@pytest.fixture
+def manager(db, tmp_path):
+    return UploadManager(db, LocalStorage(tmp_path / "media", "/media"), default_chunk_size=4, max_size=1000)
+
+
+async def body(data: bytes):
+    yield data
+
+
+async def send(manager, upload, index, data):
+    return await manager.put_chunk(upload, index, body(data), hashlib.sha256(data).hexdigest())
+
+
+@pytest.mark.anyio
+async def test_init_rejects_sizes_over_the_limits(manager):
+    with pytest.raises(UploadError) as error:
+        await manager.init("big.mp4", "video/mp4", total_size=1001)
+    assert error.value.status_code == 400
+
+    manager.max_size = 10 * MAX_CHUNKS
+    with pytest.raises(UploadError, match="chunk_size of at least 5"):
+        await manager.init("many.mp4", "video/mp4", total_size=5 * MAX_CHUNKS, chunk_size=4)
+    assert (await manager.init("ok.mp4", "video/mp4", total_size=5 * MAX_CHUNKS, chunk_size=5))["total_chunks"] == MAX_CHUNKS
+
+
+@pytest.mark.anyio
+async def test_missing_chunks_are_reported_as_ranges(manager):
+    data = b"0123456789abcdefghij!"  # 6 chunks of 4 bytes, the last one short
+    upload = await manager.init("clip.mp4", "video/mp4", total_size=len(data))
+    assert upload["total_chunks"] == 6
+    assert manager.missing_ranges(upload) == [[0, 5]]
+
+    await send(manager, upload, 1, data[4:8])
+    await send(manager, upload, 4, data[16:20])
+    upload = await manager.get(upload["id"])
+    assert manager.missing_ranges(upload) == [[0, 0], [2, 3], [5, 5]]
+    assert manager.missing_ranges(upload, limit=2) == [[0, 0], [2, 3]]
+    assert manager.missing_count(upload) == 4
+
+    with pytest.raises(UploadError) as error:
+        await manager.complete(upload)
+    assert error.value.status_code == 409
+
+    for index in (0, 2, 3, 5):
+        await send(manager, upload, index, data[index * 4:index * 4 + 4])
+    upload = await manager.get(upload["id"])
+    assert manager.missing_ranges(upload) == [] and manager.missing_count(upload) == 0
+    assert (await manager.complete(upload))["status"] == PROCESSING
+
+
+@pytest.mark.anyio
+async def test_chunks_are_checked_before_they_count(manager):
+    upload = await manager.init("clip.mp4", "video/mp4", total_size=6)
+    with pytest.raises(UploadError, match="larger than 2 bytes"):
+        await send(manager, upload, 1, b"abc")
+    with pytest.raises(UploadError, match="checksum"):
+        await manager.put_chunk(upload, 0, body(b"abcd"), "0" * 64)
+    with pytest.raises(UploadError, match="out of range"):
+        await send(manager, upload, 2, b"ab")
+    assert manager.missing_count(await manager.get(upload["id"])) == 2
@@ -0,0 +1,65 @@
+def create_venue(client, **fields):
+    venue = {"name": "Arena", "location": "Indiranagar", "sport": "Badminton", "base_price": 500, **fields}
+    return client.post("/api/admin/venues", json=venue).json()
+
+
+def book(client, venue, date, time_slot, **fields):
+    booking = {"venue_id": venue["id"], "venue_name": venue["name"], "date": date, "time_slot": time_slot,
+               "sport": venue["sport"], "user_id": "u1", "user_name": "U", **fields}
+    return client.post("/api/bookings", json=booking)
+
+
+def test_venue_slots_are_priced_for_the_requested_date(client):
+    venue = create_venue(client)
+    rule = {"name": "weekend", "venue_id": venue["id"], "weekdays": [5, 6], "surcharge": 100}
+    client.post("/api/admin/pricing/rules", json=rule)
+
+    monday = client.get(f"/api/venues/{venue['id']}", params={"date": "2026-11-02"}).json()
+    saturday = client.get(f"/api/venues/{venue['id']}", params={"date": "2026-11-07"}).json()
+    assert {s["price"] for s in monday["slots"]} == {500}
+    assert {s["price"] for s in saturday["slots"]} == {600}
+
+    listed = client.get("/api/venues", params={"date": "2026-11-07"}).json()
+    assert {s["price"] for s in listed[0]["slots"]} == {600}
+    assert client.get(f"/api/venues/{venue['id']}", params={"date": "07-11-2026"}).status_code == 400
+
+
+def test_booking_is_priced_on_the_server_and_marks_the_slot_taken(client):
+    venue = create_venue(client, opening_time="06:00 PM", closing_time="09:00 PM")
+    response = client.get(f"/api/venues/{venue['id']}", params={"date": "2026-11-07"})
+    etag = response.headers["ETag"]
+    assert [s["time"] for s in response.json()["slots"]] == ["06:00 PM", "07:00 PM", "08:00 PM"]
+
+    booking = book(client, venue, "2026-11-07", "07:00 PM", total_price=1).json()
+    assert booking["total_price"] == 500
+    assert book(client, venue, "2026-11-07", "05:00 PM").status_code == 400
+
+    response = client.get(f"/api/venues/{venue['id']}", params={"date": "2026-11-07"},
+                          headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [s["available"] for s in response.json()["slots"]] == [True, False, True]
+
+
+def test_slot_socket_sends_a_snapshot_then_deltas(client):
+    venue = create_venue(client, opening_time="06:00 PM", closing_time="08:00 PM")
+    with client.websocket_connect("/api/ws/slots") as ws:
+        ws.send_json({"action": "subscribe", "venue_id": venue["id"], "date": "2026-11-07"})
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert [(s["time_slot"], s["available"]) for s in snapshot["slots"]] == [
+            ("06:00 PM", True), ("07:00 PM", True),
+        ]
+
+        booking = book(client, venue, "2026-11-07", "07:00 PM").json()
+        book(client, venue, "2026-11-08", "07:00 PM")  # another day's channel
+        client.put(f"/api/admin/bookings/{booking['id']}/status", params={"status": "cancelled"})
+        deltas = [ws.receive_json() for _ in range(2)]
+        assert [(d["type"], d["time_slot"], d["available"]) for d in deltas] == [
+            ("slot", "07:00 PM", False), ("slot", "07:00 PM", True),
+        ]
+        assert {d["date"] for d in deltas} == {"2026-11-07"}
+
+        ws.send_json({"action": "subscribe", "venue_id": "missing", "date": "2026-11-07"})
+        assert ws.receive_json()["detail"] == "Venue not found"
+        ws.send_json({"action": "watch"})
+        assert ws.receive_json() == {"type": "error", "channel": None, "detail": "Invalid request"}
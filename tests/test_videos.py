@@ -0,0 +1,27 @@
+def create_video(client):
+    video = {"venue_name": "Arena", "sport": "Football", "user_id": "u1", "user_name": "U"}
+    return client.post("/api/videos", json=video).json()
+
+
+def test_counter_writes_refresh_the_feed(server, client):
+    video = create_video(client)
+    etag = client.get("/api/videos").headers["ETag"]
+    videos_version = client.portal.call(server.current, server.db, "videos")
+
+    assert client.put(f"/api/videos/{video['id']}/like").status_code == 200
+    assert client.put(f"/api/videos/{video['id']}/view").status_code == 200
+
+    response = client.get("/api/videos", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert (response.json()[0]["likes"], response.json()[0]["views"]) == (1, 1)
+    # Counters don't churn the collection version other caches are keyed on
+    assert client.portal.call(server.current, server.db, "videos") == videos_version
+
+    etag = response.headers["ETag"]
+    assert client.get("/api/videos", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_new_video_invalidates_feed_etag(client):
+    etag = client.get("/api/videos").headers["ETag"]
+    create_video(client)
+    assert client.get("/api/videos", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,13 @@
+import pytest
+
+import worker
+
+
+@pytest.mark.anyio
+async def test_workers_start_and_stop(server):
+    pool, scheduler = await worker.start_workers(concurrency=1)
+    try:
+        assert server.event_hub is not None
+        await server.job_queue.enqueue("rebuild_user_stats", {})
+    finally:
+        await worker.stop_workers(pool, scheduler)